@@ -0,0 +1,139 @@
+"""Account authentication.
+
+Users of the tokens are cached in two tiers: a small LRU in the process, which is
+read first, and the shared cache behind it. A cache hit authenticates a request
+without any query. Entries are dropped from both tiers when the token is deleted
+(e.g. on logout) or its user is saved (e.g. a password change or deactivation);
+the LRUs of the other processes keep them for "settings.TOKEN_LOCAL_CACHE_TIMEOUT"
+seconds at most.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class LocalCache:
+    """Thread-safe LRU of expiring entries, local to the process.
+
+    Args:
+        size (int): maximum number of the entries.
+        timeout (float): seconds to keep an entry.
+    """
+
+    def __init__(self, size, timeout):
+        """Initialize an empty cache."""
+        self.size = size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get the value of a key; None if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        """Set the value of a key; the least recently used entries are dropped."""
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Delete a key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Delete all the keys."""
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(
+    settings.TOKEN_LOCAL_CACHE_SIZE, settings.TOKEN_LOCAL_CACHE_TIMEOUT
+)
+
+
+def _key(token_key) -> str:
+    # Tokens are secrets, so only their digests are used as cache keys.
+    digest = hashlib.sha256(token_key.encode()).hexdigest()
+    return ":".join((settings.TOKEN_CACHE_PREFIX, digest))
+
+
+def get_token_user(token_key):
+    """Get the user of a token from the cache tiers, or the database.
+
+    Returns:
+        User: the user; None if the token doesn't exist.
+    """
+    key = _key(token_key)
+    user = local_cache.get(key)
+    if user is None:
+        user = cache.get(key)
+        if user is None:
+            token = Token.objects.select_related("user").filter(key=token_key).first()
+            if token is None:
+                return None
+            user = token.user
+            cache.set(key, user, settings.TOKEN_CACHE_TIMEOUT)
+        local_cache.set(key, user)
+    # Requests may change their user, so the cached one isn't shared.
+    return copy.copy(user)
+
+
+def forget_tokens(token_keys: Iterable[str]):
+    """Drop the cached users of tokens from both tiers."""
+    keys = [_key(token_key) for token_key in token_keys]
+    for key in keys:
+        local_cache.delete(key)
+    if keys:
+        cache.delete_many(keys)
+
+
+def forget_tokens_on_commit(token_keys: Iterable[str]):
+    """Drop the cached users of tokens now and on commit.
+
+    It's dropped after the commit too, so it isn't cached again from the old rows
+    by a concurrent request.
+    """
+    token_keys = list(token_keys)
+    if not token_keys:
+        return
+    forget_tokens(token_keys)
+    transaction.on_commit(lambda: forget_tokens(token_keys))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication whose users are cached."""
+
+    def authenticate_credentials(self, key):
+        """DRF built-in method."""
+        user = get_token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        # The token isn't fetched; it's only used to be deleted, e.g. on logout.
+        return user, Token(key=key, user=user)
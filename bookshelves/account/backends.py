@@ -1,8 +1,44 @@
 """Account backends."""
-from django.contrib.auth.backends import BaseBackend
-from django.db.models import Q
+import re
 
+from django.conf import settings
+from django.contrib.auth.backends import (
+    BaseBackend,
+    ModelBackend
+)
+from django.db.models.functions import Lower
+
+from .hashers import check_user_password
 from .models import User
+from .permissions import get_permissions
+
+
+def _lookups(identifier):
+    """Lookups of a login identifier by its type, in order.
+
+    Every lookup hits one unique or indexed column. Usernames may look like
+    mobiles or emails, so they're looked up last.
+    """
+    if re.match(settings.MOBILE_PATTERN, identifier):
+        yield User.objects.filter(mobile=identifier)
+    elif "@" in identifier:
+        yield User.objects.alias(email_lower=Lower("email")).filter(
+            email_lower=identifier.lower()
+        )
+    yield User.objects.filter(username=identifier)
+
+
+def get_login_user(identifier):
+    """Get the user of a login identifier: a mobile, an email or a username.
+
+    Returns:
+        User: the user; None if there's no such user.
+    """
+    for queryset in _lookups(identifier):
+        user = queryset.order_by("pk").first()
+        if user is not None:
+            return user
+    return None
 
 
 class AccountBackend(BaseBackend):
@@ -10,12 +46,24 @@ class AccountBackend(BaseBackend):
 
     def authenticate(self, request, **kwargs):
         """Authenticate users."""
-        user = User.objects.filter(
-            Q(mobile=kwargs["username"])
-            | Q(username=kwargs["username"])
-            | Q(email=kwargs["username"])
-        ).first()
-        if not user or not user.check_password(kwargs["password"]):
+        user = get_login_user(kwargs["username"])
+        if not user or not check_user_password(user, kwargs["password"]):
             return None
         return user
 
+
+class PermissionSnapshotBackend(ModelBackend):
+    """Model backend whose permission checks read the users' snapshots.
+
+    A user's snapshot is read once per user object, i.e. once per request.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """Django built-in method."""
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_all_permissions(user_obj, obj=obj)
+        if not hasattr(user_obj, "_snapshot_perm_cache"):
+            user_obj._snapshot_perm_cache = get_permissions(user_obj)
+        return user_obj._snapshot_perm_cache
@@ -0,0 +1,69 @@
+"""Account password hashing.
+
+The hasher policy is the "settings.PASSWORD_HASHER" (first of the
+"settings.PASSWORD_HASHERS") and the "settings.PASSWORD_HASH_ITERATIONS" of the
+PBKDF2 hashes. Passwords hashed by another policy are rehashed by the policy
+when their users log in.
+
+Hashing runs off the request thread, in a pool of
+"settings.PASSWORD_HASHING_THREADS" threads per process. It caps the CPU which
+logins take from a worker; the hashing releases the GIL, so the other threads of
+the worker keep serving requests meanwhile. Only the hashing runs in the pool;
+the database is always used by the request thread.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+# Threads are started by the first hashing, i.e. after the workers are forked.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASHING_THREADS, thread_name_prefix="password-hashing"
+)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher of the "settings.PASSWORD_HASH_ITERATIONS"."""
+
+    @property
+    def iterations(self):
+        """Iterations of the new hashes; hashes of other iterations must be updated."""
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+def _check(password, encoded):
+    rehashed = []
+    is_correct = hashers.check_password(
+        password,
+        encoded,
+        setter=lambda raw: rehashed.append(hashers.make_password(raw)),
+    )
+    return is_correct, rehashed[0] if rehashed else None
+
+
+def hash_password(password) -> str:
+    """Hash a password by the policy, off the request thread."""
+    return _executor.submit(hashers.make_password, password).result()
+
+
+def hash_passwords(passwords) -> list:
+    """Hash passwords by the policy concurrently, off the request thread.
+
+    Missing (None) passwords are hashed as unusable ones.
+    """
+    return list(_executor.map(hashers.make_password, passwords))
+
+
+def check_user_password(user, password) -> bool:
+    """Check the password of a user, off the request thread.
+
+    A correct password which is hashed by another policy is rehashed by the
+    policy and saved.
+    """
+    is_correct, rehashed = _executor.submit(_check, password, user.password).result()
+    if rehashed is not None:
+        user.password = rehashed
+        user._password = None
+        user.save(update_fields=["password"])
+    return is_correct
@@ -0,0 +1,125 @@
+"""Measure the login throughput."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from account.backends import get_login_user
+from account.hashers import check_user_password
+from account.models import User
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Look up the users of generated logins by every identifier type, by the typed "
+        "lookups and the former OR query, check their passwords by concurrent request "
+        "threads of one worker, and report the throughput; the generated rows are "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10000,
+            help="Number of users which are generated.",
+        )
+        parser.add_argument(
+            "--logins",
+            type=int,
+            default=1000,
+            help="Number of logins of every identifier type.",
+        )
+        parser.add_argument(
+            "--passwords",
+            type=int,
+            default=100,
+            help="Number of logins whose passwords are checked by the hasher policy.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.PASSWORD_HASHING_THREADS,
+            help="Number of request threads of the worker.",
+        )
+
+    def _seed(self, users):
+        """Create the users of the benchmark.
+
+        Rows are bulk created, so no signals (e.g. the verification codes) are sent.
+        """
+        password = make_password("benchmark")
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"benchmark-{index}",
+                    mobile=f"9{index:010d}",
+                    email=f"Benchmark-{index}@example.com",
+                    password=password,
+                )
+                for index in range(users)
+            ],
+            batch_size=1000,
+        )
+
+    @staticmethod
+    def _or_query(identifier):
+        """Look up a user like before, by one OR query of all the identifier columns."""
+        return User.objects.filter(
+            Q(mobile=identifier) | Q(username=identifier) | Q(email=identifier)
+        ).first()
+
+    def _measure(self, lookup, identifiers):
+        started = time.monotonic()
+        for identifier in identifiers:
+            if lookup(identifier) is None:
+                raise AssertionError(f"User of {identifier} not found.")
+        return len(identifiers) / max(time.monotonic() - started, 1e-6)
+
+    def _log_in(self, passwords, threads):
+        """Check the passwords of the users by concurrent request threads."""
+        # Passwords are hashed by the policy, so they aren't rehashed.
+        users = list(
+            User.objects.filter(username__startswith="benchmark-").order_by("pk")[
+                :passwords
+            ]
+        )
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as requests:
+            if not all(
+                requests.map(lambda user: check_user_password(user, "benchmark"), users)
+            ):
+                raise AssertionError("Password not matched.")
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Logging in ({len(users)} logins, {threads} request threads, "
+            f"{settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}, "
+            f"{len(users) / elapsed:.0f} logins/s per worker)... {self.style.SUCCESS('OK')}"
+        )
+
+    def handle(self, *args, **kwargs):
+        users, logins = kwargs["users"], kwargs["logins"]
+        with transaction.atomic():
+            self._seed(users)
+            step = max(users // max(logins, 1), 1)
+            indexes = range(0, users, step)[:logins]
+            for kind, identifiers in (
+                ("mobile", [f"9{index:010d}" for index in indexes]),
+                ("email", [f"Benchmark-{index}@example.com" for index in indexes]),
+                ("username", [f"benchmark-{index}" for index in indexes]),
+            ):
+                typed = self._measure(get_login_user, identifiers)
+                or_query = self._measure(self._or_query, identifiers)
+                self.stdout.write(
+                    f"Looking up by {kind} ({len(identifiers)} logins, {typed:.0f} logins/s "
+                    f"typed, {or_query:.0f} logins/s by the OR query)... "
+                    f"{self.style.SUCCESS('OK')}"
+                )
+
+            self._log_in(kwargs["passwords"], max(kwargs["threads"], 1))
+            transaction.set_rollback(True)
+        self.stdout.write("Finished")
@@ -0,0 +1,87 @@
+"""Import users from a CSV or JSON lines file."""
+import sys
+import time
+from pathlib import Path
+
+from account.serializers import BulkRegisterSerializer
+from base.imports import read_rows
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Register users from a CSV or JSON lines file of their username, mobile, email "
+        "and password, in batches; a batch with an invalid row isn't imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help='Path of the file; "-" reads the standard input.'
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Format of the file; it's taken from the file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help=(
+                "Number of rows which are written together; it's capped at the "
+                "BULK_REGISTRATION_LIMIT setting."
+            ),
+        )
+
+    def _write(self, batch, imported):
+        serializer = BulkRegisterSerializer(data=batch, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = {
+                    f"row {imported + number}": error
+                    for number, error in enumerate(errors, start=1)
+                    if error
+                }
+            raise CommandError(
+                f"Invalid rows ({errors}). {imported} rows are imported."
+            )
+        serializer.save()
+
+    def handle(self, *args, **kwargs):
+        path = kwargs["path"]
+        file_format = kwargs["format"] or Path(path).suffix.lstrip(".").lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("The format of the file should be given by --format.")
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        # Larger batches are rejected by the bulk registration serializer.
+        batch_size = min(kwargs["batch_size"], settings.BULK_REGISTRATION_LIMIT)
+        started = time.monotonic()
+        imported = 0
+        batch = []
+        try:
+            for row in read_rows(stream, file_format):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self._write(batch, imported)
+                    imported += len(batch)
+                    batch = []
+                    if kwargs["verbosity"] > 1:
+                        rate = imported / max(time.monotonic() - started, 1e-6)
+                        self.stdout.write(f"{imported} rows ({rate:.0f} rows/s)")
+            if batch:
+                self._write(batch, imported)
+                imported += len(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        rate = imported / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Importing users ({imported} rows, {rate:.0f} rows/s)... "
+            f"{self.style.SUCCESS('OK')}"
+        )
+        self.stdout.write("Finished")
@@ -1,15 +1,17 @@
 """Account models."""
-import random
-
 from base.models import Base
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.core.cache import cache
 from django.db import models
 from django.db.models import signals
+from django.db.models.functions import Lower
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
-from .verification import send_verification_code
+from .authentication import forget_tokens_on_commit
+from .permissions import forget_permissions_on_commit, outdate_permissions_on_commit
+from .verification import new_verification_code, send_verification_code
 
 
 class User(AbstractUser):
@@ -23,6 +25,10 @@ class User(AbstractUser):
 
     REQUIRED_FIELDS = ["mobile", "password"]
 
+    class Meta(AbstractUser.Meta):
+        # Used by the logins by email, which are case-insensitive.
+        indexes = [models.Index(Lower("email"), name="user_email_lower_idx")]
+
     def __str__(self):
         return self.get_full_name()
 
@@ -30,25 +36,18 @@ class User(AbstractUser):
 @receiver(signals.post_save, sender=User)
 def user_default_groups(instance, created, **_):
     """Add a new user in default group."""
-    if (
-        created
-        and not instance.groups.filter(name=settings.DEFAULT_USER_GROUP).exists()
-    ):
-        group = Group.objects.get(name=settings.DEFAULT_USER_GROUP)
-        instance.groups.add(group.id)
-        instance.save()
+    # Imported here to avoid a circular import.
+    from .provisioning import add_default_group
+
+    if created:
+        add_default_group([instance])
 
 
 @receiver(signals.post_save, sender=User)
 def user_verification_code(instance, created, **_):
-    """Add a new user in default group."""
+    """Send the verification code of a new user."""
     if created:
-        verification_code = str(
-            random.randint(*settings.VERIFICATION_CODE_LENGTH_RANGE)
-        )
-        encrypted_verification_code = settings.CRYPTOGRAPHY.encrypt(
-            verification_code.encode()
-        )
+        verification_code, encrypted_verification_code = new_verification_code()
         cache.set(
             encrypted_verification_code,
             instance.id,
@@ -57,6 +56,59 @@ def user_verification_code(instance, created, **_):
         send_verification_code(instance, verification_code, encrypted_verification_code)
 
 
+@receiver(signals.post_save, sender=Group)
+@receiver(signals.post_delete, sender=Group)
+def default_group_changed(**_):
+    """Drop the cached id of the default group when a group is saved or deleted."""
+    # Imported here to avoid a circular import.
+    from .provisioning import forget_default_group_on_commit
+
+    forget_default_group_on_commit()
+
+
+@receiver(signals.post_save, sender=User)
+def user_tokens_changed(instance, created, **_):
+    """Drop the cached users of a saved user's tokens, e.g. on deactivation."""
+    if not created:
+        forget_tokens_on_commit(
+            Token.objects.filter(user=instance).values_list("key", flat=True)
+        )
+
+
+@receiver(signals.post_delete, sender=Token)
+def token_deleted(instance, **_):
+    """Drop the cached user of a deleted token, e.g. on logout."""
+    forget_tokens_on_commit([instance.key])
+
+
+@receiver(signals.m2m_changed, sender=User.groups.through)
+@receiver(signals.m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(instance, action, reverse, pk_set, **_):
+    """Drop the permission snapshots of the users whose groups or permissions change."""
+    if not reverse:
+        if action.startswith("post_"):
+            forget_permissions_on_commit([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        forget_permissions_on_commit(pk_set)
+    elif action == "post_clear":
+        # The users of a group or a permission may be any number of users.
+        outdate_permissions_on_commit()
+
+
+@receiver(signals.m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(action, **_):
+    """Outdate all the permission snapshots when the groups' permissions change."""
+    if action.startswith("post_"):
+        outdate_permissions_on_commit()
+
+
+@receiver(signals.post_delete, sender=Group)
+@receiver(signals.post_delete, sender=Permission)
+def permissions_deleted(**_):
+    """Outdate all the permission snapshots when a group or a permission is deleted."""
+    outdate_permissions_on_commit()
+
+
 class Address(Base):
     """Address model"""
 
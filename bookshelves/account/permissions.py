@@ -0,0 +1,59 @@
+"""Account permission snapshots.
+
+The effective permissions of a user ("<app_label>.<codename>" of the user's and
+their groups' permissions) are compiled by one query and cached as one string,
+so the model permission checks of a request read the cache once. A user's
+snapshot is dropped when their groups or permissions change; changes of the
+groups' permissions bump a generation which outdates all the snapshots at once,
+since a group (e.g. the default one) may have any number of users.
+"""
+from typing import FrozenSet, Iterable
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+
+def _key(*parts) -> str:
+    return ":".join((settings.PERMISSION_SNAPSHOT_PREFIX, *map(str, parts)))
+
+
+def get_permissions(user) -> FrozenSet[str]:
+    """Get the effective permission names of a user from their snapshot."""
+    generation_key, key = _key("generation"), _key("user", user.pk)
+    values = cache.get_many([generation_key, key])
+    generation = values.get(generation_key, 0)
+    snapshot = values.get(key)
+    if snapshot is not None and snapshot[0] == generation:
+        return frozenset(snapshot[1].split()) if snapshot[1] else frozenset()
+
+    names = sorted(
+        f"{app_label}.{codename}"
+        for app_label, codename in Permission.objects.filter(
+            Q(user=user) | Q(group__user=user)
+        )
+        .values_list("content_type__app_label", "codename")
+        .distinct()
+    )
+    cache.set(key, (generation, " ".join(names)), settings.PERMISSION_SNAPSHOT_TIMEOUT)
+    return frozenset(names)
+
+
+def forget_permissions_on_commit(user_pks: Iterable[int]):
+    """Drop the permission snapshots of users on commit."""
+    keys = [_key("user", pk) for pk in user_pks or ()]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def outdate_permissions_on_commit():
+    """Outdate the permission snapshots of all the users on commit."""
+
+    def callback():
+        key = _key("generation")
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+    transaction.on_commit(callback)
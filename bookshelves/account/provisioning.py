@@ -0,0 +1,88 @@
+"""Account provisioning.
+
+Users are registered in bulk without the per-user signals: they're written by
+bulk inserts, added in the default group by one insert into the through table,
+and their verification codes are queued in batches after the commit. The id of
+the default group is cached, and dropped when a group is saved or deleted.
+"""
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+
+from .hashers import hash_passwords
+from .models import User
+from .verification import queue_verification_codes
+
+
+def _key() -> str:
+    return ":".join(("groups", settings.DEFAULT_USER_GROUP))
+
+
+def get_default_group_id() -> int:
+    """Get the id of the default group of the users.
+
+    Raises:
+        Group.DoesNotExist: the default group isn't created yet.
+    """
+    group_id = cache.get(_key())
+    if group_id is None:
+        group_id = Group.objects.values_list("pk", flat=True).get(
+            name=settings.DEFAULT_USER_GROUP
+        )
+        # Only committed groups are cached; a rolled back one may be read here.
+        transaction.on_commit(lambda: cache.set(_key(), group_id, None))
+    return group_id
+
+
+def forget_default_group_on_commit():
+    """Drop the cached id of the default group now and on commit."""
+    cache.delete(_key())
+    transaction.on_commit(lambda: cache.delete(_key()))
+
+
+def add_default_group(users: List[User], batch_size=500):
+    """Add saved new users, which have no groups, in the default group."""
+    through = User.groups.through
+    group_id = get_default_group_id()
+    through.objects.bulk_create(
+        [through(user_id=user.pk, group_id=group_id) for user in users],
+        batch_size=batch_size,
+    )
+
+
+def register_users(rows: Iterable[Dict], batch_size=500) -> List[User]:
+    """Register users in bulk.
+
+    Args:
+        rows (Iterable[Dict]): field values of the users; passwords are raw.
+        batch_size (int): number of the users which are written together.
+
+    Returns:
+        List[User]: the registered users.
+    """
+    rows = list(rows)
+    passwords = hash_passwords([row.get("password") for row in rows])
+    users = [
+        User(**{**row, "password": password}) for row, password in zip(rows, passwords)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        if any(user.pk is None for user in users):
+            # The database doesn't return the primary keys of bulk inserts.
+            pks = {}
+            for start in range(0, len(users), batch_size):
+                end = start + batch_size
+                batch = users[start:end]
+                pks.update(
+                    User.objects.filter(
+                        username__in=[user.username for user in batch]
+                    ).values_list("username", "pk")
+                )
+            for user in users:
+                user.pk = user.id = pks[user.username]
+        add_default_group(users, batch_size)
+        transaction.on_commit(lambda: queue_verification_codes(users, batch_size))
+    return users
@@ -1,11 +1,14 @@
 """Account serializers."""
-from django.contrib.auth.hashers import make_password
+from django.conf import settings
 from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from rest_framework import exceptions, serializers, status
 
+from .hashers import hash_password
 from .models import Address, User
+from .provisioning import register_users
 
 
 class ContentTypeSerializer(serializers.ModelSerializer):
@@ -196,14 +199,60 @@ class RegisterSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         """Customized 'validate' method to encrypt password."""
         if attrs.get("password"):
-            attrs["password"] = make_password(attrs["password"])
+            attrs["password"] = hash_password(attrs["password"])
         return super().validate(attrs)
 
 
+class BulkRegisterListSerializer(serializers.ListSerializer):
+    """Bulk register list serializer.
+
+    The uniqueness of the users is validated for all of them at once.
+    """
+
+    def validate(self, attrs):
+        """DRF built-in method."""
+        if len(attrs) > settings.BULK_REGISTRATION_LIMIT:
+            raise serializers.ValidationError(
+                f"Ensure there are no more than {settings.BULK_REGISTRATION_LIMIT} users."
+            )
+        errors = {}
+        for field in ("username", "mobile"):
+            values = [row[field] for row in attrs]
+            duplicates = {value for value in values if values.count(value) > 1}
+            duplicates.update(
+                User.objects.filter(**{f"{field}__in": values}).values_list(field, flat=True)
+            )
+            if duplicates:
+                errors[field] = [
+                    f"Users with these {field}s already exist: {', '.join(sorted(duplicates))}."
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        """DRF built-in method."""
+        return register_users(validated_data)
+
+
+class BulkRegisterSerializer(RegisterSerializer):
+    """Bulk register serializer."""
+
+    class Meta(RegisterSerializer.Meta):
+        list_serializer_class = BulkRegisterListSerializer
+        extra_kwargs = {
+            "username": {"validators": [UnicodeUsernameValidator()]},
+            "mobile": {"validators": []},
+        }
+
+    def validate(self, attrs):
+        """DRF built-in method; passwords are hashed in bulk on create."""
+        return attrs
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     """Change password serializer."""
 
     username = serializers.CharField(required=False)
     old_password = serializers.CharField()
     new_password = serializers.CharField()
-
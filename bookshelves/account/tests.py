@@ -1,9 +1,27 @@
 """Account tests."""
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from base.tests import BaseAPITestCase
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from parameterized import parameterized
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .authentication import CachedTokenAuthentication, local_cache
+from .backends import AccountBackend, get_login_user
+from .models import Address, User
+from .permissions import get_permissions
+from .provisioning import register_users
 
 
 class AccountTest(BaseAPITestCase):
@@ -240,3 +258,345 @@ class AccountTest(BaseAPITestCase):
         )
         self.assertEqual(response.status_code, 401)
         self.assertTrue(response.json(), {"message": "user is not activated yet"})
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Test the cached token authentication."""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(username="user1", mobile="1", is_active=True)
+        self.token = Token.objects.create(user=self.user)
+
+    def _authenticate(self):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Token {self.token.key}"
+        )
+        return CachedTokenAuthentication().authenticate(request)
+
+    def test_cache_tiers(self):
+        self.assertEqual(self._authenticate()[0], self.user)
+        with self.assertNumQueries(0):
+            user, token = self._authenticate()
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+        # The shared cache is read when the process' cache misses.
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            self._authenticate()
+
+    def test_deactivation(self):
+        self._authenticate()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+
+    def test_logout(self):
+        _, token = self._authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            token.delete()
+        with self.assertRaisesMessage(AuthenticationFailed, "Invalid token."):
+            self._authenticate()
+
+
+class PermissionSnapshotTest(TestCase):
+    """Test the permission snapshots."""
+
+    def setUp(self):
+        cache.clear()
+        self.group, _ = Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create(
+                username="user1", mobile="1", is_active=True
+            )
+        self.add_user = Permission.objects.get(codename="add_user")
+        self.view_user = Permission.objects.get(codename="view_user")
+
+    def _user(self):
+        # A fresh user object, i.e. a new request.
+        return User.objects.get(pk=self.user.pk)
+
+    def test_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.view_user)
+        user = self._user()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perms(["account.view_user"]))
+            self.assertFalse(user.has_perm("account.add_user"))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_permissions(user), {"account.view_user"})
+            # Other objects of the user read the cached snapshot.
+            self.assertTrue(self.user.has_perm("account.view_user"))
+
+    def test_user_changes(self):
+        self.assertFalse(self._user().has_perm("account.add_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.add_user)
+        self.assertTrue(self._user().has_perm("account.add_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_user.user_set.remove(self.user)
+        self.assertFalse(self._user().has_perm("account.add_user"))
+
+        other = Group.objects.create(name="other")
+        with self.captureOnCommitCallbacks(execute=True):
+            other.permissions.add(self.add_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(other)
+        self.assertTrue(self._user().has_perm("account.add_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            other.user_set.clear()
+        self.assertFalse(self._user().has_perm("account.add_user"))
+
+    def test_group_changes(self):
+        self.assertFalse(self._user().has_perm("account.add_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.add_user)
+        self.assertTrue(self._user().has_perm("account.add_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+        self.assertFalse(self._user().has_perm("account.add_user"))
+
+
+class LoginLookupTest(TestCase):
+    """Test the login lookups by identifier type."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(
+            username="user1", mobile="+989120000000", email="User1@Example.com"
+        )
+        # A username which looks like a mobile and an email.
+        self.other = User.objects.create(username="123@x", mobile="2")
+        self.numeric = User.objects.create(username="456", mobile="3")
+
+    @parameterized.expand([("+989120000000",), ("user1@example.com",), ("user1",)])
+    def test_lookup(self, identifier):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_login_user(identifier), self.user)
+
+    def test_username_fallback(self):
+        self.assertEqual(get_login_user("123@x"), self.other)
+        self.assertEqual(get_login_user("456"), self.numeric)
+        with self.assertNumQueries(2):
+            self.assertIsNone(get_login_user("missing@example.com"))
+
+    def test_authenticate(self):
+        self.user.set_password("user-password1")
+        self.user.save()
+        self.assertEqual(
+            AccountBackend().authenticate(
+                None, username="USER1@example.com", password="user-password1"
+            ),
+            self.user,
+        )
+        self.assertIsNone(
+            AccountBackend().authenticate(None, username="user1", password="wrong")
+        )
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "benchmark_login", users=20, logins=5, passwords=5, threads=2, stdout=out
+        )
+        self.assertIn("Looking up by email (5 logins", out.getvalue())
+        self.assertIn("Logging in (5 logins", out.getvalue())
+        self.assertEqual(User.objects.count(), 3)
+
+
+class PasswordHasherPolicyTest(TestCase):
+    """Test the password hasher policy."""
+
+    hashers = [
+        "account.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ]
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(username="user1", mobile="1")
+        # Hashed by another policy, whatever the settings' one is.
+        with override_settings(PASSWORD_HASHERS=self.hashers[::-1]):
+            self.user.set_password("user-password1")
+        self.user.save()
+
+    def _authenticate(self, password="user-password1"):
+        user = AccountBackend().authenticate(None, username="user1", password=password)
+        self.user.refresh_from_db()
+        return user
+
+    def test_rehash_on_login(self):
+        self.assertTrue(self.user.password.startswith("md5$"))
+        with override_settings(
+            PASSWORD_HASHERS=self.hashers, PASSWORD_HASH_ITERATIONS=2
+        ):
+            self.assertIsNone(self._authenticate("wrong"))
+            self.assertTrue(self.user.password.startswith("md5$"))
+            self.assertEqual(self._authenticate(), self.user)
+            self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2$"))
+        # Hashes of other iterations are rehashed too.
+        with override_settings(
+            PASSWORD_HASHERS=self.hashers, PASSWORD_HASH_ITERATIONS=3
+        ):
+            self.assertEqual(self._authenticate(), self.user)
+            self.assertTrue(self.user.password.startswith("pbkdf2_sha256$3$"))
+            # Up to date hashes aren't saved again.
+            with self.assertNumQueries(1):
+                AccountBackend().authenticate(
+                    None, username="user1", password="user-password1"
+                )
+
+
+class ProvisioningTest(TestCase):
+    """Test the bulk user provisioning."""
+
+    def setUp(self):
+        cache.clear()
+        self.group, _ = Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+
+    def _rows(self, count, start=0):
+        return [
+            {
+                "username": f"user{index}",
+                "mobile": str(index),
+                "password": "user-password1",
+            }
+            for index in range(start, start + count)
+        ]
+
+    def test_register_users(self):
+        with patch("account.verification.send_verification_code") as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                users = register_users(self._rows(3))
+        self.assertEqual(
+            set(self.group.user_set.values_list("pk", flat=True)),
+            {user.pk for user in users},
+        )
+        self.assertTrue(
+            User.objects.get(username="user0").check_password("user-password1")
+        )
+        self.assertEqual(send.call_count, 3)
+        user, _, encrypted_code = send.call_args.args
+        self.assertEqual(cache.get(encrypted_code), user.id)
+
+    def test_register_users_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            register_users(self._rows(2))
+        with CaptureQueriesContext(connection) as few:
+            register_users(self._rows(2, start=10))
+        with CaptureQueriesContext(connection) as many:
+            register_users(self._rows(50, start=100))
+        self.assertEqual(len(few), len(many))
+
+    def test_new_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(username="user1", mobile="1")
+        # The user's row and its default group's row are inserted.
+        with self.assertNumQueries(2):
+            user = User.objects.create(username="user2", mobile="2")
+        self.assertEqual(list(user.groups.all()), [self.group])
+
+    def test_default_group_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(username="user1", mobile="1")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+            group = Group.objects.create(name=settings.DEFAULT_USER_GROUP)
+        user = User.objects.create(username="user2", mobile="2")
+        self.assertEqual(list(user.groups.all()), [group])
+
+    def test_bulk_register(self):
+        admin = User.objects.create(username="admin", mobile="admin", is_active=True)
+        admin.user_permissions.add(Permission.objects.get(codename="add_user"))
+        client = APIClient()
+        client.force_authenticate(admin)
+        url = reverse("account:bulk-register")
+        response = client.post(url, self._rows(2), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json(),
+            [
+                {"username": f"user{index}", "email": "", "mobile": str(index)}
+                for index in range(2)
+            ],
+        )
+
+        rows = self._rows(2, start=1) + self._rows(1, start=2)
+        response = client.post(url, rows, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["username"],
+            ["Users with these usernames already exist: user1, user2."],
+        )
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_import_users(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(
+                "username,mobile,email,password\nuser1,1,,pass\nuser2,2,a@b.com,pass\n"
+            )
+            file.flush()
+            out = StringIO()
+            call_command("import_users", file.name, batch_size=1, stdout=out)
+        self.assertIn("Importing users (2 rows", out.getvalue())
+        self.assertEqual(self.group.user_set.count(), 2)
+
+    @override_settings(BULK_REGISTRATION_LIMIT=1)
+    def test_import_users_batch_limit(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(
+                "username,mobile,email,password\nuser1,1,,pass\nuser2,2,a@b.com,pass\n"
+            )
+            file.flush()
+            # Batches are capped at the bulk registration limit.
+            call_command("import_users", file.name, batch_size=500, stdout=StringIO())
+        self.assertEqual(self.group.user_set.count(), 2)
+
+
+class PrivateReadsTest(TestCase):
+    """Test the reads of the private account objects."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(username="user1", mobile="1", is_active=True)
+        self.client = APIClient()
+
+    def _assert_private(self, list_url, detail_url):
+        for url in (list_url, detail_url):
+            self.assertEqual(self.client.get(url).status_code, 401)
+        # Authenticated users need the view permission too.
+        self.client.force_authenticate(self.user)
+        for url in (list_url, detail_url):
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_users(self):
+        self._assert_private(
+            reverse("account:user-list"),
+            reverse("account:user-detail", args=[self.user.pk]),
+        )
+
+    def test_groups(self):
+        group = Group.objects.get(name=settings.DEFAULT_USER_GROUP)
+        self._assert_private(
+            reverse("account:group-list"),
+            reverse("account:group-detail", args=[group.pk]),
+        )
+
+    def test_addresses(self):
+        address = Address.objects.create(
+            user=self.user,
+            country="country",
+            city="city",
+            state="state",
+            post_code="1",
+            address="address",
+            house_number="1",
+            floor="1",
+            unit="1",
+        )
+        self._assert_private(
+            reverse("account:address-list"),
+            reverse("account:address-detail", args=[address.pk]),
+        )
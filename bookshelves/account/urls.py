@@ -4,6 +4,7 @@ from rest_framework import routers
 
 from .views import (
     AddressViewSet,
+    BulkRegisterView,
     ChangePasswordView,
     ContentTypeViewSet,
     GroupViewSet,
@@ -29,6 +30,7 @@ urlpatterns = [
     path("login/", LoginView.as_view(), name="login"),
     path("logout/", LogoutView.as_view(), name="logout"),
     path("register/", RegisterView.as_view(), name="register"),
+    path("register/bulk/", BulkRegisterView.as_view(), name="bulk-register"),
     path("password/", ChangePasswordView.as_view(), name="password"),
     path("verify/", VerifyView.as_view(), name="verification"),
 ]
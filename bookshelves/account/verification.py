@@ -1,4 +1,8 @@
 """Account verification module."""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
 
 
 def send_verification_code(user, code: str, encrypted_code: str):
@@ -13,3 +17,33 @@ def send_verification_code(user, code: str, encrypted_code: str):
         The logic should be implemented based on the company's requirements.
         For example: send email, send SMS, send message in a messenger, and so on.
     """
+
+
+def new_verification_code():
+    """Generate a verification code.
+
+    Returns:
+        Tuple[str, bytes]: the code and its encrypted version.
+    """
+    code = str(random.randint(*settings.VERIFICATION_CODE_LENGTH_RANGE))
+    return code, settings.CRYPTOGRAPHY.encrypt(code.encode())
+
+
+def queue_verification_codes(users, batch_size=500):
+    """Store and send new verification codes of users in batches.
+
+    The codes of a batch are stored by one cache write.
+
+    Args:
+        users (List[User]): saved user instances.
+        batch_size (int): number of the codes which are stored together.
+    """
+    for start in range(0, len(users), batch_size):
+        end = start + batch_size
+        codes = [(user, *new_verification_code()) for user in users[start:end]]
+        cache.set_many(
+            {encrypted_code: user.id for user, _, encrypted_code in codes},
+            settings.VERIFICATION_CODE_LIFE_TIME,
+        )
+        for user, code, encrypted_code in codes:
+            send_verification_code(user, code, encrypted_code)
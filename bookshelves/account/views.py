@@ -14,6 +14,7 @@ from rest_framework.response import Response
 from .models import Address, User
 from .serializers import (
     AddressSerializer,
+    BulkRegisterSerializer,
     ChangePasswordSerializer,
     ContentTypeSerializer,
     GroupSerializer,
@@ -43,10 +44,12 @@ class ContentTypeViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = ContentTypeFilter
 
 
-class UserViewSet(BaseViewSet):
+class UserViewSet(BaseViewSet, generics.ListAPIView, generics.RetrieveAPIView):
     """User view set."""
 
     permission_classes = [permissions.IsAuthenticated, ThrushDjangoModelPermissions]
+    public_reads = False
+    queryset = User.objects.all()
     serializer_class = UserSerializer
     filterset_fields = (
         "username",
@@ -60,19 +63,25 @@ class UserViewSet(BaseViewSet):
     )
 
 
-class GroupViewSet(BaseViewSet):
+class GroupViewSet(
+    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
+):
     """Group view set."""
 
     permission_classes = [permissions.IsAuthenticated, ThrushDjangoModelPermissions]
+    public_reads = False
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
     filterset_fields = ("name",)
 
 
-class AddressViewSet(BaseViewSet):
+class AddressViewSet(
+    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
+):
     """Address view set."""
 
     permission_classes = [permissions.IsAuthenticated, ThrushDjangoModelPermissions]
+    public_reads = False
     queryset = Address.objects.all()
     serializer_class = AddressSerializer
     filterset_fields = (
@@ -96,7 +105,7 @@ class PermissionViewSet(viewsets.ReadOnlyModelViewSet):
     """Permission view set."""
 
     permission_classes = [permissions.IsAuthenticated, ThrushDjangoModelPermissions]
-    queryset = Permission.objects.all()
+    queryset = Permission.objects.select_related("content_type")
     serializer_class = PermissionSerializer
     filterset_fields = ("name", "codename")
 
@@ -140,7 +149,11 @@ class LogoutView(views.APIView):
 
     def get(self, request):
         """Handle GET request to logout a user."""
-        request.user.auth_token.delete()
+        # The token of the request is deleted; its cached user is dropped too.
+        if isinstance(request.auth, Token):
+            request.auth.delete()
+        else:
+            request.user.auth_token.delete()
         logout(request)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -207,6 +220,19 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
 
+class BulkRegisterView(generics.CreateAPIView):
+    """Bulk register users view."""
+
+    permission_classes = [permissions.IsAuthenticated, ThrushDjangoModelPermissions]
+    queryset = User.objects.all()
+    serializer_class = BulkRegisterSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        """DRF built-in method."""
+        kwargs["many"] = True
+        return super().get_serializer(*args, **kwargs)
+
+
 class VerifyView(views.APIView):
     """Verify account view."""
 
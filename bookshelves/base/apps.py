@@ -1,6 +1,7 @@
 """Base apps config."""
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.models import signals
 
 from bookshelves.apps import all_serializers
 
@@ -12,4 +13,7 @@ class BaseConfig(AppConfig):
     name = "base"
 
     def ready(self):
+        from .models import rebuild_category_paths
+
         settings.SERIALIZERS = all_serializers()
+        signals.post_migrate.connect(rebuild_category_paths, sender=self)
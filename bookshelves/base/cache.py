@@ -0,0 +1,326 @@
+"""Base response cache.
+
+Responses of anonymous GET requests are cached by path, query string and the
+"Accept" header. Every model which a cached view (or document) depends on has a
+version in the cache which is bumped when one of its rows is saved, deleted or
+its relations are changed; the versions of the models a view depends on are a
+part of the response keys, so bumping a version invalidates all the responses
+built from that model. Changes of the other models (e.g. users' logins) don't
+touch the cache.
+"""
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import get_resolver
+from rest_framework.response import Response
+
+from .query_plan import _relations, plan_for_serializer
+
+
+_pending = threading.local()
+# Labels of the models which cached documents depend on.
+_registered = set()
+# Dependent labels by the views and the registered labels they're collected from.
+_dependent = {}
+
+
+def _key(*parts) -> str:
+    return ":".join((settings.RESPONSE_CACHE_PREFIX, *parts))
+
+
+def _incr(key: str):
+    if not cache.add(key, 1, None):
+        cache.incr(key)
+
+
+@lru_cache(maxsize=None)
+def _labels(model) -> FrozenSet[str]:
+    """Labels of a model, its parents and its children.
+
+    Rows of multi-table inherited models are stored in the parents' tables too.
+    """
+    labels = {model._meta.label_lower, model._meta.concrete_model._meta.label_lower}
+    labels.update(parent._meta.label_lower for parent in model._meta.get_parent_list())
+    children = model.__subclasses__()
+    while children:
+        child = children.pop()
+        labels.add(child._meta.label_lower)
+        children += child.__subclasses__()
+    return frozenset(labels)
+
+
+def register_dependencies(labels: Iterable[str]):
+    """Register the labels of models which a cached document depends on."""
+    _registered.update(labels)
+
+
+@lru_cache(maxsize=None)
+def _view_dependencies(view_class) -> FrozenSet[str]:
+    """Collect the labels of the models which the actions of a view depend on.
+
+    The dependencies are taken from an anonymous request of every action, which
+    is what the response cache serves.
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import HttpRequest
+    from rest_framework.request import Request
+
+    request = Request(HttpRequest())
+    request.user = AnonymousUser()
+    labels = set(view_class.cache_dependencies)
+    extra_actions = [action.__name__ for action in view_class.get_extra_actions()]
+    for action in ("list", "retrieve", *extra_actions):
+        view = view_class()
+        view.action, view.request, view.args, view.kwargs = action, request, (), {}
+        view.format_kwarg = None
+        try:
+            labels |= view.get_cache_dependencies()
+        except Exception:
+            # Actions which need the URL arguments (e.g. of nested routes) depend on
+            # the view's queryset and serializer.
+            queryset = getattr(view_class, "queryset", None)
+            if queryset is not None:
+                labels.add(queryset.model._meta.label_lower)
+            if getattr(view_class, "serializer_class", None) is not None:
+                labels |= {
+                    model._meta.label_lower
+                    for model in serializer_models(view_class.serializer_class)
+                }
+    return frozenset(labels)
+
+
+def dependent_labels() -> FrozenSet[str]:
+    """Get the labels of the models which the cached views and documents depend on.
+
+    The views of the URL configuration are imported first, so every process (e.g.
+    of a command) knows all of them.
+    """
+    views = _view_classes(CachedResponseMixin)
+    key = (frozenset(views), len(_registered))
+    if key not in _dependent:
+        _dependent[key] = frozenset(_registered).union(*map(_view_dependencies, views))
+    return _dependent[key]
+
+
+def invalidate(*models):
+    """Invalidate the cached responses which depend on the models."""
+    labels = set().union(*(_labels(model) for model in models))
+    for label in labels & dependent_labels():
+        _incr(_key("version", label))
+
+
+def invalidate_on_commit(model):
+    """Invalidate the cached responses which depend on a model on commit.
+
+    Changes of the same transaction are coalesced, so a model's version is bumped
+    once, however many of its rows are written.
+    """
+    if not _labels(model) & dependent_labels():
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        invalidate(model)
+        return
+
+    pending = _pending.__dict__.setdefault("callbacks", {})
+    scheduled = pending.get(model)
+    # The callbacks are dropped on rollback; it's scheduled again in that case.
+    if scheduled is not None and any(
+        item[1] is scheduled for item in connection.run_on_commit
+    ):
+        return
+
+    def callback():
+        if pending.get(model) is callback:
+            del pending[model]
+        invalidate(model)
+
+    pending[model] = callback
+    transaction.on_commit(callback)
+
+
+def _path_models(model, path: str):
+    for name in path.split("__"):
+        relation = _relations(model).get(name)
+        if relation is None:
+            return
+        model = relation.related_model
+        yield model
+
+
+@lru_cache(maxsize=None)
+def _view_classes(base):
+    """Get the view classes derived from a base; the routed views are imported first."""
+    get_resolver().url_patterns
+    views = []
+    classes = base.__subclasses__()
+    while classes:
+        view_class = classes.pop()
+        classes += view_class.__subclasses__()
+        if hasattr(view_class, "as_view"):
+            views.append(view_class)
+    return views
+
+
+def _private_models() -> FrozenSet:
+    """Get the models of the views whose reads are private."""
+    from .views import BaseViewSet
+
+    return frozenset(
+        view_class.queryset.model
+        for view_class in _view_classes(BaseViewSet)
+        if not view_class.public_reads and view_class.queryset is not None
+    )
+
+
+def serializer_models(serializer_class, follow_links: bool = True) -> FrozenSet:
+    """Collect the models which a model serializer reads.
+
+    The relations are taken from the serializer's query plan. Generic links are
+    rendered by the serializers in "settings.SERIALIZERS", so their models are
+    collected too; except the private models (e.g. users), which aren't published
+    by links.
+    """
+    from .serializers import ContentTypeLinkModelSerializer
+
+    model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+    if model is None:
+        return frozenset()
+
+    models = {model}
+    plan = plan_for_serializer(serializer_class)
+    for path in plan.select_related + plan.prefetch_related:
+        if isinstance(path, str):
+            models.update(_path_models(model, path))
+
+    if follow_links and issubclass(serializer_class, ContentTypeLinkModelSerializer):
+        private = _private_models()
+        for name, linked in settings.SERIALIZERS.items():
+            linked_model = getattr(getattr(linked, "Meta", None), "model", None)
+            if linked_model is None or linked_model in private:
+                continue
+            # Links are rendered by the serializers named after their models.
+            if name == f"{linked_model.__name__}Serializer":
+                models |= serializer_models(linked, follow_links=False)
+    return frozenset(models)
+
+
+def get_versions(labels: Iterable[str]) -> Dict[str, int]:
+    """Get the current versions of model labels."""
+    keys = {_key("version", label): label for label in sorted(labels)}
+    versions = cache.get_many(list(keys))
+    return {label: versions.get(key, 0) for key, label in keys.items()}
+
+
+def get_stats() -> Dict[str, float]:
+    """Get the hit/miss counters of the response cache."""
+    counters = cache.get_many([_key("stats", "hits"), _key("stats", "misses")])
+    hits = counters.get(_key("stats", "hits"), 0)
+    misses = counters.get(_key("stats", "misses"), 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def cached_document(name: str, dependencies: Iterable[str], build, variant: str = ""):
+    """Get a document from the cache or build and cache it.
+
+    The document is keyed by the versions of the model labels it's built from, so
+    it's rebuilt on the first read after any of them is changed.
+
+    Args:
+        name (str): name of the document.
+        dependencies (Iterable[str]): labels of the models the document reads.
+        build (Callable[[], Any]): function which builds the document.
+        variant (str): variant of the document, e.g. the host of its links.
+
+    Returns:
+        Any: the document.
+    """
+    if not settings.RESPONSE_CACHE_TIMEOUT:
+        return build()
+    register_dependencies(dependencies)
+    versions = get_versions(dependencies)
+    fingerprint = "|".join(
+        (variant, ",".join(f"{label}={version}" for label, version in versions.items()))
+    )
+    key = _key("document", name, hashlib.md5(fingerprint.encode()).hexdigest())
+    document = cache.get(key)
+    if document is None:
+        document = build()
+        cache.set(key, document, settings.RESPONSE_CACHE_TIMEOUT)
+    return document
+
+
+class CachedResponseMixin:
+    """Serve "list" and "retrieve" of anonymous users from the response cache.
+
+    The models a view depends on are its queryset's model and the models read by
+    its serializer; others (e.g. ones read by method fields) should be declared
+    in "cache_dependencies" as model labels.
+    """
+
+    # Seconds; "settings.RESPONSE_CACHE_TIMEOUT" is used by default, 0 disables it.
+    cache_timeout = None
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        """DRF built-in method."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """DRF built-in method."""
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_dependencies(self) -> FrozenSet[str]:
+        """Get the labels of the models which the responses depend on."""
+        models = {self.get_queryset().model}
+        models |= serializer_models(self.get_serializer_class())
+        return frozenset(
+            {model._meta.label_lower for model in models} | set(self.cache_dependencies)
+        )
+
+    def get_cache_key(self, request) -> str:
+        """Build the cache key of a request."""
+        versions = get_versions(self.get_cache_dependencies())
+        fingerprint = "|".join(
+            (
+                request.get_host(),
+                request.path,
+                "&".join(sorted(request.META.get("QUERY_STRING", "").split("&"))),
+                request.META.get("HTTP_ACCEPT", ""),
+                ",".join(f"{label}={version}" for label, version in versions.items()),
+            )
+        )
+        return _key("response", hashlib.md5(fingerprint.encode()).hexdigest())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Get a response from the cache or cache the handler's response."""
+        timeout = self.cache_timeout
+        if timeout is None:
+            timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        # The versions are read before the response is built; a concurrent change
+        # bumps them, so a stale response is stored under an outdated key.
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _incr(_key("stats", "hits"))
+            status_code, data = cached
+            return Response(data, status=status_code, headers={"X-Cache": "HIT"})
+
+        _incr(_key("stats", "misses"))
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (response.status_code, response.data), timeout)
+        response["X-Cache"] = "MISS"
+        return response
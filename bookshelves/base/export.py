@@ -0,0 +1,119 @@
+"""Base exports.
+
+Exports stream the rows of a view's filtered queryset as NDJSON or CSV. Rows are
+read by "values()" through a server-side cursor (where the database has one) and
+written as they're read, so memory doesn't grow with the size of the export, and
+nothing is paginated or counted.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.decorators import action
+
+
+# Separator of the list items (e.g. names) in CSV cells.
+CSV_LIST_SEPARATOR = "|"
+
+
+class _Echo:
+    """File-like object which returns what's written instead of keeping it."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    """Convert a value to a CSV cell."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(
+            str(item["name"] if isinstance(item, dict) and "name" in item else item)
+            for item in value
+        )
+    if isinstance(value, dict):
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Newline delimited JSON renderer; one JSON object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def stream(self, rows, fields):
+        """Render rows one line at a time."""
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """DRF built-in method.
+
+        Responses other than the streamed ones (e.g. errors) are a single line.
+        """
+        if data is None:
+            return ""
+        return "".join(self.stream([data], ()))
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """CSV renderer; the first line has the field names."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def stream(self, rows, fields):
+        """Render rows one line at a time."""
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([_cell(row.get(field)) for field in fields])
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """DRF built-in method.
+
+        Responses other than the streamed ones (e.g. errors) are a single row.
+        """
+        if data is None:
+            return ""
+        return "".join(self.stream([data], list(data)))
+
+
+class ExportMixin:
+    """Add the "export" action which streams the filtered rows.
+
+    It's NDJSON by default and CSV by "?format=csv" (or the "Accept" header).
+    """
+
+    # Fields (or lookups) of the exported rows.
+    export_fields = ()
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """Stream the filtered rows as NDJSON or CSV."""
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = (
+            queryset.prefetch_related(None)
+            .values(*self.export_fields)
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(rows, self.export_fields),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        name = self.basename or queryset.model._meta.model_name
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{name}.{renderer.format}"'
+        return response
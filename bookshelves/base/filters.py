@@ -0,0 +1,29 @@
+"""Base filters."""
+from django.db.models import Q, Subquery
+from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+
+from .models import Category
+
+
+class CategoryDescendantsFilter(filters.NumberFilter):
+    """Filter rows by a category and all of its descendants.
+
+    The subtree is matched by the category's materialized path in a subquery, so
+    it costs no extra query whatever the depth of the tree.
+    """
+
+    def __init__(self, field_name="category", **kwargs):
+        """Django filter built-in method."""
+        kwargs.setdefault("label", "Category (with its descendants)")
+        super().__init__(field_name=field_name, **kwargs)
+
+    def filter(self, qs, value):
+        """Django-filter built-in method."""
+        if value in EMPTY_VALUES:
+            return qs
+        # An empty path isn't built yet; it would match every category, so only
+        # the category itself is matched then.
+        path = Category._base_manager.filter(pk=value).exclude(path="").values("path")
+        descendants = Q(**{f"{self.field_name}__path__startswith": Subquery(path[:1])})
+        return qs.filter(Q(**{self.field_name: value}) | descendants)
@@ -0,0 +1,25 @@
+"""Base imports.
+
+Imports read the rows of CSV or JSON lines files lazily, so memory doesn't grow
+with the size of the file.
+"""
+import csv
+import json
+
+
+def read_rows(stream, file_format):
+    """Read the rows of a CSV or JSON lines stream lazily.
+
+    Args:
+        stream (TextIO): the opened file.
+        file_format (str): "csv" or "jsonl".
+
+    Returns:
+        Iterator[Dict]: rows; cells of CSV files are strings.
+    """
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
@@ -0,0 +1 @@
+"""Command library."""
@@ -0,0 +1,17 @@
+"""Rebuild the materialized paths of the categories."""
+from base.models import Category
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild categories paths and depths from their parents."
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            rebuilt = Category.rebuild_paths()
+        self.stdout.write(
+            f"Rebuilding categories paths ({rebuilt} rows)... {self.style.SUCCESS('OK')}"
+        )
+        self.stdout.write("Finished")
@@ -0,0 +1,40 @@
+"""Rebuild the denormalized engagement counters."""
+from base.models import BaseEngagementCounters
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild comments, bookmarks and stars counters from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of rows which are refreshed in each UPDATE.",
+        )
+
+    def _rebuild(self, model, batch_size):
+        """Refresh counters of a model in primary key batches."""
+        pks = model._base_manager.order_by("pk").values_list("pk", flat=True)
+        refreshed = 0
+        last_pk = None
+        while True:
+            batch = pks.filter(pk__gt=last_pk) if last_pk is not None else pks
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            refreshed += model.refresh_counters(batch)
+            last_pk = batch[-1]
+        self.stdout.write(
+            f"Rebuilding '{model._meta.label}' counters ({refreshed} rows)... "
+            f"{self.style.SUCCESS('OK')}"
+        )
+
+    def handle(self, *args, **kwargs):
+        for model in apps.get_models():
+            if issubclass(model, BaseEngagementCounters):
+                self._rebuild(model, kwargs["batch_size"])
+        self.stdout.write("Finished")
@@ -1,10 +1,55 @@
 """Base apps models."""
+from django.apps import apps
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value, signals
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.dispatch import receiver
+from django.utils import timezone
 
+from .bookmarks import bookmark_fields, forget_bookmarks_on_commit
+from .cache import invalidate_on_commit
 
-class BaseManager(models.Manager):
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """Queryset which soft deletes and restores rows in bulk.
+
+    Like "update", the bulk operations run a single UPDATE and don't send the
+    model signals; the cached responses of the model are invalidated though.
+    """
+
+    def _set_deleted(self, is_deleted):
+        updated = self.update(is_deleted=is_deleted, modified_at=timezone.now())
+        invalidate_on_commit(self.model)
+        return updated
+
+    def delete(self):
+        """Django built-in method.
+
+        Soft delete the rows instead.
+        """
+        return self._set_deleted(True)
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def restore(self):
+        """Restore the soft deleted rows."""
+        return self._set_deleted(False)
+
+    restore.alters_data = True
+    restore.queryset_only = True
+
+    def hard_delete(self):
+        """Delete the rows from the database."""
+        return super().delete()
+
+    hard_delete.alters_data = True
+    hard_delete.queryset_only = True
+
+
+class BaseManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """Base model manager."""
 
     def get_queryset(self):
@@ -35,6 +80,8 @@ class Base(AbstractBase):
     is_deleted = models.BooleanField(default=False)
 
     objects = BaseManager()
+    # Includes the soft deleted rows, e.g. to restore them.
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
 
     class Meta:
         abstract = True
@@ -43,7 +90,7 @@ class Base(AbstractBase):
     def delete(self, *args, **kwargs):
         """Django built-in method."""
         self.is_deleted = True
-        self.save()
+        self.save(update_fields=["is_deleted", "modified_at"])
 
     def __repr__(self):
         return (
@@ -63,7 +110,12 @@ class Tag(Base):
 
 
 class Category(Base):
-    """Category model implementation."""
+    """Category model implementation.
+
+    Besides the "parent" adjacency list, every category keeps its materialized
+    path, e.g. "/1/5/12/" for category 12 under 5 under 1, so a whole subtree is
+    matched by a single "path__startswith" lookup.
+    """
 
     name = models.CharField(max_length=75)
     parent = models.ForeignKey(
@@ -73,6 +125,8 @@ class Category(Base):
         related_name="category_parent",
         on_delete=models.DO_NOTHING,
     )
+    path = models.CharField(max_length=255, default="", editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         unique_together = ("name", "parent")
@@ -82,6 +136,96 @@ class Category(Base):
             return f"{self.name} [deleted]"
         return self.name
 
+    def build_path(self):
+        """Build the path of the category from its parent's path."""
+        if self.parent_id is None:
+            return f"/{self.pk}/"
+        parent_path = Category._base_manager.values_list("path", flat=True).get(
+            pk=self.parent_id
+        )
+        if self.path and parent_path.startswith(self.path):
+            raise ValueError("A category can't be moved under itself or its descendants.")
+        return f"{parent_path}{self.pk}/"
+
+    def save(self, *args, **kwargs):
+        """Django built-in method.
+
+        Keep the paths of the category and its descendants in sync.
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "parent" not in update_fields:
+            return super().save(*args, **kwargs)
+
+        # A move is validated before it's saved; new categories need their IDs.
+        path = self.build_path() if self.pk is not None else None
+        super().save(*args, **kwargs)
+        if path is None:
+            path = self.build_path()
+        if path == self.path:
+            return
+
+        old_path, self.path, self.depth = self.path, path, path.count("/") - 2
+        Category._base_manager.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        if old_path:
+            # Move the subtree; its rows share the old path as their prefix.
+            Category._base_manager.filter(path__startswith=old_path).exclude(
+                pk=self.pk
+            ).update(
+                path=Concat(Value(self.path), Substr("path", len(old_path) + 1)),
+                depth=F("depth") + self.depth - (old_path.count("/") - 2),
+            )
+
+    def delete(self, *args, **kwargs):
+        """Django built-in method.
+
+        Soft delete the descendants too.
+        """
+        super().delete(*args, **kwargs)
+        if self.path:
+            Category.objects.filter(path__startswith=self.path).delete()
+            return
+        # The paths aren't built yet; an empty prefix would match every category.
+        for child in Category.objects.filter(parent=self):
+            child.delete()
+
+    @classmethod
+    def rebuild_paths(cls, using=None):
+        """Rebuild the paths of all categories from their parents.
+
+        Args:
+            using (str): alias of the database; the default one if it's not given.
+
+        Returns:
+            int: number of the updated categories.
+        """
+        manager = cls._base_manager.db_manager(using)
+        categories = {
+            category.pk: category
+            for category in manager.only("pk", "parent", "path", "depth")
+        }
+        paths = {}
+
+        def path_of(category, seen=()):
+            if category.pk not in paths:
+                parent = categories.get(category.parent_id)
+                if parent is None:
+                    paths[category.pk] = f"/{category.pk}/"
+                elif parent.pk in seen:
+                    raise ValueError(f"Category {category.pk} is in a cycle.")
+                else:
+                    paths[category.pk] = f"{path_of(parent, (*seen, category.pk))}{category.pk}/"
+            return paths[category.pk]
+
+        changed = []
+        for category in categories.values():
+            path = path_of(category)
+            if (category.path, category.depth) != (path, path.count("/") - 2):
+                category.path, category.depth = path, path.count("/") - 2
+                changed.append(category)
+        manager.bulk_update(changed, ["path", "depth"], batch_size=500)
+        invalidate_on_commit(cls)
+        return len(changed)
+
 
 class BaseComment(Base):
     """Comment model implementation."""
@@ -122,3 +266,175 @@ class BaseStar(models.Model):
     def __str__(self):
         return f"{self.star}"
 
+
+class BaseEngagementCounters(models.Model):
+    """Denormalized engagement counters (comments, bookmarks and stars).
+
+    The counters are refreshed from the source tables whenever a comment, a
+    star or a bookmark changes, so list endpoints can read them directly.
+    """
+
+    comments_count = models.PositiveIntegerField(default=0)
+    bookmarks_count = models.PositiveIntegerField(default=0)
+    stars_sum = models.PositiveIntegerField(default=0)
+    stars_count = models.PositiveIntegerField(default=0)
+
+    # Related names of the comment and star models; they should be overridden in
+    # the derived classes.
+    comments_related_name = None
+    stars_related_name = None
+
+    class Meta:
+        abstract = True
+
+    @property
+    def stars_average(self):
+        """Average of the stars."""
+        if not self.stars_count:
+            return 0
+        return self.stars_sum / self.stars_count
+
+    @classmethod
+    def _related_subquery(cls, related_name, aggregate, **filters):
+        """Build an aggregate subquery over a reverse relation."""
+        relation = cls._meta.get_field(related_name)
+        return Coalesce(
+            Subquery(
+                relation.related_model._base_manager.filter(
+                    **{relation.field.name: OuterRef("pk")}, **filters
+                )
+                .order_by()
+                .values(relation.field.name)
+                .annotate(value=aggregate)
+                .values("value")
+            ),
+            0,
+        )
+
+    @classmethod
+    def _bookmarks_subquery(cls):
+        """Build a count subquery over the bookmarks through table."""
+        field = cls._meta.get_field("bookmarks")
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        return Coalesce(
+            Subquery(
+                through.objects.filter(**{source: OuterRef("pk")})
+                .order_by()
+                .values(source)
+                .annotate(value=Count("pk"))
+                .values("value")
+            ),
+            0,
+        )
+
+    @classmethod
+    def refresh_counters(cls, pks=None):
+        """Recalculate the counters from the source tables in a single UPDATE.
+
+        Args:
+            pks (Optional[Iterable[int]]): primary keys of the rows to refresh,
+                all rows will be refreshed if it's not provided.
+
+        Returns:
+            int: number of the refreshed rows.
+        """
+        queryset = cls._base_manager.all()
+        if pks is not None:
+            pks = [pk for pk in pks if pk is not None]
+            if not pks:
+                return 0
+            queryset = queryset.filter(pk__in=pks)
+        updated = queryset.update(
+            comments_count=cls._related_subquery(
+                cls.comments_related_name, Count("pk"), is_deleted=False
+            ),
+            bookmarks_count=cls._bookmarks_subquery(),
+            stars_sum=cls._related_subquery(cls.stars_related_name, Sum("star")),
+            stars_count=cls._related_subquery(cls.stars_related_name, Count("pk")),
+        )
+        # "update" doesn't send signals.
+        invalidate_on_commit(cls)
+        return updated
+
+    @classmethod
+    def bookmarks_changed(cls, instance, action, reverse, pk_set, **_):
+        """Handle "m2m_changed" signal of the bookmarks field.
+
+        The signal is sent for both sides of the relation; in the reverse side the
+        instance is a user and "pk_set" contains the bookmarked rows.
+        """
+        cleared_attr = f"_cleared_{cls._meta.label_lower}_bookmarks"
+        if action == "pre_clear" and reverse:
+            # Remember the rows which are going to lose a bookmark.
+            setattr(
+                instance,
+                cleared_attr,
+                list(
+                    cls._base_manager.filter(bookmarks=instance).values_list(
+                        "pk", flat=True
+                    )
+                ),
+            )
+        elif action in ("post_add", "post_remove"):
+            cls.refresh_counters(pk_set if reverse else [instance.pk])
+        elif action == "post_clear":
+            cls.refresh_counters(
+                getattr(instance, cleared_attr, []) if reverse else [instance.pk]
+            )
+
+
+def rebuild_category_paths(using=None, **kwargs):
+    """Build the paths of the categories which were created before they existed.
+
+    It's connected to "post_migrate", so the paths are built with the tables.
+    """
+    Category.rebuild_paths(using=using)
+
+
+@receiver(signals.post_save)
+@receiver(signals.post_delete)
+def response_cache_model_changed(sender, update_fields=None, **kwargs):
+    """Invalidate the cached responses which depend on a saved or deleted model.
+
+    Soft deletes through "Base.delete" are saves too. Only the models which a
+    cached view or document depends on are invalidated, and updates of the
+    "settings.RESPONSE_CACHE_IGNORED_FIELDS" are skipped.
+    """
+    # Historical models of migrations (and the migration recorder) are skipped.
+    if sender._meta.apps is not apps:
+        return
+    ignored = settings.RESPONSE_CACHE_IGNORED_FIELDS.get(sender._meta.label_lower, ())
+    if update_fields and set(update_fields) <= set(ignored):
+        return
+    invalidate_on_commit(sender)
+
+
+@receiver(signals.m2m_changed)
+def response_cache_relation_changed(sender, instance, action, model, **kwargs):
+    """Invalidate the cached responses which depend on a changed relation."""
+    if action.startswith("post_") and sender._meta.apps is apps:
+        invalidate_on_commit(sender)
+        invalidate_on_commit(instance.__class__)
+        invalidate_on_commit(model)
+
+
+@receiver(signals.m2m_changed)
+def bookmark_sets_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop the bookmark sets of the users whose bookmarks are changed."""
+    field = bookmark_fields().get(sender)
+    if field is None:
+        return
+    if reverse:
+        # The instance is the user.
+        if action.startswith("post_"):
+            forget_bookmarks_on_commit(field.model, [instance.pk])
+    elif action in ("post_add", "post_remove"):
+        forget_bookmarks_on_commit(field.model, pk_set)
+    elif action == "pre_clear":
+        forget_bookmarks_on_commit(
+            field.model,
+            sender.objects.filter(**{field.m2m_field_name(): instance}).values_list(
+                f"{field.m2m_reverse_field_name()}_id", flat=True
+            ),
+        )
@@ -0,0 +1,143 @@
+"""Base paginations."""
+import json
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, _reverse_ordering
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """Cursor pagination keyed on a unique "(created_at, id)" position.
+
+    DRF's cursor pagination positions on the first ordering field only and uses an
+    offset for rows which share it. Here the cursor holds the values of all the
+    ordering fields, so every page, however deep, is a single range scan on the
+    "(created_at, id)" index and no "COUNT(*)" is run.
+    """
+
+    # It matches "AbstractBase.Meta.ordering"; "id" makes the position unique.
+    ordering = ("created_at", "id")
+
+    @classmethod
+    def supports(cls, model):
+        """Check if a model has all the ordering fields."""
+        try:
+            for field in cls.ordering:
+                model._meta.get_field(field.lstrip("-"))
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """DRF built-in method."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        # Fetch an extra row to know if there is a page following this one.
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+
+        if self.page:
+            first = self._get_position_from_instance(self.page[0], self.ordering)
+            last = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            first = last = position
+        self.next_position, self.previous_position = last, first
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_following
+        else:
+            self.has_next, self.has_previous = has_following, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        """DRF built-in method."""
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        """DRF built-in method."""
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position)
+        )
+
+    def encode_cursor(self, cursor):
+        """DRF built-in method."""
+        querystring = parse.urlencode({"r": int(cursor.reverse), "p": cursor.position})
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return pagination.replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def decode_cursor(self, request):
+        """DRF built-in method."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode("ascii")).decode("ascii"))
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = tokens["p"][0]
+            self._parse_position(position)
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps(
+            [
+                self.model._meta.get_field(field.lstrip("-")).value_to_string(instance)
+                for field in ordering
+            ]
+        )
+
+    def _parse_position(self, position):
+        values = json.loads(position)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError(position)
+        return [
+            self.model._meta.get_field(field.lstrip("-")).to_python(value)
+            for field, value in zip(self.ordering, values)
+        ]
+
+    def _after(self, position, reverse):
+        """Build the filter of the rows which follow a position.
+
+        "(a, b) > (x, y)" is expanded to "a > x OR (a = x AND b > y)".
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, self._parse_position(position)):
+            name = field.lstrip("-")
+            greater = field.startswith("-") == reverse
+            condition |= Q(**equal, **{f"{name}__{'gt' if greater else 'lt'}": value})
+            equal[name] = value
+        return condition
@@ -0,0 +1,145 @@
+"""Base query plans."""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from rest_framework import serializers
+
+
+class QueryPlan:
+    """Declarative description of how a queryset should be fetched.
+
+    It lists relations which should be joined ("select_related"), relations which
+    should be loaded in bulk ("prefetch_related") and aggregates to annotate.
+    """
+
+    def __init__(
+        self,
+        select_related: Iterable[str] = (),
+        prefetch_related: Iterable = (),
+        annotations: Optional[Dict] = None,
+    ):
+        """Initialize a plan; duplicated relations are dropped, in order."""
+        self.select_related = tuple(dict.fromkeys(select_related))
+        self.prefetch_related = tuple(dict.fromkeys(prefetch_related))
+        self.annotations = dict(annotations or {})
+
+    def __add__(self, other):
+        return QueryPlan(
+            self.select_related + other.select_related,
+            self.prefetch_related + other.prefetch_related,
+            {**self.annotations, **other.annotations},
+        )
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__} select_related={self.select_related}"
+            f" prefetch_related={self.prefetch_related}"
+            f" annotations={tuple(self.annotations)}>"
+        )
+
+    def apply(self, queryset):
+        """Apply the plan on a queryset."""
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset
+
+
+def _relations(model):
+    """Map attribute names of a model to its relation fields."""
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation:
+            continue
+        if field.auto_created and not field.concrete:
+            # Reverse relation; it's accessible by its accessor name.
+            name = field.get_accessor_name()
+            if name:
+                relations[name] = field
+        else:
+            relations[field.name] = field
+    return relations
+
+
+def _walk(serializer, model, prefix, prefetched, select_related, prefetch_related):
+    """Collect relations which are used by the serializer's fields."""
+    # Relations which are read outside the fields, declared by the serializer.
+    meta = getattr(serializer, "Meta", None)
+    for path in getattr(meta, "select_related", ()):
+        (prefetch_related if prefetched else select_related).append(f"{prefix}{path}")
+    prefetch_related.extend(
+        f"{prefix}{path}" for path in getattr(meta, "prefetch_related", ())
+    )
+
+    relations = _relations(model)
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        source = field.source.split(".")
+        relation = relations.get(source[0])
+        if relation is None:
+            continue
+
+        child = field
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+
+        path = f"{prefix}{source[0]}"
+        many = relation.many_to_many or relation.one_to_many
+        nested = isinstance(child, serializers.BaseSerializer)
+        pk_only = len(source) == 1 and isinstance(child, serializers.RelatedField)
+        pk_only = pk_only and child.use_pk_only_optimization()
+        if many:
+            prefetch_related.append(path)
+        elif pk_only:
+            # Only the primary key is used, it's served by the local column.
+            continue
+        elif prefetched:
+            prefetch_related.append(path)
+        else:
+            select_related.append(path)
+
+        if nested and getattr(getattr(child, "Meta", None), "model", None):
+            _walk(
+                child,
+                relation.related_model,
+                f"{path}__",
+                prefetched or many,
+                select_related,
+                prefetch_related,
+            )
+
+
+@lru_cache(maxsize=None)
+def plan_for_serializer(serializer_class) -> QueryPlan:
+    """Derive a query plan from a model serializer's fields.
+
+    Nested serializers and related fields are translated to "select_related" for
+    forward relations and to "prefetch_related" for to-many relations. Method
+    fields can't be inspected; their relations should be declared in the
+    serializer's "Meta.select_related" and "Meta.prefetch_related".
+
+    Args:
+        serializer_class (Type[ModelSerializer]): serializer class.
+
+    Returns:
+        QueryPlan: derived query plan.
+    """
+    model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+    if model is None:
+        return QueryPlan()
+
+    select_related, prefetch_related = [], []
+    _walk(serializer_class(), model, "", False, select_related, prefetch_related)
+    # Drop joins which are covered by longer paths.
+    select_related = [
+        path
+        for path in select_related
+        if not any(other.startswith(f"{path}__") for other in select_related)
+    ]
+    return QueryPlan(select_related, prefetch_related)
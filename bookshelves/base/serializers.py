@@ -1,25 +1,172 @@
 """Base serializers."""
+from collections import defaultdict
+from itertools import chain
+
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import models
 from rest_framework import serializers
+from rest_framework.fields import get_attribute
 
+from .bookmarks import get_bookmarks
 from .models import Category, Tag
+from .query_plan import plan_for_serializer
+
+
+def _all(rows):
+    return rows.all() if isinstance(rows, models.Manager) else rows
+
+
+class ContentTypeLinkListSerializer(serializers.ListSerializer):
+    """List serializer which resolves the links of all its rows in bulk."""
+
+    def _rows(self, data):
+        """Get the rows of this list and of its siblings in the parent list.
+
+        When the list is a field of a listed serializer (e.g. menus of group menus)
+        the rows of all the parents are resolved together.
+        """
+        parents = getattr(self.parent, "parent", None)
+        if not isinstance(parents, serializers.ListSerializer):
+            return data
+        if not isinstance(parents.instance, (list, tuple, models.QuerySet)):
+            return data
+        return chain.from_iterable(
+            _all(get_attribute(instance, self.source_attrs))
+            for instance in parents.instance
+        )
+
+    def to_representation(self, data):
+        """DRF built-in method."""
+        data = list(_all(data))
+        self.child.resolve_links(self._rows(data))
+        return super().to_representation(data)
 
 
 class ContentTypeLinkModelSerializer(serializers.ModelSerializer):
-    """ContentTypeLink model serializer implementation."""
+    """ContentTypeLink model serializer implementation.
+
+    The links are resolved by one "in_bulk" query per content type and the
+    serialized targets are memoized in the context, so a listed link costs no
+    extra query. The derived serializers' "Meta" should inherit this "Meta".
+    """
 
     link_details = serializers.SerializerMethodField()
 
-    def get_link_details(self, obj):
-        """Serialize link details based on loaded serializers."""
-        instance = obj.link_type.model_class().objects.get(id=obj.link)
+    class Meta:
+        list_serializer_class = ContentTypeLinkListSerializer
+
+    @property
+    def _links(self):
+        """Serialized link targets by "(link_type_id, link)"."""
+        return self.context.setdefault("content_type_links", {})
+
+    def _serialize_link(self, instance, link):
+        """Serialize a link target based on loaded serializers."""
+        if instance is None:
+            # The target doesn't exist (anymore).
+            return None
         instance_serializer_name = f"{instance.__class__.__name__}Serializer"
         if instance_serializer_name in settings.SERIALIZERS:
             instance_serializer = settings.SERIALIZERS[instance_serializer_name]
             return instance_serializer(
                 instance=instance, context={"request": self.context["request"]}
             ).data
-        return obj.link
+        return link
+
+    def resolve_links(self, rows):
+        """Fetch and serialize the link targets of rows.
+
+        Args:
+            rows (Iterable[Model]): rows which have "link_type" and "link" fields.
+        """
+        links = self._links
+        pending = defaultdict(set)
+        for row in rows:
+            if row.link_type_id is None or (row.link_type_id, row.link) in links:
+                continue
+            pending[row.link_type_id].add(row.link)
+
+        for link_type_id, type_links in pending.items():
+            model = ContentType.objects.get_for_id(link_type_id).model_class()
+            pks = {}
+            for link in type_links:
+                try:
+                    pks[link] = model._meta.pk.to_python(link)
+                except (AttributeError, ValidationError):
+                    # The model is removed or the link isn't a valid key.
+                    pks[link] = None
+
+            instances = {}
+            if model is not None and any(pk is not None for pk in pks.values()):
+                queryset = model._default_manager.all()
+                serializer_class = settings.SERIALIZERS.get(
+                    f"{model.__name__}Serializer"
+                )
+                if serializer_class is not None:
+                    queryset = plan_for_serializer(serializer_class).apply(queryset)
+                instances = queryset.in_bulk(
+                    {pk for pk in pks.values() if pk is not None}
+                )
+
+            for link, pk in pks.items():
+                links[link_type_id, link] = self._serialize_link(
+                    instances.get(pk), link
+                )
+
+    def get_link_details(self, obj):
+        """Serialize link details based on loaded serializers."""
+        if obj.link_type_id is None:
+            return obj.link
+        if (obj.link_type_id, obj.link) not in self._links:
+            self.resolve_links([obj])
+        return self._links[obj.link_type_id, obj.link]
+
+
+class IsBookmarkedField(serializers.ReadOnlyField):
+    """Whether the requesting user bookmarked the row.
+
+    It's read from the user's bookmark set, which is fetched once per response.
+
+    Args:
+        model (Model): bookmarked model; it's the serializer's model by default.
+    """
+
+    def __init__(self, model=None, **kwargs):
+        """DRF built-in method."""
+        self.model = model
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        """DRF built-in method."""
+        user = getattr(self.context.get("request"), "user", None)
+        if user is None or not user.is_authenticated:
+            return False
+        model = self.model or self.parent.Meta.model
+        bookmark_sets = self.context.setdefault("bookmark_sets", {})
+        if model not in bookmark_sets:
+            bookmark_sets[model] = get_bookmarks(model, user)
+        return instance.pk in bookmark_sets[model]
+
+
+class PlainThroughModelSerializer(serializers.ModelSerializer):
+    """Model serializer which writes relations through plain through models.
+
+    DRF makes every relation with an explicit through model read-only; a through
+    model which only has the two foreign keys (e.g. to declare its indexes) is
+    written like an auto-created one.
+    """
+
+    def build_relational_field(self, field_name, relation_info):
+        """DRF built-in method."""
+        if relation_info.has_through_model and relation_info.model_field:
+            through = relation_info.model_field.remote_field.through
+            # The primary key and the two foreign keys.
+            if len(through._meta.concrete_fields) == 3:
+                relation_info = relation_info._replace(has_through_model=False)
+        return super().build_relational_field(field_name, relation_info)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -29,14 +176,37 @@ class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
+        read_only_fields = ("path", "depth")
         fields = (
             "url",
             "id",
             "name",
             "parent",
+            "path",
+            "depth",
         )
         ref_name = "category"
 
+    def validate_parent(self, parent):
+        """Reject moving a category under itself or its descendants."""
+        if self.instance and parent and self._is_subtree(parent):
+            raise serializers.ValidationError(
+                "A category can't be moved under itself or its descendants."
+            )
+        return parent
+
+    def _is_subtree(self, category):
+        if self.instance.path and category.path:
+            return category.path.startswith(self.instance.path)
+        # The paths aren't built yet; walk up the parents instead.
+        seen = set()
+        while category is not None and category.pk not in seen:
+            if category.pk == self.instance.pk:
+                return True
+            seen.add(category.pk)
+            category = category.parent
+        return False
+
 
 class TagSerializer(serializers.ModelSerializer):
     """Tag serializer."""
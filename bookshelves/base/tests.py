@@ -1,7 +1,28 @@
 """Base tests."""
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
 from account.models import User
+from account.serializers import AddressSerializer, UserSerializer
+
+from .cache import get_stats, get_versions
+from .filters import CategoryDescendantsFilter
+from .models import Category, Tag, rebuild_category_paths
+from .pagination import KeysetPagination
+from .query_plan import QueryPlan, plan_for_serializer
+from .serializers import CategorySerializer
+from .views import CategoryViewSet, TagViewSet
 
 
 class BaseAPITestCase(APITestCase):
@@ -43,3 +64,281 @@ class BaseAPITestCase(APITestCase):
     def logout(self):
         self.client.get(reverse("account:logout"))
         self.client.credentials()
+
+
+class QueryPlanTest(SimpleTestCase):
+    """Test query plans derived from serializers."""
+
+    def test_to_many_relations_are_prefetched(self):
+        plan = plan_for_serializer(UserSerializer)
+        self.assertEqual(plan.select_related, ())
+        self.assertCountEqual(
+            plan.prefetch_related, ("groups", "address_user", "user_permissions")
+        )
+
+    def test_primary_key_relations_are_skipped(self):
+        plan = plan_for_serializer(AddressSerializer)
+        self.assertEqual(plan.select_related, ())
+        self.assertEqual(plan.prefetch_related, ())
+
+    def test_declared_relations(self):
+        class Serializer(AddressSerializer):
+            class Meta(AddressSerializer.Meta):
+                select_related = ("user",)
+                prefetch_related = ("user__groups",)
+
+        plan = plan_for_serializer(Serializer)
+        self.assertEqual(plan.select_related, ("user",))
+        self.assertEqual(plan.prefetch_related, ("user__groups",))
+
+    def test_merge(self):
+        plan = QueryPlan(["user"], ["tags"]) + QueryPlan(["user"], ["groups"])
+        self.assertEqual(plan.select_related, ("user",))
+        self.assertEqual(plan.prefetch_related, ("tags", "groups"))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class KeysetPaginationTest(TestCase):
+    """Test keyset pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.bulk_create(Tag(name=f"tag{i}") for i in range(25))
+        # Rows which share a timestamp are ordered by their IDs.
+        Tag.objects.filter(id__lte=Tag.objects.order_by("id")[10].id).update(
+            created_at=timezone.now()
+        )
+
+    def _get(self, **params):
+        request = APIRequestFactory().get("/tags/", params)
+        with CaptureQueriesContext(connection) as context:
+            response = TagViewSet.as_view({"get": "list"})(request)
+        return response, context.captured_queries
+
+    @staticmethod
+    def _params(link):
+        return {key: value[0] for key, value in parse_qs(urlparse(link).query).items()}
+
+    def test_page_number_is_default(self):
+        response, _ = self._get()
+        self.assertEqual(response.data["count"], 25)
+
+    @mock.patch.object(KeysetPagination, "page_size", 4)
+    def test_walk_all_pages(self):
+        expected = list(Tag.objects.order_by("created_at", "id").values_list("name", flat=True))
+        response, first_queries = self._get(pagination="cursor")
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+
+        names, pages = [], []
+        while True:
+            names += [tag["name"] for tag in response.data["results"]]
+            pages.append(response.data)
+            if response.data["next"] is None:
+                break
+            response, queries = self._get(**self._params(response.data["next"]))
+        self.assertEqual(names, expected)
+
+        # A deep page costs the same as the first one.
+        self.assertEqual(len(queries), len(first_queries))
+        for query in queries:
+            self.assertNotIn("OFFSET", query["sql"].upper())
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+        response, _ = self._get(**self._params(pages[-1]["previous"]))
+        self.assertEqual(response.data["results"], pages[-2]["results"])
+
+    def test_invalid_cursor(self):
+        response, _ = self._get(cursor="invalid")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ResponseCacheTest(TestCase):
+    """Test the response cache."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag = Tag.objects.create(name="tag")
+
+    def _get(self, user=None, **headers):
+        request = APIRequestFactory().get("/tags/", **headers)
+        if user is not None:
+            force_authenticate(request, user=user)
+        return TagViewSet.as_view({"get": "list"})(request)
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self._get()["X-Cache"], "MISS")
+        response = self._get()
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(self._get(HTTP_ACCEPT="text/html")["X-Cache"], "MISS")
+        self.assertEqual(get_stats(), {"hits": 1, "misses": 2, "hit_ratio": 1 / 3})
+
+    def test_invalidated_on_commit(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name="new")
+        response = self._get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(self._get().data["count"], 1)
+
+    def test_authenticated_users_are_not_cached(self):
+        Group.objects.create(name=settings.DEFAULT_USER_GROUP)
+        user = User.objects.create(username="user", mobile="1")
+        self._get()
+        self.assertNotIn("X-Cache", self._get(user=user))
+
+    def test_only_dependencies_are_invalidated(self):
+        Group.objects.create(name=settings.DEFAULT_USER_GROUP)
+        user = User.objects.create(username="user", mobile="1")
+        labels = ("account.user", "authtoken.token")
+        versions = get_versions(labels)
+        with self.captureOnCommitCallbacks(execute=True):
+            # No cached view depends on the tokens, nor renders the users' logins.
+            Token.objects.create(user=user)
+            user.last_login = timezone.now()
+            user.save(update_fields=["last_login"])
+        self.assertEqual(get_versions(labels), versions)
+
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name="new")
+        self.assertEqual(self._get()["X-Cache"], "MISS")
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CategoryTreeTest(TestCase):
+    """Test the categories materialized paths."""
+
+    def setUp(self):
+        self.books = Category.objects.create(name="books")
+        self.novels = Category.objects.create(name="novels", parent=self.books)
+        self.classics = Category.objects.create(name="classics", parent=self.novels)
+        self.music = Category.objects.create(name="music")
+
+    def _refresh(self):
+        for category in (self.books, self.novels, self.classics, self.music):
+            category.refresh_from_db()
+
+    def test_paths_of_new_categories(self):
+        self.assertEqual(self.books.path, f"/{self.books.pk}/")
+        self.assertEqual(
+            self.classics.path, f"/{self.books.pk}/{self.novels.pk}/{self.classics.pk}/"
+        )
+        self.assertEqual((self.books.depth, self.classics.depth), (0, 2))
+
+    def test_move_subtree(self):
+        self.novels.parent = self.music
+        self.novels.save()
+        self._refresh()
+        self.assertEqual(
+            self.classics.path, f"/{self.music.pk}/{self.novels.pk}/{self.classics.pk}/"
+        )
+        self.assertEqual(self.classics.depth, 2)
+
+        self.novels.parent = None
+        self.novels.save()
+        self._refresh()
+        self.assertEqual(self.classics.path, f"/{self.novels.pk}/{self.classics.pk}/")
+        self.assertEqual(self.classics.depth, 1)
+
+    def test_move_under_descendant(self):
+        self.books.parent = self.classics
+        with self.assertRaises(ValueError):
+            self.books.save()
+
+    def test_delete_subtree(self):
+        self.novels.delete()
+        self.assertEqual(
+            list(Category.objects.filter(is_deleted=False)), [self.books, self.music]
+        )
+
+    def test_rebuild_paths(self):
+        Category.objects.update(path="", depth=0)
+        self.assertEqual(Category.rebuild_paths(), 4)
+        self._refresh()
+        self.assertEqual(self.classics.depth, 2)
+        self.assertEqual(Category.rebuild_paths(), 0)
+
+    def test_descendants_filter(self):
+        descendants = CategoryDescendantsFilter(field_name="parent").filter(
+            Category.objects.all(), self.books.pk
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(set(descendants), {self.novels, self.classics})
+
+    def test_tree(self):
+        request = APIRequestFactory().get("/categories/tree/")
+        with self.assertNumQueries(1):
+            response = CategoryViewSet.as_view({"get": "tree"})(request)
+        self.assertEqual(
+            [(node["name"], len(node["children"])) for node in response.data],
+            [("books", 1), ("music", 0)],
+        )
+        self.assertEqual(response.data[0]["children"][0]["children"][0]["name"], "classics")
+
+    def test_unbuilt_paths(self):
+        Category.objects.update(path="", depth=0)
+        self._refresh()
+        serializer = CategorySerializer(instance=self.books)
+        with self.assertRaises(ValidationError):
+            serializer.validate_parent(self.classics)
+        self.assertEqual(serializer.validate_parent(self.music), self.music)
+
+        descendants = CategoryDescendantsFilter(field_name="parent").filter(
+            Category.objects.all(), self.books.pk
+        )
+        self.assertEqual(set(descendants), {self.novels})
+
+        response = CategoryViewSet.as_view({"get": "tree"})(
+            APIRequestFactory().get("/categories/tree/")
+        )
+        self.assertEqual(
+            [(node["name"], len(node["children"])) for node in response.data],
+            [("books", 1), ("music", 0)],
+        )
+
+        self.novels.delete()
+        self.assertEqual(
+            list(Category.objects.filter(is_deleted=False)), [self.books, self.music]
+        )
+
+        rebuild_category_paths(using="default")
+        self.books.refresh_from_db()
+        self.assertEqual(self.books.path, f"/{self.books.pk}/")
+
+
+class SoftDeleteTest(TestCase):
+    """Test the soft delete querysets."""
+
+    def setUp(self):
+        self.tags = [Tag.objects.create(name=name) for name in ("a", "b", "c")]
+
+    def test_bulk_delete_and_restore(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Tag.objects.filter(name__in=("a", "b")).delete(), 2)
+        self.assertEqual(list(Tag.objects.values_list("name", flat=True)), ["c"])
+        self.assertEqual(Tag.all_objects.count(), 3)
+
+        self.assertEqual(Tag.all_objects.filter(is_deleted=True).restore(), 2)
+        self.assertEqual(Tag.objects.count(), 3)
+
+    def test_instance_delete(self):
+        tag = self.tags[0]
+        modified_at = tag.modified_at
+        tag.delete()
+        tag = Tag.all_objects.get(pk=tag.pk)
+        self.assertTrue(tag.is_deleted)
+        self.assertGreater(tag.modified_at, modified_at)
+
+    def test_hard_delete(self):
+        Tag.objects.filter(name="a").hard_delete()
+        self.assertEqual(Tag.all_objects.count(), 2)
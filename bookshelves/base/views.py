@@ -1,8 +1,15 @@
 """Base views."""
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, permissions, viewsets
+from rest_framework import generics, permissions, status, views, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
+from .bookmarks import get_bookmarks
+from .cache import CachedResponseMixin, get_stats
 from .models import Category, Tag
+from .pagination import KeysetPagination
+from .query_plan import QueryPlan, plan_for_serializer
 from .serializers import CategorySerializer, TagSerializer
 
 
@@ -12,6 +19,26 @@ class BaseViewSet(viewsets.GenericViewSet):
     # It should be override in the derived classes.
     alternative_lookup_field = None
 
+    # Query plan; relations used by the serializer are derived from its fields and
+    # its "Meta", the rest (e.g. the ones used only by a view) should be declared in
+    # the derived classes.
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    annotations = {}
+
+    # URL keyword arguments of the parents of nested routes mapped to the relations
+    # which filter the queryset by them; several relations of a parent are OR-ed.
+    parent_lookups = {}
+
+    # Keyset pagination is used when it's requested by "?pagination=cursor" (or a
+    # cursor is sent); set it as "pagination_class" to use it by default.
+    keyset_pagination_class = KeysetPagination
+    pagination_query_param = "pagination"
+
+    # GET requests are allowed to anyone; set it False in the derived classes whose
+    # objects are private, so their "permission_classes" apply to the reads too.
+    public_reads = True
+
     def get_object(self):
         """DRF built-in method.
 
@@ -23,32 +50,184 @@ class BaseViewSet(viewsets.GenericViewSet):
         queryset = self.get_queryset()
         if self.kwargs[self.lookup_field].isdigit():
             field = "pk"
-            value = self.kwargs[self.lookup_field].isdigit()
+            value = int(self.kwargs[self.lookup_field])
         else:
             field = self.alternative_lookup_field
             value = self.kwargs[self.lookup_field]
 
-        if not self.request.user.is_superuser:
-            queryset = queryset.filter(user=self.request.user)
+        # The queryset is already limited to the user's own objects.
         return get_object_or_404(queryset, **{field: value})
 
     def get_permissions(self):
         """Get permissions based on method."""
-        if self.request.method == "GET":
+        if self.public_reads and self.request.method == "GET":
             self.permission_classes = [permissions.AllowAny]
         return super().get_permissions()
 
+    @property
+    def paginator(self):
+        """DRF built-in property.
+
+        Switch to keyset pagination on request.
+        """
+        if not hasattr(self, "_paginator") and self._keyset_requested():
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+    def _keyset_requested(self):
+        if self.pagination_class is None:
+            return False
+        query_params = self.request.query_params
+        requested = any(
+            (
+                query_params.get(self.pagination_query_param) == "cursor",
+                self.keyset_pagination_class.cursor_query_param in query_params,
+            )
+        )
+        return requested and self.keyset_pagination_class.supports(
+            self.get_queryset().model
+        )
+
+    def get_query_plan(self):
+        """Get the query plan of the view."""
+        return plan_for_serializer(self.get_serializer_class()) + QueryPlan(
+            self.select_related_fields,
+            self.prefetch_related_fields,
+            self.annotations,
+        )
+
+    def plan_queryset(self, queryset):
+        """Apply the query plan on a queryset."""
+        return self.get_query_plan().apply(queryset)
+
+    def filter_by_parents(self, queryset):
+        """Filter a queryset by the parents of a nested route.
+
+        Like their own detail routes, parents are looked up by primary key or name.
+        """
+        for kwarg, relations in self.parent_lookups.items():
+            value = self.kwargs.get(kwarg)
+            if value is None:
+                continue
+            lookup = "" if value.isdigit() else "__name"
+            condition = Q()
+            for relation in relations:
+                condition |= Q(**{f"{relation}{lookup}": value})
+            queryset = queryset.filter(condition)
+        return queryset
+
     def get_queryset(self):
         """
         This view should return a list of all the cart
         for the currently authenticated user.
         """
+        queryset = self.filter_by_parents(self.plan_queryset(super().get_queryset()))
+        if not any(field.name == "user" for field in queryset.model._meta.fields):
+            return queryset
+
         user = self.request.user
-        # breakpoint()
-        return self.queryset.filter(user=user)
+        if not user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(user=user)
+
+
+def _message(status_code, detail, **data):
+    return Response(
+        data={
+            "status_code": status_code,
+            "code": status_code,
+            "detail": detail,
+            **data,
+        },
+        status=status_code,
+    )
+
+
+class BaseBookmarkViewSet(
+    BaseViewSet, generics.ListCreateAPIView, generics.DestroyAPIView
+):
+    """Base bookmark view set; the user's bookmarks of "bookmark_model".
+
+    Bookmarks are checked against the user's bookmark set and written through the
+    user's side of the relation, so the counters and the sets are kept in sync.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    # It should be override in the derived classes.
+    bookmark_model = None
+
+    def get_queryset(self):
+        """Only fetch bookmark-related rows."""
+        return self.bookmark_model.objects.filter(bookmarks=self.request.user)
+
+    def _bookmarks(self):
+        """Get the user's side of the bookmarks relation."""
+        field = self.bookmark_model._meta.get_field("bookmarks")
+        return getattr(self.request.user, field.remote_field.get_accessor_name())
+
+    def _exists(self, pk):
+        try:
+            return self.bookmark_model.objects.filter(pk=int(pk)).exists()
+        except (TypeError, ValueError):
+            return False
+
+    def create(self, request, *args, **kwargs):
+        """Bookmark the "post" of the request."""
+        pk = request.data.get("post")
+        if not self._exists(pk):
+            return _message(status.HTTP_404_NOT_FOUND, "Post not found.")
+        if int(pk) in get_bookmarks(self.bookmark_model, request.user):
+            return _message(status.HTTP_400_BAD_REQUEST, "The post already bookmarked.")
+        self._bookmarks().add(int(pk))
+        return _message(status.HTTP_201_CREATED, "Bookmark created.")
+
+    def destroy(self, request, *args, **kwargs):
+        """DRF built-in method."""
+        if not self._exists(kwargs["pk"]):
+            return _message(status.HTTP_404_NOT_FOUND, "Post not found.")
+        if int(kwargs["pk"]) not in get_bookmarks(self.bookmark_model, request.user):
+            return _message(status.HTTP_404_NOT_FOUND, "Bookmark not found.")
+        self._bookmarks().remove(int(kwargs["pk"]))
+        return _message(status.HTTP_204_NO_CONTENT, "Bookmark removed.")
+
+    @action(detail=False, methods=["post", "delete"])
+    def bulk(self, request, *args, **kwargs):
+        """Add ("POST") or remove ("DELETE") the bookmarks of the "ids" at once.
+
+        Unknown ids are skipped, so are the already added (or missing) bookmarks;
+        the changed ones are returned.
+        """
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            return _message(
+                status.HTTP_400_BAD_REQUEST,
+                "The 'ids' parameter should be a list of ids.",
+            )
+
+        bookmarks = get_bookmarks(self.bookmark_model, request.user)
+        if request.method == "POST":
+            pks = set(ids) - bookmarks
+        else:
+            pks = bookmarks.intersection(ids)
+        if pks:
+            # Rows of other models which share the relation (e.g. the other product
+            # types) are skipped too.
+            pks = set(
+                self.bookmark_model.objects.filter(pk__in=pks).values_list(
+                    "pk", flat=True
+                )
+            )
+        if request.method == "POST":
+            if pks:
+                self._bookmarks().add(*pks)
+            return _message(status.HTTP_200_OK, "Bookmarks created.", ids=sorted(pks))
+        if pks:
+            self._bookmarks().remove(*pks)
+        return _message(status.HTTP_200_OK, "Bookmarks removed.", ids=sorted(pks))
 
 
 class TagViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -64,7 +243,10 @@ class TagViewSet(
 
 
 class CategoryViewSet(
-    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
+    CachedResponseMixin,
+    BaseViewSet,
+    generics.ListCreateAPIView,
+    generics.RetrieveUpdateDestroyAPIView,
 ):
     """Category view set."""
 
@@ -73,3 +255,39 @@ class CategoryViewSet(
     serializer_class = CategorySerializer
     alternative_lookup_field = "name"
     filterset_fields = ("name",)
+
+    @action(detail=False)
+    def tree(self, request):
+        """Get the whole category tree, built from a single query."""
+        return self.cached_response(self._tree, request)
+
+    def _tree(self, request):
+        categories = Category.objects.order_by("name").values("id", "name", "parent_id")
+        nodes = {
+            category["id"]: {
+                "id": category["id"],
+                "name": category["name"],
+                "children": [],
+            }
+            for category in categories
+        }
+        roots = []
+        # The children are linked once all the nodes exist, so it doesn't depend on
+        # the depths, which aren't built for the categories created before them.
+        for category in categories:
+            node = nodes[category["id"]]
+            if category["parent_id"] is None:
+                roots.append(node)
+            elif category["parent_id"] in nodes:
+                nodes[category["parent_id"]]["children"].append(node)
+        return Response(roots)
+
+
+class ResponseCacheStatsView(views.APIView):
+    """Response cache hit/miss counters."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Get the counters."""
+        return Response(get_stats())
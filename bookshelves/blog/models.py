@@ -2,9 +2,11 @@
 from django.conf import settings
 # from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 
 from account.models import User
-from base.models import Base, BaseComment, BaseStar, Category, Tag
+from base.models import Base, BaseComment, BaseEngagementCounters, BaseStar, Category, Tag
 
 
 # class Tag(Base):
@@ -41,7 +43,7 @@ def get_deleted_post_category():
     return Category.objects.get_or_create(name=settings.DELETED_POST_CATEGORY_NAME)
 
 
-class Post(Base):
+class Post(Base, BaseEngagementCounters):
     """Post model implementation."""
 
     title = models.CharField(max_length=1024, null=False, unique=True)
@@ -63,8 +65,19 @@ class Post(Base):
     visited = models.PositiveIntegerField(default=0)
     is_approved = models.BooleanField(default=False)
 
+    comments_related_name = "post_comments"
+    stars_related_name = "post_stars"
+
     class Meta:
         ordering = ["created_at"]
+        # Used by the keyset pagination; only the live rows are indexed.
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="post_live_created_id_idx",
+                condition=models.Q(is_deleted=False),
+            )
+        ]
 
     def __str__(self):
         if self.is_deleted:
@@ -118,3 +131,18 @@ class PostStar(BaseStar):
 
     def __str__(self):
         return f"{self.post.title}[{self.star}]"
+
+
+@receiver(signals.post_save, sender=PostComment)
+@receiver(signals.post_delete, sender=PostComment)
+@receiver(signals.post_save, sender=PostStar)
+@receiver(signals.post_delete, sender=PostStar)
+def post_engagement_counters(instance, **_):
+    """Refresh the post's counters when a comment or a star changes."""
+    Post.refresh_counters([instance.post_id])
+
+
+@receiver(signals.m2m_changed, sender=Post.bookmarks.through)
+def post_bookmarks_counter(**kwargs):
+    """Refresh the posts' bookmarks counter."""
+    Post.bookmarks_changed(**kwargs)
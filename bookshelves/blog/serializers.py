@@ -1,11 +1,10 @@
 """Blog serializers."""
-from django.db.models import Avg
 from rest_framework import serializers
 
 from account.serializers import UserSerializer, UserGeneralInfoSerializer
 # from .models import Post, Tag, PostStar, Category, PostComment
 from .models import Post, PostStar, PostComment
-from base.serializers import TagSerializer
+from base.serializers import IsBookmarkedField, TagSerializer
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -23,6 +22,13 @@ class CommentSerializer(serializers.ModelSerializer):
             "is_approved",
         )
         user_fields = ("id", "url", "email", "first_name", "last_name")
+        # Users are serialized in "to_representation".
+        select_related = ("user",)
+        prefetch_related = (
+            "user__groups",
+            "user__address_user",
+            "user__user_permissions",
+        )
 
     def to_representation(self, instance):
         """DRF built-in method."""
@@ -77,10 +83,11 @@ class PostSerializer(serializers.ModelSerializer):
     """Post serializer."""
 
     url = serializers.HyperlinkedIdentityField(view_name="blog:post-detail")
-    comments = CommentSerializer(many=True, read_only=True)
-    comments_count = serializers.SerializerMethodField()
-    stars_average = serializers.SerializerMethodField()
-    bookmarks_count = serializers.SerializerMethodField()
+    comments = CommentSerializer(many=True, read_only=True, source="post_comments")
+    comments_count = serializers.IntegerField(read_only=True)
+    stars_average = serializers.FloatField(read_only=True)
+    bookmarks_count = serializers.IntegerField(read_only=True)
+    is_bookmarked = IsBookmarkedField()
     user = UserGeneralInfoSerializer(many=False, read_only=True)
 
     class Meta:
@@ -99,6 +106,7 @@ class PostSerializer(serializers.ModelSerializer):
             "comments",
             "stars_average",
             "bookmarks_count",
+            "is_bookmarked",
             "content",
             "image",
             "is_draft",
@@ -107,21 +115,6 @@ class PostSerializer(serializers.ModelSerializer):
             "visited",
         )
 
-    def get_comments_count(self, obj):
-        """Get post's comment count."""
-        return obj.comments.count()
-
-    def get_stars_average(self, obj):
-        """Get post's star average."""
-        if obj.stars.all().aggregate(Avg("star"))["star__avg"]:
-            return obj.stars.all().aggregate(Avg("star"))["star__avg"]
-        else:
-            return 0
-
-    def get_bookmarks_count(self, obj):
-        """Get post's bookmarks count."""
-        return obj.bookmarks.count()
-
     def to_representation(self, instance):
         """Override tag IDs with tag details."""
         serialized_data = super().to_representation(instance)
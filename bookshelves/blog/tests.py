@@ -1,15 +1,86 @@
 """Blog tests."""
-from bookshelves.tests import BaseAPITestCase
+from base.tests import BaseAPITestCase
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
+from account.models import User
+from base.models import Category
+from .models import Post, PostComment, PostStar
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
 
 class PostTest(BaseAPITestCase):
     """Test post endpoints."""
 
     def setUp(self):
-        self.register_and_login("admin", "admin@dev.local", "admin")
+        self.fake_admin()
 
     def test_new_post(self):
         response = self.client.post(reverse("blog:category-list"), {"name": "cat1"})
         print(response.json())
         self.assertEqual(response.json()["name"], "cat1")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PostCountersTest(TestCase):
+    """Test post's denormalized engagement counters."""
+
+    def setUp(self):
+        Group.objects.create(name=settings.DEFAULT_USER_GROUP)
+        self.users = [
+            User.objects.create(username=f"user{i}", mobile=str(i)) for i in range(3)
+        ]
+        self.post = Post.objects.create(
+            title="post",
+            brief="brief",
+            content="content",
+            slug="post",
+            image="https://example.com/image.png",
+            user=self.users[0],
+            category=Category.objects.create(name="category"),
+        )
+
+    def _counters(self):
+        self.post.refresh_from_db()
+        return (
+            self.post.comments_count,
+            self.post.bookmarks_count,
+            self.post.stars_sum,
+            self.post.stars_count,
+        )
+
+    def test_comments_and_stars(self):
+        comment = PostComment.objects.create(
+            user=self.users[1], post=self.post, message="hi", reply_to=None
+        )
+        PostComment.objects.create(
+            user=self.users[2], post=self.post, message="hey", reply_to=None
+        )
+        PostStar.objects.create(user=self.users[1], post=self.post, star=4)
+        star = PostStar.objects.create(user=self.users[2], post=self.post, star=8)
+        self.assertEqual(self._counters(), (2, 0, 12, 2))
+        self.assertEqual(self.post.stars_average, 6)
+
+        comment.delete()
+        star.star = 2
+        star.save()
+        self.assertEqual(self._counters(), (1, 0, 6, 2))
+
+    def test_bookmarks(self):
+        self.post.bookmarks.add(*self.users)
+        self.assertEqual(self._counters(), (0, 3, 0, 0))
+
+        self.users[0].post_bookmarks.remove(self.post)
+        self.assertEqual(self._counters(), (0, 2, 0, 0))
+
+        self.users[1].post_bookmarks.clear()
+        self.assertEqual(self._counters(), (0, 1, 0, 0))
+
+        Post.objects.filter(pk=self.post.pk).update(bookmarks_count=42)
+        Post.refresh_counters()
+        self.assertEqual(self._counters(), (0, 1, 0, 0))
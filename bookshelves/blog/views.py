@@ -1,6 +1,8 @@
 """Blog views."""
-from base.views import BaseViewSet
-from rest_framework import generics, permissions, status
+from base.filters import CategoryDescendantsFilter
+from base.views import BaseBookmarkViewSet, BaseViewSet
+from django_filters import rest_framework as filters
+from rest_framework import generics, permissions
 from rest_framework.response import Response
 
 from .models import Category, PostComment, Post, PostStar, Tag
@@ -12,6 +14,16 @@ from .serializers import (
 )
 
 
+class PostFilterSet(filters.FilterSet):
+    """Post filter set."""
+
+    descendants = CategoryDescendantsFilter()
+
+    class Meta:
+        model = Post
+        fields = ("title", "slug", "tags", "is_draft", "descendants")
+
+
 class PostViewSet(
     BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
 ):
@@ -20,7 +32,7 @@ class PostViewSet(
     permission_classes = [permissions.DjangoModelPermissions]
     queryset = Post.objects.filter(is_deleted=False)
     serializer_class = PostSerializer
-    filterset_fields = ("title", "slug", "tags", "is_draft")
+    filterset_class = PostFilterSet
 
     def perform_create(self, serializer):
         """Override post value."""
@@ -43,7 +55,9 @@ class CommentViewSet(
 
     def get_queryset(self):
         """Only fetch post-related comments."""
-        return PostComment.objects.filter(post=self.kwargs["post_pk"])
+        return self.plan_queryset(
+            PostComment.objects.filter(post=self.kwargs["post_pk"])
+        )
 
     def create(self, request, *args, **kwargs):
         """Attach user ID and post ID into a request."""
@@ -83,72 +97,9 @@ class StarViewSet(
         return Response(StarSerializer(instance=current_star).data)
 
 
-class BookmarkViewSet(BaseViewSet, generics.ListCreateAPIView, generics.DestroyAPIView):
+class BookmarkViewSet(BaseBookmarkViewSet):
     """Bookmark view set."""
 
-    permission_classes = [permissions.IsAuthenticated]
     queryset = Post.objects.all().only("id", "bookmarks")
     serializer_class = BookmarkSerializer
-
-    def get_queryset(self):
-        """Only fetch bookmark-related posts."""
-        return Post.objects.filter(bookmarks=self.request.user)
-
-    def create(self, request, *args, **kwargs):
-        """Attach user ID into a request."""
-        request.data["user"] = self.request.user.id
-        try:
-            self.get_queryset().get(id=request.data["post"])
-            return Response(
-                data={
-                    "status_code": status.HTTP_400_BAD_REQUEST,
-                    "code": status.HTTP_400_BAD_REQUEST,
-                    "detail": "The post already bookmarked.",
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        except Post.DoesNotExist:
-            post = Post.objects.get(id=request.data["post"])
-            post.bookmarks.add(self.request.user)
-        return Response(
-            data={
-                "status_code": status.HTTP_201_CREATED,
-                "code": status.HTTP_201_CREATED,
-                "detail": "Bookmark created.",
-            },
-            status=status.HTTP_201_CREATED,
-        )
-
-    def destroy(self, request, *args, **kwargs):
-        """DRF built-in method."""
-        try:
-            post = Post.objects.get(id=kwargs["pk"])
-        except Post.DoesNotExist:
-            return Response(
-                data={
-                    "status_code": status.HTTP_404_NOT_FOUND,
-                    "code": status.HTTP_404_NOT_FOUND,
-                    "detail": "Post not found.",
-                },
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        if post.bookmarks.filter(bookmarks__bookmarks=self.request.user).exists():
-            post.bookmarks.remove(self.request.user)
-            return Response(
-                data={
-                    "status_code": status.HTTP_204_NO_CONTENT,
-                    "code": status.HTTP_204_NO_CONTENT,
-                    "detail": "Bookmark removed.",
-                },
-                status=status.HTTP_204_NO_CONTENT,
-            )
-
-        return Response(
-            data={
-                "status_code": status.HTTP_404_NOT_FOUND,
-                "code": status.HTTP_404_NOT_FOUND,
-                "detail": "Bookmark not found.",
-            },
-            status=status.HTTP_404_NOT_FOUND,
-        )
+    bookmark_model = Post
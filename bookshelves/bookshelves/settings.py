@@ -148,9 +148,31 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Password hashing settings.
+
+# Hasher of the new passwords; passwords of the other hashers are rehashed on login.
+PASSWORD_HASHER = os.environ.get("THRUSH_PASSWORD_HASHER", "pbkdf2_sha256")
+# Iterations of the PBKDF2 hashes; hashes of other iterations are rehashed on login.
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get("THRUSH_PASSWORD_HASH_ITERATIONS", 320000)
+)
+# Threads of every process which hash the passwords off the request threads.
+PASSWORD_HASHING_THREADS = int(
+    os.environ.get("THRUSH_PASSWORD_HASHING_THREADS", os.cpu_count() or 1)
+)
+_PASSWORD_HASHERS = {
+    "pbkdf2_sha256": "account.hashers.PBKDF2PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt_sha256": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+
 AUTHENTICATION_BACKENDS = [
     "account.backends.AccountBackend",
-    "django.contrib.auth.backends.ModelBackend",
+    "account.backends.PermissionSnapshotBackend",
 ]
 
 # Internationalization
@@ -189,7 +211,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": int(os.environ.get("THRUSH_PAGE_SIZE", 10)),
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "account.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -218,6 +240,8 @@ AUTH_USER_MODEL = "account.User"
 DEFAULT_USER_GROUP = "users"
 DEFAULT_USER_GROUP_PERMISSIONS = []
 MOBILE_LENGTH = int(os.environ.get("THRUSH_MOBILE_LENGTH", "13"))
+# Login identifiers which match this pattern are looked up as mobiles first.
+MOBILE_PATTERN = os.environ.get("THRUSH_MOBILE_PATTERN", r"^\+?\d+$")
 VERIFICATION_CODE_LENGTH = int(os.environ.get("THRUSH_VERIFY_CODE_LENGTH", "6"))
 VERIFICATION_CODE_LENGTH_RANGE = (
     math.pow(10, VERIFICATION_CODE_LENGTH - 1),
@@ -226,9 +250,34 @@ VERIFICATION_CODE_LENGTH_RANGE = (
 VERIFICATION_CODE_LIFE_TIME = int(
     os.environ.get("THRUSH_VERIFY_CODE_LIFE_TIME", 60 * 3)
 )
+# Users which are registered by one bulk registration request at most.
+BULK_REGISTRATION_LIMIT = int(os.environ.get("THRUSH_BULK_REGISTRATION_LIMIT", 1000))
 LOGIN_URL = "/account/login"
 LOGOUT_URL = "/account/logout"
 
+# Permission snapshot settings.
+
+# Seconds to keep the snapshots of the users' effective permissions.
+PERMISSION_SNAPSHOT_TIMEOUT = int(
+    os.environ.get("THRUSH_PERMISSION_SNAPSHOT_TIMEOUT", 60 * 60)
+)
+PERMISSION_SNAPSHOT_PREFIX = os.environ.get(
+    "THRUSH_PERMISSION_SNAPSHOT_PREFIX", "permissions"
+)
+
+# Token authentication settings.
+
+# Seconds to keep the users of the tokens in the shared cache.
+TOKEN_CACHE_TIMEOUT = int(os.environ.get("THRUSH_TOKEN_CACHE_TIMEOUT", 60 * 5))
+TOKEN_CACHE_PREFIX = os.environ.get("THRUSH_TOKEN_CACHE_PREFIX", "tokens")
+# Entries of the in-process LRU of the token users; 0 disables it.
+TOKEN_LOCAL_CACHE_SIZE = int(os.environ.get("THRUSH_TOKEN_LOCAL_CACHE_SIZE", "1024"))
+# Seconds to keep them in the LRU; it bounds how long a revoked token is still
+# accepted by the other processes.
+TOKEN_LOCAL_CACHE_TIMEOUT = float(
+    os.environ.get("THRUSH_TOKEN_LOCAL_CACHE_TIMEOUT", "5")
+)
+
 # Blog component settings.
 
 STAR_MIN_VALUE = int(os.environ.get("THRUSH_STAR_MIN_VALUE", "1"))
@@ -249,3 +298,54 @@ DELETED_SLIDE_GROUP_NAME = "__deleted_group_menu"
 # Product component.
 
 DELETED_PRODUCT_CATEGORY_NAME = "__deleted_product"
+# Years of every "published_year" facet bucket.
+FACET_YEAR_BUCKET_SIZE = int(os.environ.get("THRUSH_FACET_YEAR_BUCKET_SIZE", "10"))
+# Bounds of the "price" facet ranges; the first starts at 0 and the last is open.
+FACET_PRICE_RANGES = tuple(
+    int(bound)
+    for bound in os.environ.get(
+        "THRUSH_FACET_PRICE_RANGES", "50000,100000,200000,500000"
+    ).split(",")
+)
+
+# Response cache settings.
+
+# Seconds to keep the responses of anonymous GET requests; 0 disables the cache.
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("THRUSH_RESPONSE_CACHE_TIMEOUT", 60 * 5))
+RESPONSE_CACHE_PREFIX = os.environ.get("THRUSH_RESPONSE_CACHE_PREFIX", "response")
+# Fields by model label whose updates (saves of "update_fields") aren't in any
+# cached response, e.g. the logins of users.
+RESPONSE_CACHE_IGNORED_FIELDS = {"account.user": ("last_login", "password")}
+
+# Bookmark settings.
+
+# Seconds to keep the users' bookmark sets in the cache.
+BOOKMARK_SET_TIMEOUT = int(os.environ.get("THRUSH_BOOKMARK_SET_TIMEOUT", 60 * 60))
+BOOKMARK_SET_PREFIX = os.environ.get("THRUSH_BOOKMARK_SET_PREFIX", "bookmarks")
+
+# Price settings.
+
+# Seconds to keep the effective prices which have no window boundary ahead; the
+# others are kept until their next boundary, at most this long.
+PRICE_CACHE_TIMEOUT = int(os.environ.get("THRUSH_PRICE_CACHE_TIMEOUT", 60 * 60))
+PRICE_CACHE_PREFIX = os.environ.get("THRUSH_PRICE_CACHE_PREFIX", "prices")
+
+# Reservation settings.
+
+# Seconds which the stock of an unpaid checkout is held for.
+RESERVATION_TIMEOUT = int(os.environ.get("THRUSH_RESERVATION_TIMEOUT", 60 * 15))
+
+# Export settings.
+
+# Rows which are fetched together from the server-side cursor of an export.
+EXPORT_CHUNK_SIZE = int(os.environ.get("THRUSH_EXPORT_CHUNK_SIZE", "2000"))
+
+# Query budget settings.
+
+QUERY_BUDGET_BASELINE = BASE_DIR / "tests" / "fixtures" / "query_budget.json"
+# Allowed wall-clock slow down (times of the baseline) before a route fails.
+QUERY_BUDGET_TIME_FACTOR = float(os.environ.get("THRUSH_QUERY_BUDGET_TIME_FACTOR", "3"))
+# Wall-clock durations under this value (seconds) are never reported.
+QUERY_BUDGET_TIME_FLOOR = float(os.environ.get("THRUSH_QUERY_BUDGET_TIME_FLOOR", "0.1"))
+# Rewrite the baseline file with the measured values instead of checking them.
+QUERY_BUDGET_UPDATE = os.environ.get("THRUSH_QUERY_BUDGET_UPDATE", "0") == "1"
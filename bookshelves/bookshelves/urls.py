@@ -10,6 +10,7 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from base.views import ResponseCacheStatsView
 from .views import health_check
 
 schema_view = get_schema_view(
@@ -60,6 +61,9 @@ urlpatterns = [
     # Health check.
     path("health-check/", health_check),
 
+    # Response cache hit/miss counters.
+    path("cache-stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
+
     # Swagger.
     # path(
         # "swagger/",
@@ -0,0 +1,64 @@
+"""Page navigation tree."""
+from base.cache import cached_document, serializer_models
+from base.query_plan import plan_for_serializer
+
+from .models import GroupMenu, Menu
+from .serializers import MenuSerializer, NavigationGroupMenuSerializer
+
+
+def _nest(nodes, parents, key):
+    """Nest nodes under their parents and return the roots.
+
+    Nodes whose parent isn't in "parents" (e.g. it's deleted) are roots.
+    """
+    roots = []
+    for node in nodes:
+        parent = parents.get(node[key])
+        (parent["children"] if parent is not None else roots).append(node)
+    return roots
+
+
+def build_navigation(request):
+    """Build the tree of all the group menus with their nested menus.
+
+    It costs a fixed number of queries: group menus, menus and the menus' links
+    (one query per link type).
+
+    Args:
+        request (Request): request which the links are built for.
+
+    Returns:
+        List[Dict]: root group menus; every group menu has "children" (its group
+            menus) and "menus" (its root menus), every menu has "children".
+    """
+    context = {"request": request}
+    groups = NavigationGroupMenuSerializer(
+        GroupMenu.objects.order_by("order", "id"), many=True, context=context
+    ).data
+    menus = MenuSerializer(
+        plan_for_serializer(MenuSerializer).apply(Menu.objects.order_by("order", "id")),
+        many=True,
+        context=context,
+    ).data
+
+    groups = {group["id"]: {**group, "children": [], "menus": []} for group in groups}
+    menus = {menu["id"]: {**menu, "children": []} for menu in menus}
+    for root in _nest(menus.values(), menus, "parent"):
+        group = groups.get(root["group_menu"])
+        if group is not None:
+            group["menus"].append(root)
+    return _nest(groups.values(), groups, "parent")
+
+
+def get_navigation(request):
+    """Get the navigation tree from the cache; it's rebuilt when a menu changes."""
+    dependencies = {
+        model._meta.label_lower
+        for model in serializer_models(MenuSerializer) | {GroupMenu}
+    }
+    return cached_document(
+        "navigation",
+        dependencies,
+        lambda: build_navigation(request),
+        variant=request.build_absolute_uri("/"),
+    )
@@ -20,7 +20,7 @@ class MenuSerializer(ContentTypeLinkModelSerializer):
 
     url = serializers.HyperlinkedIdentityField(view_name="page:menu-detail")
 
-    class Meta:
+    class Meta(ContentTypeLinkModelSerializer.Meta):
         model = Menu
         exclude = ("is_deleted",)
 
@@ -34,3 +34,13 @@ class GroupMenuSerializer(serializers.ModelSerializer):
     class Meta:
         model = GroupMenu
         exclude = ("is_deleted",)
+
+
+class NavigationGroupMenuSerializer(serializers.ModelSerializer):
+    """Group menu serializer of the navigation tree; menus are nested separately."""
+
+    url = serializers.HyperlinkedIdentityField(view_name="page:group_menu-detail")
+
+    class Meta:
+        model = GroupMenu
+        exclude = ("is_deleted",)
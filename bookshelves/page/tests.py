@@ -1,3 +1,117 @@
-from django.test import TestCase
+"""Page tests."""
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
 
-# Create your tests here.
+from base.models import Tag
+from .models import GroupMenu, Menu
+from .navigation import build_navigation, get_navigation
+from .serializers import GroupMenuSerializer, MenuSerializer
+
+
+class MenuLinkTest(TestCase):
+    """Test resolving menus' links."""
+
+    def setUp(self):
+        self.tags = [Tag.objects.create(name=f"tag{i}") for i in range(2)]
+        link_type = ContentType.objects.get_for_model(Tag)
+        self.groups = [GroupMenu.objects.create(name=f"group{i}") for i in range(2)]
+        links = [
+            (link_type, str(self.tags[0].pk)),
+            (link_type, str(self.tags[1].pk)),
+            (link_type, str(self.tags[0].pk)),
+            (link_type, "0"),
+            (link_type, "invalid"),
+            (None, "https://example.com/"),
+        ]
+        for i, (link_type, link) in enumerate(links):
+            Menu.objects.create(
+                label=f"menu{i}",
+                group_menu=self.groups[i % 2],
+                link_type=link_type,
+                link=link,
+                order=i,
+            )
+        self.context = {"request": APIRequestFactory().get("/")}
+
+    def test_list(self):
+        with self.assertNumQueries(2):
+            data = MenuSerializer(
+                Menu.objects.all(), many=True, context=self.context
+            ).data
+        self.assertEqual(
+            [menu["link_details"] for menu in data],
+            [
+                {"id": self.tags[0].pk, "name": "tag0"},
+                {"id": self.tags[1].pk, "name": "tag1"},
+                {"id": self.tags[0].pk, "name": "tag0"},
+                None,
+                None,
+                "https://example.com/",
+            ],
+        )
+
+    def test_nested_lists(self):
+        groups = GroupMenu.objects.prefetch_related("menu_set")
+        with self.assertNumQueries(3):
+            data = GroupMenuSerializer(groups, many=True, context=self.context).data
+        self.assertEqual(len(data[0]["menus"]) + len(data[1]["menus"]), 6)
+
+    def test_detail(self):
+        menu = Menu.objects.get(label="menu1")
+        with self.assertNumQueries(1):
+            data = MenuSerializer(menu, context=self.context).data
+        self.assertEqual(data["link_details"], {"id": self.tags[1].pk, "name": "tag1"})
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class NavigationTest(TestCase):
+    """Test the navigation tree."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create()
+        self.request = APIRequestFactory().get("/")
+
+    def _create(self):
+        tag = Tag.objects.create(name="tag")
+        link_type = ContentType.objects.get_for_model(Tag)
+        self.main = GroupMenu.objects.create(name="main", order=2)
+        self.sub = GroupMenu.objects.create(name="sub", parent=self.main, order=1)
+        self.footer = GroupMenu.objects.create(name="footer", order=1)
+        self.books = Menu.objects.create(
+            label="books", group_menu=self.main, link_type=link_type, link=str(tag.pk)
+        )
+        self.novels = Menu.objects.create(
+            label="novels", group_menu=self.main, parent=self.books, link="/novels/"
+        )
+        Menu.objects.create(label="about", group_menu=self.footer, link="/about/")
+
+    def test_tree(self):
+        with self.assertNumQueries(3):
+            tree = build_navigation(self.request)
+        self.assertEqual([group["name"] for group in tree], ["footer", "main"])
+        main = tree[1]
+        self.assertEqual([group["name"] for group in main["children"]], ["sub"])
+        self.assertEqual([menu["label"] for menu in main["menus"]], ["books"])
+        self.assertEqual(
+            main["menus"][0]["link_details"],
+            {"id": int(self.books.link), "name": "tag"},
+        )
+        self.assertEqual(
+            [menu["label"] for menu in main["menus"][0]["children"]], ["novels"]
+        )
+
+    def test_cached_until_a_menu_changes(self):
+        get_navigation(self.request)
+        with self.assertNumQueries(0):
+            get_navigation(self.request)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.novels.delete()
+        tree = get_navigation(self.request)
+        self.assertEqual(tree[1]["menus"][0]["children"], [])
@@ -1,13 +1,20 @@
 """Page views."""
+from base.cache import CachedResponseMixin
 from base.views import BaseViewSet
 from rest_framework import generics, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from .models import GroupMenu, Menu, Page
+from .navigation import get_navigation
 from .serializers import GroupMenuSerializer, MenuSerializer, PageSerializer
 
 
 class PageViewSet(
-    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
+    CachedResponseMixin,
+    BaseViewSet,
+    generics.ListCreateAPIView,
+    generics.RetrieveUpdateDestroyAPIView,
 ):
     """Page view set."""
 
@@ -17,7 +24,10 @@ class PageViewSet(
 
 
 class MenuViewSet(
-    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
+    CachedResponseMixin,
+    BaseViewSet,
+    generics.ListCreateAPIView,
+    generics.RetrieveUpdateDestroyAPIView,
 ):
     """Menu view set."""
 
@@ -28,7 +38,10 @@ class MenuViewSet(
 
 
 class GroupMenuViewSet(
-    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
+    CachedResponseMixin,
+    BaseViewSet,
+    generics.ListCreateAPIView,
+    generics.RetrieveUpdateDestroyAPIView,
 ):
     """Group menu view set."""
 
@@ -36,3 +49,8 @@ class GroupMenuViewSet(
     queryset = GroupMenu.objects.filter(is_deleted=False)
     serializer_class = GroupMenuSerializer
     filterset_fields = ("name",)
+
+    @action(detail=False)
+    def navigation(self, request):
+        """Get all the group menus with their nested menus trees."""
+        return Response(get_navigation(request))
@@ -26,7 +26,15 @@ class Cart(Base):
     # invoice_number = models.PositiveIntegerField(null=True)
 
     class Meta:
-        unique_together = (("user", "product"),)
+        # Soft deleted carts (e.g. checked out ones) don't block adding the product
+        # again; it also indexes the live carts of a user.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "product"],
+                name="cart_live_user_product_uniq",
+                condition=models.Q(is_deleted=False),
+            )
+        ]
 
     def __str__(self):
         if self.is_deleted:
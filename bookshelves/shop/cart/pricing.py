@@ -0,0 +1,88 @@
+"""Cart pricing.
+
+A cart is priced by one query: its items are joined with their products and the
+products' active price windows, so the line totals, the discounts and the grand
+total are read together whatever the number of items. The same pricing is used
+by the payment and the orders of a checkout.
+"""
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+from django.utils import timezone
+from shop.price.effective import EffectivePrice, price_annotations, price_from_row
+
+
+class CartLine(NamedTuple):
+    """Priced cart item."""
+
+    cart: int
+    product: int
+    quantity: int
+    price: EffectivePrice
+
+    @property
+    def subtotal(self) -> int:
+        """Total of the line before the discount."""
+        return self.quantity * self.price.price
+
+    @property
+    def total(self) -> int:
+        """Total of the line after the discount."""
+        return self.quantity * self.price.amount
+
+
+class CartPricing(NamedTuple):
+    """Priced cart."""
+
+    lines: List[CartLine]
+
+    @property
+    def subtotal(self) -> int:
+        """Total of the lines before the discounts."""
+        return sum(line.subtotal for line in self.lines)
+
+    @property
+    def total(self) -> int:
+        """Total of the lines after the discounts."""
+        return sum(line.total for line in self.lines)
+
+    @property
+    def discount(self) -> int:
+        """Total of the discounts."""
+        return self.subtotal - self.total
+
+    def by_cart(self) -> Dict[int, CartLine]:
+        """Map the cart items' ids to their lines."""
+        return {line.cart: line for line in self.lines}
+
+    def as_dict(self) -> Dict[str, int]:
+        """Totals of the cart as a response body."""
+        return {
+            "subtotal": self.subtotal,
+            "discount": self.discount,
+            "total": self.total,
+        }
+
+
+def price_cart(carts, at: datetime = None) -> CartPricing:
+    """Price cart items in one query.
+
+    Args:
+        carts (QuerySet): cart items.
+        at (datetime): time of the prices; the current time by default.
+    """
+    at = at or timezone.now()
+    annotations = price_annotations(at, product="product")
+    rows = (
+        carts.order_by("pk")
+        .annotate(**annotations)
+        .values("pk", "product_id", "quantity", *annotations)
+    )
+    return CartPricing(
+        [
+            CartLine(
+                row["pk"], row["product_id"], row["quantity"], price_from_row(row, at)
+            )
+            for row in rows
+        ]
+    )
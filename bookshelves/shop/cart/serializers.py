@@ -1,7 +1,9 @@
 """Cart serializers."""
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 from rest_polymorphic.serializers import PolymorphicSerializer
 from .models import Cart
+from .pricing import price_cart
 from shop.product.models import Product, AudioBook, PaperBook
 from shop.product.serializers import ProductSerializer, PaperBookSerializer, AudioBookSerializer
 
@@ -125,7 +127,9 @@ class CartSerializer(serializers.ModelSerializer):
     # products = ProductGeneralInfoSerializer(many=True, read_only=True)
     # products = ProductPolymorphicSerializer(many=True, read_only=True, source="cart:cart-detail")
     # products = ProductPolymorphicSerializer(many=True, read_only=True, source="cart_product")
-    products = ProductPolymorphicSerializer(many=True, read_only=True)
+    products = ProductPolymorphicSerializer(source="product", read_only=True)
+    unit_price = serializers.SerializerMethodField()
+    total_price = serializers.SerializerMethodField()
 
     class Meta:
         model = Cart
@@ -137,6 +141,8 @@ class CartSerializer(serializers.ModelSerializer):
             # "delivery_address",
             # "content",
             "quantity",
+            "unit_price",
+            "total_price",
             "products",
             # "price",
             # "final_price",
@@ -144,7 +150,29 @@ class CartSerializer(serializers.ModelSerializer):
         )
         # read_only_fields = ("invoice_number",)
         ref_name = "cart"
-
+        # The model's unique constraint is partial, so it's validated here.
+        validators = [
+            UniqueTogetherValidator(queryset=Cart.objects.all(), fields=("user", "product"))
+        ]
+
+    def _line(self, obj):
+        """Get the priced line of a cart item.
+
+        Lists share the pricing of their view ("cart_lines"); other items are
+        priced one by one.
+        """
+        lines = self.context.setdefault("cart_lines", {})
+        if obj.pk not in lines:
+            lines.update(price_cart(Cart.objects.filter(pk=obj.pk)).by_cart())
+        return lines[obj.pk]
+
+    def get_unit_price(self, obj):
+        """Get the item's effective unit price."""
+        return self._line(obj).price.amount
+
+    def get_total_price(self, obj):
+        """Get the item's total price after the discount."""
+        return self._line(obj).total
 
     # def get_total_price(self, obj):
     #     """Get post's star average."""
@@ -0,0 +1,123 @@
+"""Cart tests."""
+from datetime import timedelta
+from unittest import mock
+
+from account.models import Address, User
+from base.models import Category
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+from shop.payment.models import Order, Payment
+from shop.payment.views import PaymentViewSet
+from shop.price.models import Price
+from shop.product.models import PaperBook, Publisher
+
+from .models import Cart
+from .pricing import price_cart
+from .views import CartViewSet
+
+
+class CartPricingTest(TestCase):
+    """Test the cart pricing and the checkout totals."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(
+            username="buyer", mobile="1", is_superuser=True, is_active=True
+        )
+        seller = User.objects.create(username="seller", mobile="2")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            books = [
+                PaperBook.objects.create(
+                    name=f"book {index}",
+                    description="description",
+                    seller=seller,
+                    category=category,
+                    product_code=str(index),
+                    image="https://example.com/book.png",
+                    inventory=10,
+                    buy_price=10,
+                    sel_price=100,
+                    discount=10 * index,
+                    start=now - timedelta(days=1),
+                    extra={},
+                    intro="https://example.com/intro.mp3",
+                    book_publisher=publisher,
+                    published_year=2000,
+                )
+                for index in range(3)
+            ]
+        Price.objects.create(product=books[2], inventory=5, price=60, start=now)
+        for quantity, book in enumerate(books, start=1):
+            Cart.objects.create(user=self.user, product=book, quantity=quantity)
+
+    def test_price_cart(self):
+        with self.assertNumQueries(1):
+            pricing = price_cart(Cart.objects.filter(user=self.user))
+        self.assertEqual([line.total for line in pricing.lines], [100, 180, 180])
+        self.assertEqual(
+            pricing.as_dict(), {"subtotal": 480, "discount": 20, "total": 460}
+        )
+
+    def test_list(self):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=self.user)
+        response = CartViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(response.data["total"], 460)
+        self.assertEqual(
+            [
+                (item["unit_price"], item["total_price"])
+                for item in response.data["results"]
+            ],
+            [(100, 100), (90, 180), (60, 180)],
+        )
+
+    def test_superuser_list(self):
+        other = User.objects.create(username="other", mobile="3")
+        other_item = Cart.objects.create(
+            user=other, product=Cart.objects.first().product, quantity=5
+        )
+        request = APIRequestFactory().get("/", {"page": 2})
+        force_authenticate(request, user=self.user)
+        with mock.patch.object(PageNumberPagination, "page_size", 2):
+            response = CartViewSet.as_view({"get": "list"})(request)
+        # The totals are the superuser's own cart; the page has the other's item.
+        self.assertEqual(response.data["total"], 460)
+        self.assertEqual(
+            [
+                (item["unit_price"], item["total_price"])
+                for item in response.data["results"]
+            ],
+            [(60, 180), (100, 500)],
+        )
+        lines = response.renderer_context["view"].cart_lines
+        self.assertEqual(set(lines), {Cart.objects.order_by("pk")[2].pk, other_item.pk})
+
+    def test_checkout(self):
+        Address.objects.create(
+            user=self.user,
+            country="country",
+            city="city",
+            state="state",
+            post_code="1",
+            address="address",
+            house_number="1",
+            floor="1",
+            unit="1",
+        )
+        request = APIRequestFactory().post(
+            "/",
+            {"payment_type": "card", "status": "success", "bank_id": 1},
+            format="json",
+        )
+        force_authenticate(request, user=self.user)
+        response = PaymentViewSet.as_view({"post": "create"})(request)
+        self.assertEqual(response.data["total_payment"], 460)
+        self.assertEqual(Payment.objects.get().total_payment, 460)
+        self.assertEqual(sum(Order.objects.values_list("total_price", flat=True)), 460)
@@ -1,14 +1,61 @@
 """Cart views."""
-import account.models
 from .serializers import CartSerializer
 from .models import Cart
+from .pricing import price_cart
 # from shop.product.models import Product
 # from shop.cart.serializers import CartPolymorphicSerializer
 from base.views import BaseViewSet
 from rest_framework import permissions, generics
 
 
+class CartPricingMixin:
+    """Add the totals of the requesting user's cart items to the list responses.
+
+    The user's items are priced together by one query, and the lines of the listed
+    page are shared with the serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """DRF built-in method."""
+        queryset = self.filter_queryset(self.get_queryset())
+        self.pricing = price_cart(self.pricing_queryset(queryset))
+        self.cart_lines = self.pricing.by_cart()
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response.data, dict):
+            response.data.update(self.pricing.as_dict())
+        return response
+
+    def pricing_queryset(self, queryset):
+        """Get the cart items which are added up by the totals.
+
+        Superusers list every user's items; only their own ones are their cart.
+        """
+        return queryset.filter(user=self.request.user)
+
+    def paginate_queryset(self, queryset):
+        """DRF built-in method.
+
+        Price the page's items of the other users together too.
+        """
+        page = super().paginate_queryset(queryset)
+        lines = getattr(self, "cart_lines", None)
+        if page is not None and lines is not None:
+            missing = [item.pk for item in page if item.pk not in lines]
+            if missing:
+                lines.update(price_cart(queryset.filter(pk__in=missing)).by_cart())
+            self.cart_lines = {item.pk: lines[item.pk] for item in page}
+        return page
+
+    def get_serializer_context(self):
+        """DRF built-in method."""
+        context = super().get_serializer_context()
+        if getattr(self, "cart_lines", None) is not None:
+            context["cart_lines"] = self.cart_lines
+        return context
+
+
 class UserCartViewSet(
+    CartPricingMixin,
     BaseViewSet,
     # generics.ListCreateAPIView,
     # generics.RetrieveUpdateAPIView,
@@ -45,17 +92,25 @@ class UserCartViewSet(
         """Combine the above two parts"""
         user = self.request.user.id
 
-        if account.models.User.is_superuser:
+        if self.request.user.is_superuser:
             user_id = self.kwargs['user_pk']
-            return Cart.objects.filter(user=user_id)
+            return self.plan_queryset(Cart.objects.filter(user=user_id))
         else:
-            return Cart.objects.filter(user=user)
+            return self.plan_queryset(Cart.objects.filter(user=user))
+
+    def pricing_queryset(self, queryset):
+        """Get the cart items which are added up by the totals.
+
+        The listed items are a single user's cart.
+        """
+        return queryset
 
     # def list(self, request, *args, **kwargs):
     #     return print()
 
 
 class CartViewSet(
+    CartPricingMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveUpdateAPIView,
@@ -76,10 +131,10 @@ class CartViewSet(
         """
         user = self.request.user
 
-        if account.models.User.is_superuser:
-            return Cart.objects.all()
+        if user.is_superuser:
+            return self.plan_queryset(Cart.objects.all())
         else:
-            return Cart.objects.filter(user=user)
+            return self.plan_queryset(Cart.objects.filter(user=user))
 
     # def put(self, request, *args, **kwargs):
     # def perform_update(self, serializer):
@@ -0,0 +1,86 @@
+"""Checkout.
+
+A checkout turns a user's cart into a payment and its orders as one atomic unit:
+the cart is priced once, its stock is reserved for the payment, the orders are
+bulk created and the checked out items are soft deleted by one UPDATE. Checkouts
+of the same user wait for each other on a lock of the user's row, so a cart is
+never checked out twice; checkouts of other users don't wait.
+"""
+from typing import List, NamedTuple
+
+from account.models import Address, User
+from base.cache import invalidate_on_commit
+from django.db import transaction
+from shop.cart.models import Cart
+from shop.cart.pricing import CartPricing, price_cart
+
+from .models import Order, Payment
+from .reservations import InsufficientStock, reserve
+
+
+class CheckoutError(Exception):
+    """The cart can't be checked out."""
+
+
+class Checkout(NamedTuple):
+    """Checked out cart."""
+
+    payment: Payment
+    orders: List[Order]
+    pricing: CartPricing
+
+
+def checkout(user, payment_type="", bank_id=None) -> Checkout:
+    """Check out a user's cart.
+
+    The payment is pending; its reservations are committed or released when its
+    status is updated.
+
+    Args:
+        user (User): owner of the cart.
+        payment_type (str): type of the payment.
+        bank_id (int): id of the bank.
+
+    Raises:
+        CheckoutError: the cart is empty, the user has no delivery address or a
+            product is out of stock; nothing is written.
+    """
+    with transaction.atomic():
+        # Concurrent checkouts of the user read the cart after this one commits.
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list("pk"))
+        pricing = price_cart(Cart.objects.filter(user=user))
+        if not pricing.lines:
+            raise CheckoutError("Cart had not any products.")
+        address = Address.objects.filter(user=user).first()
+        if address is None:
+            raise CheckoutError("Delivery address not found.")
+
+        payment = Payment.objects.create(
+            user=user,
+            total_payment=pricing.total,
+            payment_type=payment_type or "",
+            status="",
+            bank_id=bank_id or None,
+        )
+        try:
+            reserve(user, pricing.lines, payment)
+        except InsufficientStock as error:
+            raise CheckoutError(str(error))
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    user=user,
+                    delivery_address=address,
+                    product_id=line.product,
+                    quantity=line.quantity,
+                    total_price=line.total,
+                    invoice_number=payment.pk,
+                )
+                for line in pricing.lines
+            ]
+        )
+        # Only the priced items are checked out; it's a single soft delete UPDATE.
+        Cart.objects.filter(pk__in=[line.cart for line in pricing.lines]).delete()
+        # Bulk writes don't send signals.
+        invalidate_on_commit(Order)
+    return Checkout(payment, orders, pricing)
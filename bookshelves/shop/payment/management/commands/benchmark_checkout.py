@@ -0,0 +1,99 @@
+"""Measure the checkout throughput."""
+import time
+
+from account.models import Address, User
+from base.models import Category
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from shop.cart.models import Cart
+from shop.payment.checkout import checkout
+from shop.product.models import Product
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Check out generated carts and report the throughput; the generated rows are "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--carts",
+            type=int,
+            default=100,
+            help="Number of carts which are checked out.",
+        )
+        parser.add_argument(
+            "--items", type=int, default=10, help="Number of items of every cart."
+        )
+
+    def _seed(self, carts, items):
+        """Create the users, their addresses and carts of the benchmark.
+
+        Rows are bulk created, so no signals (e.g. the verification codes) are sent.
+        """
+        names = [f"benchmark-{index}" for index in range(carts)]
+        User.objects.bulk_create(
+            [
+                User(username=name, mobile=f"bench{index:08d}")
+                for index, name in enumerate(names)
+            ]
+        )
+        users = list(User.objects.filter(username__in=names).order_by("pk"))
+        Address.objects.bulk_create(
+            [
+                Address(
+                    user=user,
+                    country="benchmark",
+                    city="benchmark",
+                    state="benchmark",
+                    post_code="0",
+                    address="benchmark",
+                    house_number="0",
+                    floor="0",
+                    unit="0",
+                )
+                for user in users
+            ]
+        )
+        category = Category.objects.create(name="benchmark")
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"benchmark {index}",
+                    description="benchmark",
+                    seller=users[0],
+                    category=category,
+                    product_code=f"benchmark-{index}",
+                    image="https://example.com/benchmark.png",
+                    inventory=carts,
+                    buy_price=1,
+                    sel_price=100,
+                    extra={},
+                )
+                for index in range(items)
+            ]
+        )
+        products = list(Product.objects.filter(category=category))
+        Cart.objects.bulk_create(
+            [Cart(user=user, product=product) for user in users for product in products]
+        )
+        return users
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            users = self._seed(kwargs["carts"], kwargs["items"])
+            started = time.monotonic()
+            orders = 0
+            for user in users:
+                orders += len(checkout(user, payment_type="benchmark").orders)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"Checking out ({len(users)} carts, {orders} orders, {elapsed:.2f}s, "
+            f"{len(users) / elapsed:.0f} checkouts/s, {orders / elapsed:.0f} orders/s)... "
+            f"{self.style.SUCCESS('OK')}"
+        )
+        self.stdout.write("Finished")
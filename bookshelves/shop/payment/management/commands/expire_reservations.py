@@ -0,0 +1,16 @@
+"""Release the expired stock reservations."""
+from django.core.management.base import BaseCommand
+from shop.payment.reservations import expire_reservations
+
+
+class Command(BaseCommand):
+
+    help = "Release the expired stock reservations; it's meant to be run periodically."
+
+    def handle(self, *args, **kwargs):
+        released = expire_reservations()
+        self.stdout.write(
+            f"Releasing expired reservations ({released} released)... "
+            f"{self.style.SUCCESS('OK')}"
+        )
+        self.stdout.write("Finished")
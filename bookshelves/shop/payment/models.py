@@ -1,10 +1,13 @@
 """Payment models."""
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 from django.core.validators import MinValueValidator
 from polymorphic.models import PolymorphicModel
 from account.models import User
-from base.models import Base
+from base.models import AbstractBase, Base
 from account.models import Address
+from shop.price.models import Price
 from shop.product.models import Product
 
 
@@ -23,6 +26,22 @@ class Order(Base):
     total_price = models.PositiveIntegerField()
     invoice_number = models.PositiveIntegerField(null=True)
 
+    class Meta(Base.Meta):
+        # Used by the keyset pagination and the users' own lists; only the live
+        # rows are indexed.
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="order_live_created_id_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=["user", "created_at"],
+                name="order_live_user_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
+
     # def __str__(self):
     #     if self.is_deleted:
     #         return f"{self.name} [deleted]"
@@ -41,9 +60,77 @@ class Payment(Base):
     total_payment = models.PositiveIntegerField()
     bank_id = models.PositiveIntegerField(null=True)
     batch_number = models.CharField(max_length=45, null=True)
+
+    class Meta(Base.Meta):
+        # Used by the keyset pagination and the users' own lists; only the live
+        # rows are indexed.
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="payment_live_created_id_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=["user", "created_at"],
+                name="payment_live_user_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
+
     # invoice_number = models.PositiveIntegerField(null=True)
 
     # def __str__(self):
     #     if self.is_deleted:
     #         return f"{self.name} [deleted]"
     #     return self.name
+
+
+class Reservation(AbstractBase):
+    """Stock of a product which is held for a payment.
+
+    The stock is taken from the product (and its price window) when it's held;
+    it's given back when the reservation is released, e.g. when it expires or the
+    payment fails, and kept when the payment succeeds.
+    """
+
+    HELD = "held"
+    COMMITTED = "committed"
+    RELEASED = "released"
+
+    user = models.ForeignKey(User, related_name="reservations", on_delete=models.CASCADE)
+    payment = models.ForeignKey(
+        Payment, related_name="reservations", null=True, on_delete=models.CASCADE
+    )
+    product = models.ForeignKey(Product, related_name="reservations", on_delete=models.CASCADE)
+    window = models.ForeignKey(
+        Price, related_name="reservations", null=True, on_delete=models.SET_NULL
+    )
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(
+        max_length=10,
+        default=HELD,
+        choices=((HELD, HELD), (COMMITTED, COMMITTED), (RELEASED, RELEASED)),
+    )
+    expires_at = models.DateTimeField()
+
+    class Meta(AbstractBase.Meta):
+        # Used by the expiry; only the held reservations are indexed.
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="reservation_held_expires_idx",
+                condition=models.Q(status="held"),
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity} [{self.status}]"
+
+
+@receiver(signals.post_save, sender=Payment)
+def payment_reservations_settled(sender, instance, created, **kwargs):
+    """Commit or release the reservations of a payment by its status."""
+    from .reservations import settle_reservations
+
+    if not created:
+        settle_reservations(instance)
@@ -0,0 +1,242 @@
+"""Stock reservations.
+
+Stock is reserved by conditional UPDATEs: the inventories of all the reserved
+products (and of their price windows) are decreased by one statement which only
+matches the rows that have enough stock, so concurrent reservations never
+oversell and only the reserved rows are locked, until the transaction ends.
+Rows are always written in primary key order, so concurrent reservations of
+the same products don't deadlock.
+
+Held reservations expire after "settings.RESERVATION_TIMEOUT" seconds; expired
+ones are released when their stock is needed, or by the "expire_reservations"
+command. A payment which succeeds after its reservations are released takes
+their stock again, by the same conditional UPDATE, or it's refused.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from base.cache import invalidate_on_commit
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from shop.price.models import Price
+from shop.product.models import CatalogEntry, Product
+
+from .models import Reservation
+
+
+# Payment statuses which commit the reservations of the payment.
+SUCCEEDED_STATUSES = {"success"}
+# Payment statuses which release the reservations of the payment.
+FAILED_STATUSES = {"fail", "cancel"}
+
+
+class InsufficientStock(Exception):
+    """A product hasn't enough stock.
+
+    Args:
+        products (List[int]): primary keys of the products which are short.
+    """
+
+    def __init__(self, products):
+        """Initialize the error of the short products."""
+        self.products = products
+        super().__init__(
+            f"Insufficient stock of products: {', '.join(map(str, products))}."
+        )
+
+
+def _quantity(quantities: Dict[int, int]) -> Case:
+    """Expression of the quantities of rows by primary key."""
+    return Case(
+        *(When(pk=pk, then=Value(value)) for pk, value in sorted(quantities.items())),
+        output_field=models.IntegerField(),
+    )
+
+
+def _add(queryset, quantities: Dict[int, int], sign: int = 1):
+    """Add (or subtract, by a -1 "sign") quantities to the "inventory" of rows."""
+    if quantities:
+        queryset.filter(pk__in=sorted(quantities)).update(
+            inventory=F("inventory") + sign * _quantity(quantities)
+        )
+
+
+def _subtract(queryset, quantities: Dict[int, int]) -> List[int]:
+    """Subtract quantities from the "inventory" of rows by one UPDATE.
+
+    Rows whose inventory is less than their quantity aren't updated.
+
+    Returns:
+        List[int]: primary keys of the short (or missing) rows when any row isn't
+            updated; the updated rows should be rolled back then.
+    """
+    if not quantities:
+        return []
+    queryset = queryset.filter(pk__in=sorted(quantities))
+    quantity = _quantity(quantities)
+    if queryset.filter(inventory__gte=quantity).update(
+        inventory=F("inventory") - quantity
+    ) == len(quantities):
+        return []
+    short = queryset.filter(inventory__lt=quantity).values_list("pk", flat=True)
+    return sorted(short) or sorted(quantities)
+
+
+def _take(products: Dict[int, int], windows: Dict[int, int]):
+    """Take the stock of products and their windows, all or nothing.
+
+    Raises:
+        InsufficientStock: nothing is taken.
+    """
+    with transaction.atomic():
+        short = _subtract(Product._base_manager, products)
+        if not short:
+            short = sorted(
+                set(
+                    Price._base_manager.filter(
+                        pk__in=_subtract(Price._base_manager, windows)
+                    ).values_list("product_id", flat=True)
+                )
+            )
+        if short:
+            raise InsufficientStock(short)
+        # Entries mirror the products' inventories, so they have the stock too.
+        _add(CatalogEntry.objects, products, -1)
+    invalidate_on_commit(Product)
+    invalidate_on_commit(Price)
+
+
+def _give_back(products: Dict[int, int], windows: Dict[int, int]):
+    """Give back the stock of products and their windows."""
+    _add(Product._base_manager, products)
+    _add(Price._base_manager, windows)
+    _add(CatalogEntry.objects, products)
+    invalidate_on_commit(Product)
+    invalidate_on_commit(Price)
+
+
+def reserve(user, lines: Iterable, payment=None) -> List[Reservation]:
+    """Reserve the stock of priced cart lines.
+
+    Expired reservations of the products are released once if their stock is
+    short.
+
+    Args:
+        user (User): owner of the reservations.
+        lines (Iterable[CartLine]): lines of a cart pricing.
+        payment (Payment): payment which the reservations are held for.
+
+    Raises:
+        InsufficientStock: nothing is reserved.
+    """
+    lines = sorted(lines, key=lambda line: line.product)
+    products, windows = defaultdict(int), defaultdict(int)
+    for line in lines:
+        products[line.product] += line.quantity
+        if line.price.window is not None:
+            windows[line.price.window] += line.quantity
+
+    try:
+        _take(products, windows)
+    except InsufficientStock as error:
+        if not expire_reservations(error.products):
+            raise
+        _take(products, windows)
+
+    expires_at = timezone.now() + timedelta(seconds=settings.RESERVATION_TIMEOUT)
+    return Reservation.objects.bulk_create(
+        [
+            Reservation(
+                user=user,
+                payment=payment,
+                product_id=line.product,
+                window_id=line.price.window,
+                quantity=line.quantity,
+                expires_at=expires_at,
+            )
+            for line in lines
+        ]
+    )
+
+
+def _quantities(rows):
+    """Sum the quantities of reservation rows by product and by window."""
+    products, windows = defaultdict(int), defaultdict(int)
+    for product, window, quantity in rows:
+        products[product] += quantity
+        if window is not None:
+            windows[window] += quantity
+    return products, windows
+
+
+def commit_reservations(queryset) -> int:
+    """Keep the stock of the reservations of a queryset.
+
+    Held reservations keep their stock, even the expired ones; released ones
+    (e.g. expired) take their stock again.
+
+    Raises:
+        InsufficientStock: the stock of a released reservation is gone; nothing is
+            committed.
+    """
+    with transaction.atomic():
+        # Locked, so concurrent releases don't give the committed stock back.
+        rows = list(
+            queryset.exclude(status=Reservation.COMMITTED)
+            .select_for_update()
+            .values_list("pk", "status", "product_id", "window_id", "quantity")
+        )
+        if not rows:
+            return 0
+        released = [row[2:] for row in rows if row[1] == Reservation.RELEASED]
+        if released:
+            _take(*_quantities(released))
+        Reservation.objects.filter(pk__in=[row[0] for row in rows]).update(
+            status=Reservation.COMMITTED, modified_at=timezone.now()
+        )
+    return len(rows)
+
+
+def release_reservations(queryset) -> int:
+    """Give back the stock of the held reservations of a queryset."""
+    with transaction.atomic():
+        # Locked, so concurrent releases don't give the stock back twice.
+        rows = list(
+            queryset.filter(status=Reservation.HELD)
+            .select_for_update()
+            .values_list("pk", "product_id", "window_id", "quantity")
+        )
+        if not rows:
+            return 0
+        Reservation.objects.filter(pk__in=[row[0] for row in rows]).update(
+            status=Reservation.RELEASED, modified_at=timezone.now()
+        )
+        _give_back(*_quantities(row[1:] for row in rows))
+    return len(rows)
+
+
+def expire_reservations(products: Iterable[int] = None) -> int:
+    """Release the expired held reservations, optionally of some products."""
+    queryset = Reservation.objects.filter(
+        status=Reservation.HELD, expires_at__lte=timezone.now()
+    )
+    if products is not None:
+        queryset = queryset.filter(product__in=list(products))
+    return release_reservations(queryset)
+
+
+def settle_reservations(payment) -> int:
+    """Commit or release the reservations of a payment by its status.
+
+    Raises:
+        InsufficientStock: the payment succeeded, but the stock of its released
+            reservations is gone.
+    """
+    if payment.status in SUCCEEDED_STATUSES:
+        return commit_reservations(payment.reservations.all())
+    if payment.status in FAILED_STATUSES:
+        return release_reservations(payment.reservations.all())
+    return 0
@@ -35,7 +35,7 @@ class PaymentSerializer(serializers.ModelSerializer):
 class OrderSerializer(serializers.ModelSerializer):
     """Order serializer."""
 
-    url = serializers.HyperlinkedIdentityField(view_name="payment:payment-detail")
+    url = serializers.HyperlinkedIdentityField(view_name="payment:order-detail")
 
     class Meta:
         model = Order
@@ -0,0 +1,199 @@
+"""Payment tests."""
+from io import StringIO
+from unittest import mock
+
+from account.models import Address, User
+from base.models import Category
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from shop.cart.models import Cart
+from shop.price.models import Price
+from shop.product.models import Product
+
+from .checkout import CheckoutError, checkout
+from .models import Order, Payment, Reservation
+from .reservations import expire_reservations
+from .views import PaymentViewSet
+
+
+class CheckoutTest(TestCase):
+    """Test the checkout."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(username="buyer", mobile="1")
+        category = Category.objects.create(name="books")
+        self.products = [
+            Product.objects.create(
+                name=f"product {index}",
+                description="description",
+                seller=self.user,
+                category=category,
+                product_code=str(index),
+                image="https://example.com/product.png",
+                inventory=10,
+                buy_price=10,
+                sel_price=100,
+                extra={},
+            )
+            for index in range(10)
+        ]
+        Address.objects.create(
+            user=self.user,
+            country="country",
+            city="city",
+            state="state",
+            post_code="1",
+            address="address",
+            house_number="1",
+            floor="1",
+            unit="1",
+        )
+
+    def _fill_cart(self, items):
+        Cart.objects.bulk_create(
+            [Cart(user=self.user, product=product) for product in self.products[:items]]
+        )
+
+    def test_checkout(self):
+        self._fill_cart(2)
+        result = checkout(self.user, payment_type="card")
+        self.assertEqual(result.payment.total_payment, 200)
+        self.assertEqual(
+            list(Order.objects.values_list("invoice_number", "total_price")),
+            [(result.payment.pk, 100)] * 2,
+        )
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+        # The cart is checked out once.
+        with self.assertRaises(CheckoutError):
+            checkout(self.user)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_queries(self):
+        self._fill_cart(2)
+        with self.assertNumQueries(13):
+            checkout(self.user)
+        self._fill_cart(10)
+        with self.assertNumQueries(13):
+            checkout(self.user)
+
+    def test_atomic(self):
+        self._fill_cart(2)
+        with mock.patch.object(Order.objects, "bulk_create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                checkout(self.user)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 2)
+
+    def test_reservations(self):
+        self._fill_cart(2)
+        Price.objects.create(
+            product=self.products[1], inventory=5, price=50, start=None
+        )
+        payment = checkout(self.user).payment
+        self.assertEqual(
+            list(
+                Product.objects.order_by("pk").values_list("inventory", flat=True)[:3]
+            ),
+            [9, 9, 10],
+        )
+        self.assertEqual(Price.objects.get().inventory, 4)
+        self.assertEqual(
+            set(payment.reservations.values_list("status", flat=True)), {"held"}
+        )
+
+        payment.status = "fail"
+        payment.save()
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 10)
+        self.assertEqual(Price.objects.get().inventory, 5)
+        self.assertEqual(
+            set(payment.reservations.values_list("status", flat=True)), {"released"}
+        )
+
+    def test_committed_reservations(self):
+        self._fill_cart(1)
+        payment = checkout(self.user).payment
+        self.assertEqual(payment.reservations.get().status, "held")
+        payment.status = "success"
+        payment.save()
+        self.assertEqual(payment.reservations.get().status, "committed")
+        payment.status = "cancel"
+        payment.save()
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 9)
+
+    def test_success_after_release(self):
+        self._fill_cart(1)
+        Price.objects.create(
+            product=self.products[0], inventory=5, price=50, start=None
+        )
+        payment = checkout(self.user).payment
+        payment.reservations.update(expires_at=timezone.now())
+        expire_reservations()
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 10)
+
+        # The released stock is taken again.
+        payment.status = "success"
+        payment.save()
+        self.assertEqual(payment.reservations.get().status, "committed")
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 9)
+        self.assertEqual(Price.objects.get().inventory, 4)
+
+    def test_success_without_stock(self):
+        self._fill_cart(1)
+        payment = checkout(self.user).payment
+        payment.reservations.update(expires_at=timezone.now())
+        expire_reservations()
+        Product.objects.filter(pk=self.products[0].pk).update(inventory=0)
+
+        # Payments are updated by their users with the permission.
+        User.objects.filter(pk=self.user.pk).update(is_active=True, is_superuser=True)
+        request = APIRequestFactory().patch("/", {"status": "success"}, format="json")
+        force_authenticate(request, user=User.objects.get(pk=self.user.pk))
+        response = PaymentViewSet.as_view({"patch": "partial_update"})(
+            request, pk=payment.pk
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Payment.objects.get().status, "")
+        self.assertEqual(payment.reservations.get().status, "released")
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 0)
+
+    def test_insufficient_stock(self):
+        Cart.objects.create(user=self.user, product=self.products[0], quantity=11)
+        with self.assertRaisesMessage(CheckoutError, "Insufficient stock"):
+            checkout(self.user)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 10)
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_expired_reservations(self):
+        Product.objects.filter(pk=self.products[0].pk).update(inventory=0)
+        Reservation.objects.create(
+            user=self.user,
+            product=self.products[0],
+            quantity=1,
+            expires_at=timezone.now(),
+        )
+        self._fill_cart(1)
+        # The expired reservation's stock is given back, then reserved again.
+        checkout(self.user)
+        self.assertEqual(
+            list(Reservation.objects.order_by("pk").values_list("status", flat=True)),
+            ["released", "held"],
+        )
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 0)
+
+        Reservation.objects.filter(status="held").update(expires_at=timezone.now())
+        out = StringIO()
+        call_command("expire_reservations", stdout=out)
+        self.assertIn("1 released", out.getvalue())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).inventory, 1)
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command("benchmark_checkout", carts=2, items=2, stdout=out)
+        self.assertIn("2 carts, 4 orders", out.getvalue())
+        self.assertFalse(Payment.objects.exists())
@@ -5,7 +5,7 @@ from rest_framework import routers
 from .views import OrderViewSet, PaymentViewSet
 
 router = routers.DefaultRouter()
-# router.register("orders", OrderViewSet, basename="order")
+router.register("orders", OrderViewSet, basename="order")
 router.register("payments", PaymentViewSet, basename="payment")
 
 urlpatterns = [
@@ -0,0 +1,150 @@
+"""Effective prices.
+
+The effective price of a product is read from its active price window: the live
+"Price" row whose "start" and "end" contain the time (the latest started one wins).
+Products without an active window fall back to their own "sel_price", with their
+"discount" while its "start" and "end" contain the time. Windows are half-open;
+they end at "end".
+
+Prices of any number of products are resolved by one query, and the ones of the
+current time are cached until their next window boundary, when they may change.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+from shop.product.models import Product
+
+from .models import Price
+
+
+class EffectivePrice(NamedTuple):
+    """Price of a product at a time."""
+
+    price: int
+    discount: int
+    # The next window boundary after which it may change; None if there's none.
+    valid_until: Optional[datetime]
+    # Id of the price window it's read from; None for the product's own price.
+    window: Optional[int] = None
+
+    @property
+    def amount(self) -> int:
+        """Price after the discount."""
+        return max(self.price - self.discount, 0)
+
+
+def _key(pk) -> str:
+    return ":".join((settings.PRICE_CACHE_PREFIX, str(pk)))
+
+
+def _is_active(start, end, at) -> bool:
+    return (start is None or start <= at) and (end is None or end > at)
+
+
+def price_annotations(at: datetime, product: str = "") -> Dict:
+    """Annotations which read the price fields of a product at a time.
+
+    They're subqueries of the product's price windows, so any number of rows are
+    priced by the one query they're added to; "price_from_row" reads them.
+
+    Args:
+        at (datetime): time of the prices.
+        product (str): lookup of the rows' product; the rows are products by default.
+    """
+    prefix = f"{product}__" if product else ""
+    windows = Price.objects.filter(product=OuterRef(product or "pk"))
+    active = windows.filter(
+        Q(start__isnull=True) | Q(start__lte=at), Q(end__isnull=True) | Q(end__gt=at)
+    ).order_by(F("start").desc(nulls_last=True), "-pk")
+    return {
+        "base_price": F(f"{prefix}sel_price"),
+        "base_discount": F(f"{prefix}discount"),
+        "base_start": F(f"{prefix}start"),
+        "base_end": F(f"{prefix}end"),
+        "window": Subquery(active.values("pk")[:1]),
+        "window_price": Subquery(active.values("price")[:1]),
+        "window_discount": Subquery(active.values("discount")[:1]),
+        "window_end": Subquery(active.values("end")[:1]),
+        "next_start": Subquery(
+            windows.filter(start__gt=at).order_by("start").values("start")[:1],
+            output_field=models.DateTimeField(),
+        ),
+    }
+
+
+def price_from_row(row: Dict, at: datetime) -> EffectivePrice:
+    """Get the effective price of a row which has the "price_annotations"."""
+    if row["window"] is not None:
+        price, discount = row["window_price"], row["window_discount"]
+        boundaries = (row["window_end"], row["next_start"])
+    else:
+        price, discount = row["base_price"], row["base_discount"]
+        if not _is_active(row["base_start"], row["base_end"], at):
+            discount = 0
+        boundaries = (row["base_start"], row["base_end"], row["next_start"])
+    valid_until = min(
+        (value for value in boundaries if value and value > at), default=None
+    )
+    return EffectivePrice(price, discount, valid_until, row["window"])
+
+
+def _resolve(pks, at) -> Dict[int, EffectivePrice]:
+    """Resolve the prices of products at a time in one query."""
+    annotations = price_annotations(at)
+    rows = (
+        Product._base_manager.filter(pk__in=pks)
+        .annotate(**annotations)
+        .values("pk", *annotations)
+    )
+    return {row["pk"]: price_from_row(row, at) for row in rows}
+
+
+def effective_prices(
+    pks: Iterable[int], at: datetime = None
+) -> Dict[int, EffectivePrice]:
+    """Get the effective prices of products.
+
+    Args:
+        pks (Iterable[int]): primary keys of the products.
+        at (datetime): time of the prices; the current prices (which are cached)
+            by default.
+
+    Returns:
+        Dict[int, EffectivePrice]: prices by primary key; missing products are
+            skipped.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return {}
+    if at is not None:
+        return _resolve(pks, at)
+
+    now = timezone.now()
+    keys = {_key(pk): pk for pk in pks}
+    prices = {
+        keys[key]: price
+        for key, price in cache.get_many(keys).items()
+        if price.valid_until is None or price.valid_until > now
+    }
+    missing = pks - prices.keys()
+    resolved = _resolve(missing, now) if missing else {}
+    for pk, price in resolved.items():
+        timeout = settings.PRICE_CACHE_TIMEOUT
+        if price.valid_until is not None:
+            timeout = max(
+                min(timeout, int((price.valid_until - now).total_seconds())), 1
+            )
+        cache.set(_key(pk), price, timeout)
+    return {**prices, **resolved}
+
+
+def forget_prices_on_commit(pks: Iterable[int]):
+    """Drop the cached prices of products on commit."""
+    keys = [_key(pk) for pk in pks or () if pk is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
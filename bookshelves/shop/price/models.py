@@ -2,8 +2,11 @@
 from datetime import datetime
 
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 from base.models import Base
 from shop.product.models import Product
+from shop.product.models.catalog import catalog_refreshed
 
 
 class Price(Base):
@@ -16,8 +19,34 @@ class Price(Base):
     start = models.DateTimeField(default=datetime.utcnow, blank=True, null=True)
     end = models.DateTimeField(blank=True, null=True)
 
+    class Meta(Base.Meta):
+        # Used by the effective prices; only the live windows are indexed.
+        indexes = [
+            models.Index(
+                fields=["product", "start"],
+                name="price_live_product_start_idx",
+                condition=models.Q(is_deleted=False),
+            )
+        ]
+
     def __str__(self):
         if self.is_deleted:
             return f"{self.product.name} ({self.inventory}:{self.price}/{self.discount}) [deleted]"
         return f"{self.product.name} ({self.inventory}:{self.price}/{self.discount})"
 
+
+@receiver(signals.post_save, sender=Price)
+@receiver(signals.post_delete, sender=Price)
+def effective_price_window_changed(sender, instance, **kwargs):
+    """Drop the cached effective price of a window's product."""
+    from .effective import forget_prices_on_commit
+
+    forget_prices_on_commit([instance.product_id])
+
+
+@receiver(catalog_refreshed)
+def effective_price_product_changed(sender, pks, **kwargs):
+    """Drop the cached effective prices of the changed products."""
+    from .effective import forget_prices_on_commit
+
+    forget_prices_on_commit(pks)
@@ -1,9 +1,39 @@
 """Price serializers."""
 from rest_framework import serializers
 
+from .effective import effective_prices
 from .models import Price
 
 
+class EffectivePriceField(serializers.ReadOnlyField):
+    """Effective price (after the discount) of a row's product.
+
+    Prices of all the rows of a list are resolved together, on the first row.
+
+    Args:
+        product_field (str): attribute of the rows which holds the product's id.
+    """
+
+    def __init__(self, product_field="pk", **kwargs):
+        """DRF built-in method."""
+        self.product_field = product_field
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        """DRF built-in method."""
+        pk = getattr(instance, self.product_field)
+        prices = self.context.setdefault("effective_prices", {})
+        if pk not in prices:
+            rows = [instance]
+            if isinstance(self.parent.parent, serializers.ListSerializer):
+                rows = self.parent.parent.instance
+            prices.update(
+                effective_prices({pk, *(getattr(row, self.product_field) for row in rows)})
+            )
+        return prices[pk].amount if pk in prices else None
+
+
 class PriceSerializer(serializers.ModelSerializer):
     """Price serializer."""
 
@@ -1,3 +1,104 @@
+"""Price tests."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from account.models import User
+from base.models import Category
+from shop.product.models import PaperBook, Publisher
+
+from .effective import effective_prices
+from .models import Price
+
+
+class EffectivePriceTest(TestCase):
+    """Test the effective prices."""
+
+    def setUp(self):
+        cache.clear()
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        seller = User.objects.create(username="seller", mobile="1")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        self.now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books = [
+                self._book(seller, category, publisher, index) for index in range(3)
+            ]
+
+    def _book(self, seller, category, publisher, index):
+        return PaperBook.objects.create(
+            name=f"book {index}",
+            description="description",
+            seller=seller,
+            category=category,
+            product_code=str(index),
+            image="https://example.com/book.png",
+            inventory=1,
+            buy_price=10,
+            sel_price=100,
+            discount=10,
+            start=self.now - timedelta(days=1),
+            end=self.now + timedelta(days=1),
+            extra={},
+            intro="https://example.com/intro.mp3",
+            book_publisher=publisher,
+            published_year=2000,
+        )
+
+    def _window(self, book, price, start, end=None, discount=0):
+        return Price.objects.create(
+            product=book,
+            inventory=1,
+            price=price,
+            discount=discount,
+            start=self.now + timedelta(hours=start),
+            end=end if end is None else self.now + timedelta(hours=end),
+        )
+
+    def test_windows(self):
+        self._window(self.books[0], 80, -2)
+        self._window(self.books[0], 70, -1, 1, discount=5)
+        self._window(self.books[0], 60, 2)
+        self._window(self.books[1], 50, -3, -2)
+        with self.assertNumQueries(1):
+            prices = effective_prices([book.pk for book in self.books], at=self.now)
+
+        # The latest started active window wins, until it ends.
+        self.assertEqual(prices[self.books[0].pk].amount, 65)
+        self.assertEqual(
+            prices[self.books[0].pk].valid_until, self.now + timedelta(hours=1)
+        )
+        later = effective_prices([self.books[0].pk], at=self.now + timedelta(hours=1))
+        self.assertEqual(later[self.books[0].pk].amount, 80)
+        # Products without an active window have their own discount in its window.
+        self.assertEqual(prices[self.books[1].pk].amount, 90)
+        self.assertEqual(
+            prices[self.books[1].pk].valid_until, self.now + timedelta(days=1)
+        )
+        expired = effective_prices([self.books[2].pk], at=self.now + timedelta(days=2))
+        self.assertEqual(expired[self.books[2].pk].amount, 100)
+
+    def test_cache(self):
+        pks = [book.pk for book in self.books]
+        self.assertEqual(effective_prices(pks)[pks[0]].amount, 90)
+        with self.assertNumQueries(0):
+            effective_prices(pks)
+        with self.captureOnCommitCallbacks(execute=True):
+            window = self._window(self.books[0], 50, -1)
+        with self.assertNumQueries(1):
+            self.assertEqual(effective_prices(pks)[pks[0]].amount, 50)
+        with self.captureOnCommitCallbacks(execute=True):
+            window.delete()
+        self.assertEqual(effective_prices(pks)[pks[0]].amount, 90)
 
-# Create your tests here.
+        # The prices are dropped by the catalog refresh, which runs on commit too.
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.books[1].sel_price = 200
+                self.books[1].save()
+        self.assertEqual(effective_prices(pks)[pks[1]].amount, 190)
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models import signals
 
 
 class ProductConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "shop.product"
+
+    def ready(self):
+        from .search import create_index
+
+        signals.post_migrate.connect(create_index, sender=self)
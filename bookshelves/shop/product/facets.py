@@ -0,0 +1,144 @@
+"""Product facets.
+
+Facet counts are computed over the filtered products with one grouped aggregate
+query per relation, plus a single query for the published year buckets and the
+price ranges together, whatever the number of facet values.
+"""
+from base.filters import CategoryDescendantsFilter
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django_filters import rest_framework as filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+class FacetFilterSet(filters.FilterSet):
+    """Filters of the facets which aren't matched by a model field as is."""
+
+    descendants = CategoryDescendantsFilter()
+    min_year = filters.NumberFilter(field_name="published_year", lookup_expr="gte")
+    max_year = filters.NumberFilter(field_name="published_year", lookup_expr="lte")
+    min_price = filters.NumberFilter(field_name="sel_price", lookup_expr="gte")
+    max_price = filters.NumberFilter(field_name="sel_price", lookup_expr="lt")
+
+
+def _relation_counts(queryset, name):
+    """Count the products per related object of a relation in one grouped query."""
+    field = queryset.model._meta.get_field(name)
+    related_model = field.related_model
+    pks = queryset.order_by().values("pk")
+    if field.many_to_many:
+        rows = field.remote_field.through.objects.filter(
+            **{f"{field.m2m_field_name()}__in": pks}
+        )
+        name = field.m2m_reverse_field_name()
+    else:
+        rows = queryset.model._base_manager.filter(pk__in=pks)
+    if any(field.name == "is_deleted" for field in related_model._meta.fields):
+        rows = rows.filter(**{f"{name}__is_deleted": False})
+    rows = (
+        rows.values(name, f"{name}__name")
+        .annotate(count=Count("pk"))
+        .order_by("-count", f"{name}__name")
+    )
+    return [
+        {"id": row[name], "name": row[f"{name}__name"], "count": row["count"]}
+        for row in rows
+    ]
+
+
+def _range_counts(queryset):
+    """Count the products per published year bucket and price range in one query."""
+    size = settings.FACET_YEAR_BUCKET_SIZE
+    bounds = (0, *settings.FACET_PRICE_RANGES, None)
+    ranges = list(zip(bounds, bounds[1:]))
+    rows = (
+        queryset.model._base_manager.filter(pk__in=queryset.order_by().values("pk"))
+        .annotate(bucket=F("published_year") / size * size)
+        .values("bucket")
+        .annotate(
+            count=Count("pk"),
+            **{
+                f"price_{index}": Count(
+                    "pk",
+                    filter=Q(
+                        sel_price__gte=low, **({"sel_price__lt": high} if high else {})
+                    ),
+                )
+                for index, (low, high) in enumerate(ranges)
+            },
+        )
+        .order_by("bucket")
+    )
+
+    years, prices = [], [0] * len(ranges)
+    for row in rows:
+        years.append(
+            {
+                "min": row["bucket"],
+                "max": row["bucket"] + size - 1,
+                "count": row["count"],
+            }
+        )
+        for index in range(len(ranges)):
+            prices[index] += row[f"price_{index}"]
+    return years, [
+        {"min": low, "max": high, "count": count}
+        for (low, high), count in zip(ranges, prices)
+        if count
+    ]
+
+
+def facet_counts(queryset, fields):
+    """Count the products of a queryset per facet value.
+
+    Args:
+        queryset (QuerySet): filtered products; they should have "published_year".
+        fields (Dict[str, str]): facet names mapped to the relations they count.
+
+    Returns:
+        Dict[str, List[Dict]]: values of every facet with their "count"; relations
+            have "id" and "name", "published_year" and "price" have "min" and "max"
+            (price ranges exclude their "max"; it's null for the last one).
+    """
+    facets = {facet: _relation_counts(queryset, name) for facet, name in fields.items()}
+    facets["published_year"], facets["price"] = _range_counts(queryset)
+    return facets
+
+
+class FacetsMixin:
+    """Add the "facets" action: the filtered products with their facet counts.
+
+    Facet values are counted over the same filtered products which are listed.
+    """
+
+    # Facet names mapped to the relations they count.
+    facet_fields = {}
+
+    def get_cache_dependencies(self):
+        """Add the models whose names are listed in the facets."""
+        model = self.get_queryset().model
+        return super().get_cache_dependencies() | {
+            model._meta.get_field(name).related_model._meta.label_lower
+            for name in self.facet_fields.values()
+        }
+
+    @action(detail=False)
+    def facets(self, request, *args, **kwargs):
+        """List the filtered products along with their facet counts."""
+        return self.cached_response(self._facets, request, *args, **kwargs)
+
+    def _facets(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        facets = facet_counts(queryset, self.facet_fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        else:
+            response = Response(
+                {"results": self.get_serializer(queryset, many=True).data}
+            )
+        response.data["facets"] = facets
+        return response
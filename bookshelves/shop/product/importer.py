@@ -0,0 +1,325 @@
+"""Bulk catalog import.
+
+Products are read from CSV or JSON lines one row at a time and written in
+batches. Related objects are resolved by name through an in-memory cache, and
+products and their many to many rows are written by bulk queries. A batch costs
+a fixed number of queries, and memory doesn't grow with the size of the file.
+Products are matched by "product_code", so the existing ones are updated.
+"""
+import json
+from collections import defaultdict
+
+from base.cache import invalidate_on_commit
+from base.export import CSV_LIST_SEPARATOR
+from base.models import BaseEngagementCounters, Category, Tag
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections, models, router, transaction
+
+from .models import (
+    AudioType,
+    Author,
+    CatalogEntry,
+    CompatibleDevice,
+    Product,
+    Publisher,
+    Speaker,
+    Translator,
+)
+
+
+# Related models which are referenced by name in the rows.
+NAMED_MODELS = (
+    Author,
+    Translator,
+    Speaker,
+    Publisher,
+    Tag,
+    Category,
+    AudioType,
+    CompatibleDevice,
+)
+# Named models whose missing names are created; the others should exist.
+CREATABLE_MODELS = (Author, Translator, Speaker, Publisher, Tag, Category, AudioType)
+# Fields which are never read from the rows.
+EXCLUDED_FIELDS = {"seller", "bookmarks", "polymorphic_ctype", "is_deleted"} | {
+    field.name for field in BaseEngagementCounters._meta.fields
+}
+
+
+def _names(value):
+    if isinstance(value, str):
+        value = value.split(CSV_LIST_SEPARATOR)
+    return [str(name).strip() for name in value or () if name and str(name).strip()]
+
+
+def _value(field, value):
+    """Convert a cell to the value of a field."""
+    if value == "" and not isinstance(field, (models.CharField, models.TextField)):
+        return None
+    if isinstance(field, models.JSONField) and isinstance(value, str):
+        return json.loads(value)
+    return field.to_python(value)
+
+
+class CatalogImporter:
+    """Import products in batches.
+
+    Args:
+        seller (User): seller of the created products.
+        product_type (str): model name of the rows which have no "product_type".
+        batch_size (int): number of rows which are written together.
+    """
+
+    def __init__(self, seller, product_type=None, batch_size=500):
+        """Initialize an importer of no rows yet."""
+        self.seller = seller
+        self.product_type = product_type
+        self.batch_size = batch_size
+        self.models = {
+            model._meta.model_name: model for model in Product.__subclasses__()
+        }
+        # Ids of the related objects by name, per model.
+        self.ids = defaultdict(dict)
+        self.created = 0
+        self.updated = 0
+
+    def import_rows(self, rows):
+        """Import rows and yield the number of the imported rows after every batch.
+
+        Raises:
+            ValueError: a row is invalid; the batches before it are imported.
+        """
+        imported = 0
+        batch = []
+        for number, row in enumerate(rows, start=1):
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                imported += len(batch)
+                batch = []
+                yield imported
+        if batch:
+            self.write(batch)
+            yield imported + len(batch)
+
+    def _model(self, number, row):
+        product_type = row.get("product_type") or self.product_type
+        if product_type not in self.models:
+            raise ValueError(f"Row {number}: unknown product type '{product_type}'.")
+        return self.models[product_type]
+
+    def _field(self, number, model, name):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or field.name in EXCLUDED_FIELDS or field.primary_key:
+            raise ValueError(f"Row {number}: unknown field '{name}'.")
+        if not (field.concrete and field.editable):
+            raise ValueError(f"Row {number}: unknown field '{name}'.")
+        return field
+
+    def _resolve(self, model, names):
+        """Cache the ids of the names of a model; missing names are created."""
+        ids = self.ids[model]
+        missing = set(names) - ids.keys()
+        if not missing:
+            return
+        queryset = model._base_manager.filter(name__in=missing)
+        if model is Category:
+            # Names aren't unique in the category tree; the oldest live one is used.
+            queryset = queryset.filter(is_deleted=False).order_by("-pk")
+        ids.update(queryset.values_list("name", "pk"))
+
+        missing -= ids.keys()
+        if missing and model not in CREATABLE_MODELS:
+            raise ValueError(
+                f"Unknown {model._meta.verbose_name} names: {', '.join(sorted(missing))}."
+            )
+        if model is Category:
+            # Categories are created one by one; their paths are built on save.
+            for name in missing:
+                ids[name] = Category.objects.create(name=name).pk
+        elif missing:
+            model._base_manager.bulk_create(
+                [model(name=name) for name in missing], ignore_conflicts=True
+            )
+            ids.update(
+                model._base_manager.filter(name__in=missing).values_list("name", "pk")
+            )
+            invalidate_on_commit(model)
+
+    def _parse(self, number, model, row):
+        """Split a row into field values and many to many ids."""
+        values, relations = {}, {}
+        for name, value in row.items():
+            if name == "product_type":
+                continue
+            field = self._field(number, model, name)
+            try:
+                if field.many_to_many:
+                    ids = self.ids[field.related_model]
+                    relations[field] = [ids[name] for name in _names(value)]
+                elif field.many_to_one and field.related_model in NAMED_MODELS:
+                    related = _names([value])
+                    values[field.attname] = (
+                        self.ids[field.related_model][related[0]] if related else None
+                    )
+                else:
+                    values[field.attname] = _value(field, value)
+            except (ValidationError, ValueError) as error:
+                raise ValueError(f"Row {number}: invalid '{name}' ({error}).")
+        if not values.get("product_code"):
+            raise ValueError(f"Row {number}: 'product_code' is required.")
+        return values, relations
+
+    def write(self, batch):
+        """Write a batch of numbered rows in a transaction."""
+        rows = []
+        names = defaultdict(set)
+        for number, row in batch:
+            model = self._model(number, row)
+            rows.append((number, model, row))
+            for name, value in row.items():
+                if name == "product_type":
+                    continue
+                field = self._field(number, model, name)
+                if field.related_model in NAMED_MODELS:
+                    names[field.related_model].update(
+                        _names(value) if field.many_to_many else _names([value])
+                    )
+
+        with transaction.atomic():
+            for model, model_names in names.items():
+                self._resolve(model, model_names)
+
+            # The last row of a product code wins.
+            products = defaultdict(dict)
+            for number, model, row in rows:
+                values, relations = self._parse(number, model, row)
+                products[model][values["product_code"]] = (number, values, relations)
+            existing = {
+                code: (pk, content_type_id)
+                for code, pk, content_type_id in Product._base_manager.filter(
+                    product_code__in=[
+                        code for items in products.values() for code in items
+                    ]
+                ).values_list("product_code", "pk", "polymorphic_ctype_id")
+            }
+
+            pks = set()
+            for model, items in products.items():
+                pks.update(self._write_products(model, items, existing))
+            CatalogEntry.refresh(pks)
+
+    def _write_products(self, model, items, existing):
+        """Write the products of a type and their many to many rows.
+
+        Returns:
+            List[int]: primary keys of the written products.
+        """
+        content_type = ContentType.objects.get_for_model(
+            model, for_concrete_model=False
+        )
+        created, updated = [], defaultdict(list)
+        relations = {}
+        for code, (number, values, product_relations) in items.items():
+            if code in existing:
+                pk, content_type_id = existing[code]
+                if content_type_id != content_type.pk:
+                    raise ValueError(
+                        f"Row {number}: '{code}' is another type of product."
+                    )
+                product = model(pk=pk, is_deleted=False, **values)
+                # Products which are updated by the same columns are written together.
+                updated[frozenset(values)].append(product)
+            else:
+                values.setdefault("extra", {})
+                product = model(
+                    seller=self.seller, polymorphic_ctype=content_type, **values
+                )
+                created.append(product)
+            relations[code] = (product, product_relations)
+
+        for names, products in updated.items():
+            model._base_manager.bulk_update(
+                products, [*names, "is_deleted"], batch_size=self.batch_size
+            )
+        self._create(model, created)
+        self._write_relations(
+            {product.pk for product in created},
+            relations.values(),
+            updated=bool(updated),
+        )
+
+        self.created += len(created)
+        self.updated += sum(map(len, updated.values()))
+        invalidate_on_commit(model)
+        return [product.pk for product, _ in relations.values()]
+
+    def _create(self, model, products):
+        """Create products of a multi-table inherited model.
+
+        Django doesn't bulk create those models, so the parents' rows are bulk
+        created first, then the rows of the model's own table are inserted.
+        """
+        if not products:
+            return
+        parents = [
+            Product(
+                **{
+                    field.attname: getattr(product, field.attname)
+                    for field in Product._meta.concrete_fields
+                    if not field.primary_key
+                }
+            )
+            for product in products
+        ]
+        Product._base_manager.bulk_create(parents, batch_size=self.batch_size)
+        if any(parent.pk is None for parent in parents):
+            # The database doesn't return the primary keys of bulk inserts.
+            pks = dict(
+                Product._base_manager.filter(
+                    product_code__in=[parent.product_code for parent in parents]
+                ).values_list("product_code", "pk")
+            )
+            for parent in parents:
+                parent.pk = pks[parent.product_code]
+        for product, parent in zip(products, parents):
+            product.pk = product.id = parent.pk
+            product.created_at, product.modified_at = (
+                parent.created_at,
+                parent.modified_at,
+            )
+
+        using = router.db_for_write(model)
+        fields = model._meta.local_concrete_fields
+        size = connections[using].ops.bulk_batch_size(fields, products) or len(products)
+        for start in range(0, len(products), size):
+            end = start + size
+            model._base_manager._insert(products[start:end], fields=fields, using=using)
+
+    def _write_relations(self, created, relations, updated):
+        """Replace the many to many rows of the written products."""
+        rows = defaultdict(list)
+        for product, product_relations in relations:
+            for field, ids in product_relations.items():
+                rows[field].append((product.pk, ids))
+
+        for field, field_rows in rows.items():
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            if updated:
+                replaced = [pk for pk, _ in field_rows if pk not in created]
+                through.objects.filter(**{f"{source}__in": replaced}).delete()
+            through.objects.bulk_create(
+                [
+                    through(**{source: pk, target: related_pk})
+                    for pk, ids in field_rows
+                    for related_pk in dict.fromkeys(ids)
+                ],
+                batch_size=self.batch_size,
+                ignore_conflicts=True,
+            )
@@ -0,0 +1,73 @@
+"""Import products from a CSV or JSON lines file."""
+import sys
+import time
+from pathlib import Path
+
+from account.models import User
+from base.imports import read_rows
+from django.core.management.base import BaseCommand, CommandError
+from shop.product.importer import CatalogImporter
+from shop.product.models import Product
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Import products from a CSV or JSON lines file; existing products are updated "
+        "by their product code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help='Path of the file; "-" reads the standard input.'
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Format of the file; it's taken from the file extension by default.",
+        )
+        parser.add_argument(
+            "--type",
+            dest="product_type",
+            choices=[model._meta.model_name for model in Product.__subclasses__()],
+            help='Product type of the rows which have no "product_type" column.',
+        )
+        parser.add_argument("--seller", required=True, help="Username of the seller.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows which are written together.",
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            seller = User.objects.get(username=kwargs["seller"])
+        except User.DoesNotExist:
+            raise CommandError(f"Seller '{kwargs['seller']}' doesn't exist.")
+        path = kwargs["path"]
+        file_format = kwargs["format"] or Path(path).suffix.lstrip(".").lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("The format of the file should be given by --format.")
+
+        importer = CatalogImporter(seller, kwargs["product_type"], kwargs["batch_size"])
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        started = time.monotonic()
+        imported = 0
+        try:
+            for imported in importer.import_rows(read_rows(stream, file_format)):
+                if kwargs["verbosity"] > 1:
+                    rate = imported / max(time.monotonic() - started, 1e-6)
+                    self.stdout.write(f"{imported} rows ({rate:.0f} rows/s)")
+        except ValueError as error:
+            raise CommandError(f"{error} {imported} rows are imported.")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        rate = imported / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Importing catalog ({imported} rows, {importer.created} created, "
+            f"{importer.updated} updated, {rate:.0f} rows/s)... {self.style.SUCCESS('OK')}"
+        )
+        self.stdout.write("Finished")
@@ -0,0 +1,37 @@
+"""Rebuild the catalog read model."""
+from django.core.management.base import BaseCommand
+from shop.product.models import CatalogEntry, Product
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild the catalog entries of all products from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of products which are rebuilt together.",
+        )
+
+    def handle(self, *args, **kwargs):
+        # The entries of the soft deleted products are dropped.
+        pks = (
+            Product.all_objects.non_polymorphic()
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        rebuilt = 0
+        last_pk = None
+        while True:
+            batch = pks.filter(pk__gt=last_pk) if last_pk is not None else pks
+            batch = list(batch[: kwargs["batch_size"]])
+            if not batch:
+                break
+            rebuilt += CatalogEntry.refresh(batch)
+            last_pk = batch[-1]
+        self.stdout.write(
+            f"Rebuilding catalog entries ({rebuilt} rows)... {self.style.SUCCESS('OK')}"
+        )
+        self.stdout.write("Finished")
@@ -5,6 +5,7 @@ from .audio_book import (
     AudioType,
     CompatibleDevice,
 )
+from .catalog import CatalogEntry
 from .paper_book import PaperBook
 # from .product import Category, Product, Tag
 from .product import (
@@ -19,6 +20,7 @@ __all__ = (
     # "Tag",
     # "Category",
     "Product",
+    "CatalogEntry",
     "Publisher",
     "AudioType",
     "AudioBook",
@@ -1,9 +1,11 @@
 """Audio book product models."""
 from base.models import Base
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 # from django.conf import settings
 from account.models import User
-from base.models import BaseComment, BaseStar, Tag
+from base.models import BaseComment, BaseEngagementCounters, BaseStar, Tag
 
 from .product import (
     Translator,
@@ -85,14 +87,14 @@ class AudioType(models.Model):
         return self.name
 
 
-class AudioBook(Product):
+class AudioBook(Product, BaseEngagementCounters):
     """Audio book product model."""
 
     intro = models.URLField()
     # description = models.CharField(max_length=255)
-    authors = models.ManyToManyField(Author)
-    speakers = models.ManyToManyField(Speaker)
-    translators = models.ManyToManyField(Translator)
+    authors = models.ManyToManyField(Author, through="AudioBookAuthor")
+    speakers = models.ManyToManyField(Speaker, through="AudioBookSpeaker")
+    translators = models.ManyToManyField(Translator, through="AudioBookTranslator")
     # authors = models.ManyToManyField(Author, related_name="audio_book_author")
     # speakers = models.ManyToManyField(Speaker, related_name="audio_book_speaker")
     # translators = models.ManyToManyField(Translator, related_name="audio_book_translator")
@@ -108,9 +110,95 @@ class AudioBook(Product):
     indices = models.ForeignKey(AudioIndex, on_delete=models.DO_NOTHING)
     published_year = models.PositiveSmallIntegerField()
     audio_type = models.ForeignKey(AudioType, on_delete=models.DO_NOTHING)
-    compatible_devices = models.ManyToManyField(CompatibleDevice)
+    compatible_devices = models.ManyToManyField(
+        CompatibleDevice, through="AudioBookCompatibleDevice"
+    )
     is_downloadable = models.BooleanField(default=False)
-    tags = models.ManyToManyField(Tag)
+    tags = models.ManyToManyField(Tag, through="AudioBookTag")
+
+    comments_related_name = "audio_book_comments"
+    stars_related_name = "audio_book_stars"
+
+    class Meta:
+        # The soft deleted products are read by the related rows, like "Product".
+        base_manager_name = "all_objects"
+
+
+# Through tables of the books' many to many relations. The unique index covers
+# the relations of a book and the other one covers the books of a related object
+# (e.g. the nested listings), so both sides are read from an index alone.
+class AudioBookAuthor(models.Model):
+    """Author of an audio book."""
+
+    audiobook = models.ForeignKey(AudioBook, db_index=False, on_delete=models.CASCADE)
+    author = models.ForeignKey(Author, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_audiobook_authors"
+        unique_together = [("audiobook", "author")]
+        indexes = [
+            models.Index(fields=["author", "audiobook"], name="audiobook_authors_rev_idx"),
+        ]
+
+
+class AudioBookSpeaker(models.Model):
+    """Speaker of an audio book."""
+
+    audiobook = models.ForeignKey(AudioBook, db_index=False, on_delete=models.CASCADE)
+    speaker = models.ForeignKey(Speaker, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_audiobook_speakers"
+        unique_together = [("audiobook", "speaker")]
+        indexes = [
+            models.Index(fields=["speaker", "audiobook"], name="audiobook_speakers_rev_idx"),
+        ]
+
+
+class AudioBookTranslator(models.Model):
+    """Translator of an audio book."""
+
+    audiobook = models.ForeignKey(AudioBook, db_index=False, on_delete=models.CASCADE)
+    translator = models.ForeignKey(Translator, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_audiobook_translators"
+        unique_together = [("audiobook", "translator")]
+        indexes = [
+            models.Index(fields=["translator", "audiobook"], name="audiobook_translators_rev_idx"),
+        ]
+
+
+class AudioBookCompatibleDevice(models.Model):
+    """Compatible device of an audio book."""
+
+    audiobook = models.ForeignKey(AudioBook, db_index=False, on_delete=models.CASCADE)
+    compatibledevice = models.ForeignKey(
+        CompatibleDevice, db_index=False, on_delete=models.CASCADE
+    )
+
+    class Meta:
+        db_table = "product_audiobook_compatible_devices"
+        unique_together = [("audiobook", "compatibledevice")]
+        indexes = [
+            models.Index(
+                fields=["compatibledevice", "audiobook"], name="audiobook_devices_rev_idx"
+            ),
+        ]
+
+
+class AudioBookTag(models.Model):
+    """Tag of an audio book."""
+
+    audiobook = models.ForeignKey(AudioBook, db_index=False, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_audiobook_tags"
+        unique_together = [("audiobook", "tag")]
+        indexes = [
+            models.Index(fields=["tag", "audiobook"], name="audiobook_tags_rev_idx"),
+        ]
 
 
 class AudioBookComment(BaseComment):
@@ -154,3 +242,17 @@ class AudioBookStar(BaseStar):
 
     def __str__(self):
         return f"{self.post.title}[{self.star}]"
+
+
+@receiver(signals.post_save, sender=AudioBookComment)
+@receiver(signals.post_delete, sender=AudioBookComment)
+def audio_book_comments_counter(instance, **_):
+    """Refresh the audio book's counters when a comment changes."""
+    AudioBook.refresh_counters([instance.Product_id])
+
+
+@receiver(signals.post_save, sender=AudioBookStar)
+@receiver(signals.post_delete, sender=AudioBookStar)
+def audio_book_stars_counter(instance, **_):
+    """Refresh the audio book's counters when a star changes."""
+    AudioBook.refresh_counters([instance.product_id])
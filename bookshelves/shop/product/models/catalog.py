@@ -0,0 +1,329 @@
+"""Catalog read model."""
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from base.cache import invalidate_on_commit
+from base.models import Category
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When, signals
+from django.db.models.functions import Greatest
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .product import Product
+
+
+_pending = threading.local()
+
+# Sent with "pks" and "entries" after the entries of products are rebuilt.
+catalog_refreshed = Signal()
+
+
+class CatalogEntryQuerySet(models.QuerySet):
+    """Catalog entry queryset."""
+
+    def with_effective_price(self, at=None):
+        """Annotate the price after the discount at a time.
+
+        It's read from the product's active price window, like the
+        "shop.price.effective" prices, so the rows are filtered and exported by the
+        price they're served with.
+        """
+        from shop.price.effective import price_annotations
+
+        at = at or timezone.now()
+        base_active = (Q(base_start__isnull=True) | Q(base_start__lte=at)) & (
+            Q(base_end__isnull=True) | Q(base_end__gt=at)
+        )
+        return self.alias(**price_annotations(at, product="product")).annotate(
+            effective_price=Greatest(
+                Case(
+                    When(
+                        window__isnull=False,
+                        then=F("window_price") - F("window_discount"),
+                    ),
+                    When(base_active, then=F("base_price") - F("base_discount")),
+                    default=F("base_price"),
+                    output_field=models.IntegerField(),
+                ),
+                Value(0),
+            )
+        )
+
+
+class CatalogEntry(models.Model):
+    """Denormalized list-page fields of a live product (of any type).
+
+    An entry is rebuilt from the product and its relations whenever one of them
+    changes, so the catalog is listed from this table alone; names of the people
+    and the tags are stored as JSON lists.
+    """
+
+    # Catalog fields which are collected from the products' relations; relations
+    # which a product type doesn't have are skipped.
+    name_relations = {
+        "authors": ("authors",),
+        "translators": ("translators",),
+        "speakers": ("speakers",),
+        "publishers": ("book_publisher", "audio_publisher"),
+    }
+
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        related_name="catalog_entry",
+        on_delete=models.CASCADE,
+    )
+    product_type = models.CharField(max_length=100, db_index=True)
+    name = models.CharField(max_length=120)
+    description = models.TextField()
+    image = models.URLField()
+    product_code = models.CharField(max_length=255)
+    category = models.ForeignKey(
+        Category, related_name="+", db_constraint=False, on_delete=models.DO_NOTHING
+    )
+    category_name = models.CharField(max_length=75)
+    authors = models.JSONField(default=list)
+    translators = models.JSONField(default=list)
+    speakers = models.JSONField(default=list)
+    publishers = models.JSONField(default=list)
+    tags = models.JSONField(default=list)
+    published_year = models.PositiveSmallIntegerField(null=True)
+    inventory = models.PositiveIntegerField()
+    sel_price = models.PositiveIntegerField()
+    discount = models.PositiveSmallIntegerField(default=0)
+    discount_start = models.DateTimeField(null=True)
+    discount_end = models.DateTimeField(null=True)
+    is_approved = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+
+    objects = CatalogEntryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "product"], name="catalog_created_idx")
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def _relation_names(cls, model):
+        """Names of the catalog relations which a product model has."""
+        names = {"category", "tags"}.union(*cls.name_relations.values())
+        return [field.name for field in model._meta.get_fields() if field.name in names]
+
+    @classmethod
+    def _fetch(cls, model, pks):
+        """Fetch products of a type with the relations of their entries."""
+        select_related, prefetch_related = [], []
+        for name in cls._relation_names(model):
+            field = model._meta.get_field(name)
+            (prefetch_related if field.many_to_many else select_related).append(name)
+        return (
+            model.objects.non_polymorphic()
+            .filter(pk__in=pks)
+            .select_related(*select_related)
+            .prefetch_related(*prefetch_related)
+        )
+
+    @classmethod
+    def from_product(cls, product):
+        """Build the entry of a product which is fetched by "_fetch"."""
+        names = {}
+        for key, relations in cls.name_relations.items():
+            values = []
+            for name in relations:
+                if not hasattr(product, name):
+                    continue
+                related = getattr(product, name)
+                if isinstance(related, models.Manager):
+                    values += [item.name for item in related.all()]
+                elif related is not None:
+                    values.append(related.name)
+            names[key] = list(dict.fromkeys(values))
+
+        tags = product.tags.all() if hasattr(product, "tags") else ()
+        return cls(
+            product_id=product.pk,
+            product_type=product._meta.model_name,
+            name=product.name,
+            description=product.description,
+            image=product.image,
+            product_code=product.product_code,
+            category_id=product.category_id,
+            category_name=product.category.name,
+            tags=[{"id": tag.id, "name": tag.name} for tag in tags],
+            published_year=getattr(product, "published_year", None),
+            inventory=product.inventory,
+            sel_price=product.sel_price,
+            discount=product.discount,
+            discount_start=product.start,
+            discount_end=product.end,
+            is_approved=product.is_approved,
+            created_at=product.created_at,
+            **names,
+        )
+
+    @classmethod
+    def refresh(cls, pks):
+        """Rebuild the entries of products from the source tables.
+
+        Entries of the soft deleted (or removed) products are deleted. It costs a
+        fixed number of queries per product type, whatever the number of products.
+
+        Args:
+            pks (Iterable[int]): primary keys of the products.
+
+        Returns:
+            int: number of the written entries.
+        """
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return 0
+
+        types = defaultdict(list)
+        products = Product.objects.non_polymorphic().filter(
+            pk__in=pks, is_deleted=False
+        )
+        for pk, content_type_id in products.values_list("pk", "polymorphic_ctype_id"):
+            types[content_type_id].append(pk)
+        entries = []
+        for content_type_id, type_pks in types.items():
+            model = Product
+            if content_type_id is not None:
+                model = ContentType.objects.get_for_id(content_type_id).model_class()
+            entries += [
+                cls.from_product(product) for product in cls._fetch(model, type_pks)
+            ]
+
+        existing = set(cls.objects.filter(pk__in=pks).values_list("pk", flat=True))
+        live = {entry.pk for entry in entries}
+        if existing - live:
+            cls.objects.filter(pk__in=existing - live).delete()
+        cls.objects.bulk_create(
+            [entry for entry in entries if entry.pk not in existing]
+        )
+        cls.objects.bulk_update(
+            [entry for entry in entries if entry.pk in existing],
+            [
+                field.name
+                for field in cls._meta.concrete_fields
+                if not field.primary_key
+            ],
+            batch_size=500,
+        )
+        # Bulk writes don't send signals.
+        catalog_refreshed.send(sender=cls, pks=pks, entries=entries)
+        invalidate_on_commit(cls)
+        return len(entries)
+
+    @classmethod
+    def refresh_on_commit(cls, pks):
+        """Rebuild the entries of products on commit.
+
+        Products changed in the same transaction are rebuilt together.
+        """
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            cls.refresh(pks)
+            return
+
+        scheduled = getattr(_pending, "scheduled", None)
+        # The callbacks are dropped on rollback; it's scheduled again in that case.
+        if scheduled is not None and any(
+            item[1] is scheduled[0] for item in connection.run_on_commit
+        ):
+            scheduled[1].update(pks)
+            return
+
+        def callback():
+            if getattr(_pending, "scheduled", None) is scheduled:
+                del _pending.scheduled
+            cls.refresh(scheduled[1])
+
+        scheduled = _pending.scheduled = (callback, set(pks))
+        transaction.on_commit(callback)
+
+    @classmethod
+    def related_product_pks(cls, instance):
+        """Get the primary keys of the products whose entries read an instance."""
+        pks = set()
+        for model in (Product, *Product.__subclasses__()):
+            for name in cls._relation_names(model):
+                field = model._meta.get_field(name)
+                # Inherited fields are looked up on their own model once.
+                if field.model is model and isinstance(instance, field.related_model):
+                    pks.update(
+                        model._base_manager.filter(**{name: instance}).values_list(
+                            "pk", flat=True
+                        )
+                    )
+        return pks
+
+
+@lru_cache(maxsize=None)
+def _is_source(sender):
+    """Check if a model is read by the catalog entries (other than products)."""
+    return any(
+        issubclass(sender, field.related_model)
+        for model in (Product, *Product.__subclasses__())
+        for field in map(model._meta.get_field, CatalogEntry._relation_names(model))
+    )
+
+
+@receiver(signals.post_save)
+def catalog_source_saved(sender, instance, raw=False, **kwargs):
+    """Rebuild the catalog entries which read a saved row."""
+    if raw or sender._meta.apps is not apps:
+        return
+    if issubclass(sender, Product):
+        CatalogEntry.refresh_on_commit([instance.pk])
+    elif _is_source(sender):
+        CatalogEntry.refresh_on_commit(CatalogEntry.related_product_pks(instance))
+
+
+@receiver(signals.pre_delete)
+def catalog_source_deleted(sender, instance, **kwargs):
+    """Rebuild the catalog entries which read a deleted row (after the deletion)."""
+    if sender._meta.apps is not apps or issubclass(sender, Product):
+        return
+    if _is_source(sender):
+        CatalogEntry.refresh_on_commit(CatalogEntry.related_product_pks(instance))
+
+
+@receiver(signals.m2m_changed)
+def catalog_relation_changed(
+    sender, instance, action, reverse, model, pk_set, **kwargs
+):
+    """Rebuild the catalog entries of products whose relations are changed."""
+    if sender._meta.apps is not apps:
+        return
+    if not issubclass(model if reverse else instance.__class__, Product):
+        return
+    field = next(
+        (
+            field
+            for field in (model if reverse else instance.__class__)._meta.many_to_many
+            if field.remote_field.through is sender
+        ),
+        None,
+    )
+    if field is None or field.name not in CatalogEntry._relation_names(field.model):
+        return
+
+    if not reverse:
+        if action.startswith("post_"):
+            CatalogEntry.refresh_on_commit([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        CatalogEntry.refresh_on_commit(pk_set)
+    elif action == "pre_clear":
+        # The products are collected before they lose the relation.
+        CatalogEntry.refresh_on_commit(CatalogEntry.related_product_pks(instance))
@@ -1,9 +1,11 @@
 """Audio book product models."""
 # from base.models import Base
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 from django.conf import settings
 from account.models import User
-from base.models import BaseComment, BaseStar, Tag
+from base.models import BaseComment, BaseEngagementCounters, BaseStar, Tag
 
 from .product import (
     Translator,
@@ -15,14 +17,14 @@ from .product import (
 from .product import Product
 
 
-class PaperBook(Product):
+class PaperBook(Product, BaseEngagementCounters):
     """Paper book product model."""
 
     intro = models.URLField()
     # description = models.CharField(max_length=255)
-    authors = models.ManyToManyField(Author)
+    authors = models.ManyToManyField(Author, through="PaperBookAuthor")
     # speakers = models.ManyToManyField(Speaker)
-    translators = models.ManyToManyField(Translator)
+    translators = models.ManyToManyField(Translator, through="PaperBookTranslator")
     # authors = models.ManyToManyField(Author, related_name="audio_book_author")
     # speakers = models.ManyToManyField(Speaker, related_name="audio_book_speaker")
     # translators = models.ManyToManyField(Translator, related_name="audio_book_translator")
@@ -40,7 +42,59 @@ class PaperBook(Product):
     # audio_type = models.ForeignKey(AudioType, on_delete=models.DO_NOTHING)
     # compatible_devices = models.ManyToManyField(CompatibleDevice)
     # is_downloadable = models.BooleanField(default=False)
-    tags = models.ManyToManyField(Tag)
+    tags = models.ManyToManyField(Tag, through="PaperBookTag")
+
+    comments_related_name = "paper_book_comments"
+    stars_related_name = "paper_book_stars"
+
+    class Meta:
+        # The soft deleted products are read by the related rows, like "Product".
+        base_manager_name = "all_objects"
+
+
+# Through tables of the books' many to many relations. The unique index covers
+# the relations of a book and the other one covers the books of a related object
+# (e.g. the nested listings), so both sides are read from an index alone.
+class PaperBookAuthor(models.Model):
+    """Author of a paper book."""
+
+    paperbook = models.ForeignKey(PaperBook, db_index=False, on_delete=models.CASCADE)
+    author = models.ForeignKey(Author, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_paperbook_authors"
+        unique_together = [("paperbook", "author")]
+        indexes = [
+            models.Index(fields=["author", "paperbook"], name="paperbook_authors_rev_idx"),
+        ]
+
+
+class PaperBookTranslator(models.Model):
+    """Translator of a paper book."""
+
+    paperbook = models.ForeignKey(PaperBook, db_index=False, on_delete=models.CASCADE)
+    translator = models.ForeignKey(Translator, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_paperbook_translators"
+        unique_together = [("paperbook", "translator")]
+        indexes = [
+            models.Index(fields=["translator", "paperbook"], name="paperbook_translators_rev_idx"),
+        ]
+
+
+class PaperBookTag(models.Model):
+    """Tag of a paper book."""
+
+    paperbook = models.ForeignKey(PaperBook, db_index=False, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, db_index=False, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "product_paperbook_tags"
+        unique_together = [("paperbook", "tag")]
+        indexes = [
+            models.Index(fields=["tag", "paperbook"], name="paperbook_tags_rev_idx"),
+        ]
 
 
 # class PaperBookInventory(BaseInventory):
@@ -99,3 +153,17 @@ class PaperBookStar(BaseStar):
 
     def __str__(self):
         return f"{self.post.title}[{self.star}]"
+
+
+@receiver(signals.post_save, sender=PaperBookComment)
+@receiver(signals.post_delete, sender=PaperBookComment)
+def paper_book_comments_counter(instance, **_):
+    """Refresh the paper book's counters when a comment changes."""
+    PaperBook.refresh_counters([instance.Product_id])
+
+
+@receiver(signals.post_save, sender=PaperBookStar)
+@receiver(signals.post_delete, sender=PaperBookStar)
+def paper_book_stars_counter(instance, **_):
+    """Refresh the paper book's counters when a star changes."""
+    PaperBook.refresh_counters([instance.product_id])
@@ -1,13 +1,17 @@
 """Product models."""
 from datetime import datetime
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
 # from account.models import User
 from base.models import Base
 # from polymorphic.models import PolymorphicModel
 from django.conf import settings
 # from base.models import BaseComment, BaseStar, Category
-from base.models import Category
+from base.models import BaseEngagementCounters, Category, SoftDeleteQuerySet
+from polymorphic.managers import PolymorphicManager
 from polymorphic.models import PolymorphicModel
+from polymorphic.query import PolymorphicQuerySet
 
 
 # class Tag(Base):
@@ -82,6 +86,21 @@ class Speaker(models.Model):
         return self.name
 
 
+class ProductQuerySet(SoftDeleteQuerySet, PolymorphicQuerySet):
+    """Polymorphic queryset which soft deletes and restores products in bulk."""
+
+
+class ProductManager(PolymorphicManager.from_queryset(ProductQuerySet)):
+    """Polymorphic product manager."""
+
+    def get_queryset(self):
+        """Django built-in method.
+
+        Filter by is_deleted field.
+        """
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Product(PolymorphicModel, Base):
     """Product model."""
 
@@ -109,10 +128,31 @@ class Product(PolymorphicModel, Base):
     extra = models.JSONField()
     is_approved = models.BooleanField(default=False)
 
-    # class Meta:
-    #     abstract = True
+    objects = ProductManager()
+    # Includes the soft deleted products; it's the base manager, so the related
+    # rows (e.g. orders) still read them.
+    all_objects = PolymorphicManager.from_queryset(ProductQuerySet)()
+
+    class Meta(Base.Meta):
+        base_manager_name = "all_objects"
+        # Used by the keyset pagination; only the live rows are indexed.
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="product_live_created_id_idx",
+                condition=models.Q(is_deleted=False),
+            )
+        ]
 
     def __str__(self):
         if self.is_deleted:
             return f"{self.name} [deleted]"
         return self.name
+
+
+@receiver(signals.m2m_changed, sender=Product.bookmarks.through)
+def product_bookmarks_counter(**kwargs):
+    """Refresh the bookmarks counter of the product types which have counters."""
+    for model in Product.__subclasses__():
+        if issubclass(model, BaseEngagementCounters):
+            model.bookmarks_changed(**kwargs)
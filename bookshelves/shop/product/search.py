@@ -0,0 +1,168 @@
+"""Catalog full-text search.
+
+The catalog entries are indexed by the database: PostgreSQL keeps a generated
+"tsvector" column with a GIN index, SQLite keeps an FTS5 table which is updated
+with the entries. Other databases fall back to (unindexed) "icontains" lookups.
+"""
+import re
+
+from django.db import connections, models, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.dispatch import receiver
+
+from .models import CatalogEntry
+from .models.catalog import catalog_refreshed
+
+
+FTS_TABLE = "product_catalog_search"
+# Fields of the index by descending weight; lists are stored as JSON.
+WEIGHTED_FIELDS = (
+    ("name", ("name",)),
+    ("people", ("authors", "translators", "speakers", "publishers")),
+    ("tags", ("tags",)),
+    ("description", ("description",)),
+)
+# FTS5 "bm25" weights of the fields.
+FTS_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+# PostgreSQL "setweight" labels of the fields.
+TSVECTOR_WEIGHTS = ("A", "B", "C", "D")
+
+_words = re.compile(r"\w+")
+
+
+def _connection():
+    return connections[router.db_for_write(CatalogEntry)]
+
+
+def _text(entry, fields):
+    values = []
+    for name in fields:
+        value = getattr(entry, name)
+        if name == "tags":
+            value = [tag["name"] for tag in value]
+        values += value if isinstance(value, list) else [value]
+    return " ".join(values)
+
+
+def _text_sql(fields):
+    """Build the SQL text of fields for the PostgreSQL generated column."""
+    values = []
+    for name in fields:
+        if name == "tags":
+            name = "jsonb_path_query_array(tags, '$[*].name')"
+        values.append(f"coalesce({name}::text, '')")
+    return " || ' ' || ".join(values)
+
+
+def create_index(using=None, **kwargs):
+    """Create the search index of the catalog if it doesn't exist.
+
+    It's connected to "post_migrate", so it's created with the tables.
+    """
+    connection = connections[using] if using else _connection()
+    table = CatalogEntry._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            vector = " || ".join(
+                f"setweight(to_tsvector('simple', {_text_sql(names)}), '{weight}')"
+                for (_, names), weight in zip(WEIGHTED_FIELDS, TSVECTOR_WEIGHTS)
+            )
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {FTS_TABLE}_idx ON {table} "
+                "USING gin(search_vector)"
+            )
+        elif connection.vendor == "sqlite":
+            columns = ", ".join(column for column, _ in WEIGHTED_FIELDS)
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({columns})"
+            )
+
+
+@receiver(catalog_refreshed)
+def update_index(pks, entries, **kwargs):
+    """Update the search index of products after their entries are rebuilt.
+
+    PostgreSQL updates its generated column by itself.
+
+    Args:
+        pks (Iterable[int]): primary keys of the rebuilt products.
+        entries (Iterable[CatalogEntry]): the entries of the live products.
+    """
+    connection = _connection()
+    if connection.vendor != "sqlite":
+        return
+    pks = list(pks)
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), 500):
+            end = start + 500
+            batch = pks[start:end]
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(batch))})",
+                batch,
+            )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(c for c, _ in WEIGHTED_FIELDS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(WEIGHTED_FIELDS))})",
+            [
+                (entry.pk, *(_text(entry, fields) for _, fields in WEIGHTED_FIELDS))
+                for entry in entries
+            ],
+        )
+
+
+def search(queryset, query):
+    """Filter catalog entries by a full-text query and rank them.
+
+    Args:
+        queryset (QuerySet[CatalogEntry]): entries to search in.
+        query (str): user's query; all of its words should match.
+
+    Returns:
+        QuerySet[CatalogEntry]: matched entries, annotated with "rank" and ordered
+            by it (best first).
+    """
+    words = _words.findall(query)
+    if not words:
+        return queryset.none()
+
+    vendor = _connection().vendor
+    table = CatalogEntry._meta.db_table
+    if vendor == "postgresql":
+        tsquery = "to_tsquery('simple', %s)"
+        terms = " & ".join(f"{word}:*" for word in words)
+        queryset = queryset.alias(
+            matched=RawSQL(
+                f"{table}.search_vector @@ {tsquery}", (terms,), models.BooleanField()
+            )
+        ).filter(matched=True)
+        rank = RawSQL(f"ts_rank({table}.search_vector, {tsquery})", (terms,))
+    elif vendor == "sqlite":
+        # Words are quoted, so the query can't use the FTS5 syntax; prefixes match.
+        terms = " ".join(f'"{word}"*' for word in words)
+        queryset = queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (terms,)
+            )
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {', '.join(map(str, FTS_WEIGHTS))}) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"AND {FTS_TABLE}.rowid = {table}.product_id",
+            (terms,),
+        )
+    else:
+        condition = Q()
+        for word in words:
+            condition &= Q(name__icontains=word) | Q(description__icontains=word)
+        return (
+            queryset.filter(condition).annotate(rank=models.Value(0.0)).order_by("name")
+        )
+
+    return queryset.annotate(
+        rank=models.ExpressionWrapper(rank, models.FloatField())
+    ).order_by("-rank", "pk")
@@ -1,5 +1,7 @@
 """Product serializers."""
 from rest_framework import serializers
+from base.serializers import IsBookmarkedField, PlainThroughModelSerializer
+from shop.price.serializers import EffectivePriceField
 # from base.models import Tag, Category
 from shop.product.models import (
     AudioType,
@@ -15,8 +17,12 @@ from shop.product.models import (
     Product,
     AudioBook,
     PaperBook,
+    CatalogEntry,
 )
 
+# Denormalized counters; they are maintained by the models.
+COUNTER_FIELDS = ("comments_count", "bookmarks_count", "stars_sum", "stars_count")
+
 
 class PublisherSerializer(serializers.ModelSerializer):
     """Publisher serializer."""
@@ -130,14 +136,33 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        # exclude = ["bookmarks"]
-        fields = "__all__"
+        exclude = ["bookmarks"]
+        # fields = "__all__"
 
     # def get_bookmarks_count(self, obj):
     #     """Get product's bookmarks count."""
     #     return obj.bookmarks.count()
 
 
+class CatalogEntrySerializer(serializers.ModelSerializer):
+    """Catalog entry (product list item) serializer."""
+
+    url = serializers.HyperlinkedIdentityField(view_name="product:products-detail")
+    id = serializers.IntegerField(source="pk", read_only=True)
+    effective_price = EffectivePriceField()
+    is_bookmarked = IsBookmarkedField(model=Product)
+
+    class Meta:
+        model = CatalogEntry
+        exclude = ("product",)
+
+
+class CatalogSearchSerializer(CatalogEntrySerializer):
+    """Catalog search result serializer."""
+
+    rank = serializers.FloatField(read_only=True)
+
+
 class AudioBookBookmarkSerializer(serializers.ModelSerializer):
     """Bookmark serializer."""
 
@@ -160,32 +185,28 @@ class PaperBookBookmarkSerializer(serializers.ModelSerializer):
         ref_name = "product"
 
 
-class AudioBookSerializer(serializers.ModelSerializer):
+class AudioBookSerializer(PlainThroughModelSerializer):
     """Audio book serializer."""
 
     url = serializers.HyperlinkedIdentityField(view_name="product:audio_book-detail")
-    bookmarks_count = serializers.SerializerMethodField()
+    stars_average = serializers.FloatField(read_only=True)
+    is_bookmarked = IsBookmarkedField()
 
     class Meta:
         model = AudioBook
-        fields = "__all__"
-
-    def get_bookmarks_count(self, obj):
-        """Get product's bookmarks count."""
-        return obj.bookmarks.count()
+        exclude = ["bookmarks"]
+        read_only_fields = COUNTER_FIELDS
 
 
-class PaperBookSerializer(serializers.ModelSerializer):
+class PaperBookSerializer(PlainThroughModelSerializer):
     """Paper book serializer."""
 
     url = serializers.HyperlinkedIdentityField(view_name="product:paper_book-detail")
-    bookmarks_count = serializers.SerializerMethodField()
+    stars_average = serializers.FloatField(read_only=True)
+    is_bookmarked = IsBookmarkedField()
 
     class Meta:
         model = PaperBook
         exclude = ["bookmarks"]
+        read_only_fields = COUNTER_FIELDS
         # fields = "__all__"
-
-    def get_bookmarks_count(self, obj):
-        """Get product's bookmarks count."""
-        return obj.bookmarks.count()
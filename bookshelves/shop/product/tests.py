@@ -1,3 +1,554 @@
-from django.test import TestCase
+"""Product tests."""
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from account.models import User
+from base.bookmarks import get_bookmarks
+from base.models import Category, Tag
+from shop.price.effective import effective_prices
+from shop.price.models import Price
+from .models import Author, CatalogEntry, PaperBook, Product, Publisher
+from .serializers import PaperBookSerializer
+from .views import PaperBookBookmarkViewSet, PaperBookViewSet, ProductViewSet
+
+
+class CatalogTest(TestCase):
+    """Test the catalog read model."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.seller = User.objects.create(username="seller", mobile="1")
+            self.category = Category.objects.create(name="books")
+            self.author = Author.objects.create(name="author")
+            self.tag = Tag.objects.create(name="tag")
+            self.book = PaperBook.objects.create(
+                name="book",
+                description="description",
+                seller=self.seller,
+                category=self.category,
+                product_code="book",
+                image="https://example.com/book.png",
+                inventory=1,
+                buy_price=50,
+                sel_price=100,
+                discount=10,
+                start=None,
+                extra={},
+                intro="https://example.com/intro.mp3",
+                book_publisher=Publisher.objects.create(name="publisher"),
+                published_year=2000,
+            )
+            self.book.authors.add(self.author)
+            self.book.tags.add(self.tag)
+
+    def test_entry(self):
+        entry = CatalogEntry.objects.with_effective_price().get()
+        self.assertEqual(entry.pk, self.book.pk)
+        self.assertEqual(entry.product_type, "paperbook")
+        self.assertEqual(entry.authors, ["author"])
+        self.assertEqual(entry.publishers, ["publisher"])
+        self.assertEqual(entry.tags, [{"id": self.tag.pk, "name": "tag"}])
+        self.assertEqual(entry.category_name, "books")
+        self.assertEqual(entry.effective_price, 90)
+
+    def test_discount_window(self):
+        PaperBook.objects.filter(pk=self.book.pk).update(
+            end=timezone.now() - timedelta(days=1)
+        )
+        CatalogEntry.refresh([self.book.pk])
+        self.assertEqual(
+            CatalogEntry.objects.with_effective_price().get().effective_price, 100
+        )
+
+    def test_price_window(self):
+        now = timezone.now()
+        PaperBook.objects.filter(pk=self.book.pk).update(end=now)
+        # The discount ends at its end.
+        self.assertEqual(
+            CatalogEntry.objects.with_effective_price(now).get().effective_price, 100
+        )
+
+        Price.objects.create(
+            product=self.book,
+            inventory=1,
+            price=80,
+            discount=5,
+            start=now - timedelta(days=1),
+        )
+        entry = CatalogEntry.objects.with_effective_price(now).get()
+        self.assertEqual(entry.effective_price, 75)
+        self.assertEqual(effective_prices([self.book.pk], now)[self.book.pk].amount, 75)
+
+    def test_incremental_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = "renamed"
+            self.author.save()
+            self.book.authors.add(Author.objects.create(name="second"))
+            self.category.name = "novels"
+            self.category.save()
+        entry = CatalogEntry.objects.get()
+        self.assertEqual(entry.authors, ["renamed", "second"])
+        self.assertEqual(entry.category_name, "novels")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.paperbook_set.clear()
+        self.assertEqual(CatalogEntry.objects.get().authors, ["second"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.delete()
+        self.assertFalse(CatalogEntry.objects.exists())
+
+    def test_rebuild_command(self):
+        CatalogEntry.objects.all().delete()
+        call_command("rebuild_catalog", stdout=StringIO())
+        self.assertEqual(CatalogEntry.objects.get().name, "book")
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class CatalogSearchTest(TestCase):
+    """Test the catalog full-text search."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        seller = User.objects.create(username="seller", mobile="1")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, description in (
+                ("Dune", "A desert planet."),
+                ("Foundation", "Dune is mentioned here."),
+                ("Emma", "A novel."),
+            ):
+                book = PaperBook.objects.create(
+                    name=name,
+                    description=description,
+                    seller=seller,
+                    category=category,
+                    product_code=name,
+                    image="https://example.com/book.png",
+                    inventory=1,
+                    buy_price=50,
+                    sel_price=100,
+                    extra={},
+                    intro="https://example.com/intro.mp3",
+                    book_publisher=publisher,
+                    published_year=2000,
+                )
+            book.authors.add(Author.objects.create(name="Jane Austen"))
+
+    def _search(self, query, **params):
+        if query is not None:
+            params["q"] = query
+        request = APIRequestFactory().get("/", params)
+        return ProductViewSet.as_view({"get": "search"})(request)
+
+    def test_ranked_by_field(self):
+        names = [entry["name"] for entry in self._search("dune").data["results"]]
+        self.assertEqual(names, ["Dune", "Foundation"])
+
+    def test_ranked_without_keyset_pagination(self):
+        response = self._search("dune", pagination="cursor")
+        self.assertEqual(response.data["count"], 2)
+        names = [entry["name"] for entry in response.data["results"]]
+        self.assertEqual(names, ["Dune", "Foundation"])
+
+    def test_people_and_prefixes(self):
+        self.assertEqual(
+            [entry["name"] for entry in self._search("aust").data["results"]], ["Emma"]
+        )
+        self.assertEqual(self._search("austen dune").data["count"], 0)
+
+    def test_incremental_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PaperBook.objects.get(name="Emma").authors.clear()
+        self.assertEqual(self._search("austen").data["count"], 0)
+
+    def test_query_is_required(self):
+        self.assertEqual(self._search(None).status_code, 400)
+        self.assertEqual(self._search('"*').data["count"], 0)
+
+
+@override_settings(FACET_YEAR_BUCKET_SIZE=10, FACET_PRICE_RANGES=(100, 200))
+class FacetTest(TestCase):
+    """Test the product facets."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        seller = User.objects.create(username="seller", mobile="1")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        self.author = Author.objects.create(name="author")
+        self.tags = [
+            Tag.objects.create(name="novel"),
+            Tag.objects.create(name="classic"),
+        ]
+        for index, (year, price) in enumerate(((1995, 50), (2001, 150), (2009, 250))):
+            book = PaperBook.objects.create(
+                name=f"book {index}",
+                description="description",
+                seller=seller,
+                category=category,
+                product_code=str(index),
+                image="https://example.com/book.png",
+                inventory=1,
+                buy_price=10,
+                sel_price=price,
+                extra={},
+                intro="https://example.com/intro.mp3",
+                book_publisher=publisher,
+                published_year=year,
+            )
+            book.tags.set(self.tags[:index])
+            book.authors.add(self.author)
+
+    def _facets(self, **params):
+        request = APIRequestFactory().get("/", params)
+        return PaperBookViewSet.as_view({"get": "facets"})(request).data
+
+    def test_counts(self):
+        # Four aggregate queries on top of the five of the listed page.
+        with self.assertNumQueries(9):
+            data = self._facets()
+        facets = data["facets"]
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(
+            [(tag["name"], tag["count"]) for tag in facets["tags"]],
+            [("novel", 2), ("classic", 1)],
+        )
+        self.assertEqual(facets["authors"][0]["count"], 3)
+        self.assertEqual(facets["publishers"][0]["count"], 3)
+        self.assertEqual(
+            facets["published_year"],
+            [
+                {"min": 1990, "max": 1999, "count": 1},
+                {"min": 2000, "max": 2009, "count": 2},
+            ],
+        )
+        self.assertEqual(
+            [(price["min"], price["max"], price["count"]) for price in facets["price"]],
+            [(0, 100, 1), (100, 200, 1), (200, None, 1)],
+        )
+
+    def test_filtered_counts(self):
+        data = self._facets(tags=self.tags[1].pk, min_year=2000)
+        self.assertEqual([book["name"] for book in data["results"]], ["book 2"])
+        self.assertEqual(
+            [(tag["name"], tag["count"]) for tag in data["facets"]["tags"]],
+            [("classic", 1), ("novel", 1)],
+        )
+        self.assertEqual(
+            data["facets"]["price"], [{"min": 200, "max": None, "count": 1}]
+        )
+
+
+class ImportCatalogTest(TestCase):
+    """Test the bulk catalog import."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        User.objects.create(username="seller", mobile="1")
+        Author.objects.create(name="Frank Herbert")
+
+    def _import(self, content, suffix=".csv", **kwargs):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix) as file:
+            file.write(content)
+            file.flush()
+            out = StringIO()
+            call_command(
+                "import_catalog", file.name, seller="seller", stdout=out, **kwargs
+            )
+        return out.getvalue()
+
+    def test_import_and_update(self):
+        out = self._import(
+            "name,description,product_code,image,inventory,buy_price,sel_price,intro,"
+            "published_year,category,book_publisher,authors,tags\n"
+            "Dune,A desert planet.,D-1,https://example.com/d.png,3,10,100,"
+            "https://example.com/i.mp3,1965,novels,Chilton,Frank Herbert,classic|sci-fi\n"
+            "Emma,A novel.,E-1,https://example.com/e.png,2,10,90,"
+            "https://example.com/i.mp3,1815,novels,Murray,Jane Austen,classic\n",
+            product_type="paperbook",
+        )
+        self.assertIn("2 created, 0 updated", out)
+        dune = PaperBook.objects.get(product_code="D-1")
+        self.assertEqual(dune.category.name, "novels")
+        self.assertEqual(dune.book_publisher.name, "Chilton")
+        self.assertEqual(
+            list(dune.authors.values_list("name", flat=True)), ["Frank Herbert"]
+        )
+        self.assertEqual(
+            sorted(dune.tags.values_list("name", flat=True)), ["classic", "sci-fi"]
+        )
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(
+            CatalogEntry.objects.get(pk=dune.pk).authors, ["Frank Herbert"]
+        )
+
+        out = self._import(
+            '{"product_type": "paperbook", "product_code": "D-1", "name": "Dune Messiah", '
+            '"tags": ["sci-fi"]}\n',
+            suffix=".jsonl",
+        )
+        self.assertIn("0 created, 1 updated", out)
+        dune.refresh_from_db()
+        self.assertEqual(dune.name, "Dune Messiah")
+        self.assertEqual(list(dune.tags.values_list("name", flat=True)), ["sci-fi"])
+        self.assertEqual(dune.authors.count(), 1)
+        self.assertEqual(CatalogEntry.objects.get(pk=dune.pk).name, "Dune Messiah")
+
+    def test_invalid_rows(self):
+        with self.assertRaisesMessage(CommandError, "unknown field 'seller'"):
+            self._import(
+                '{"product_code": "D-1", "seller": 1}\n',
+                suffix=".jsonl",
+                product_type="paperbook",
+            )
+        with self.assertRaisesMessage(CommandError, "unknown product type"):
+            self._import('{"product_code": "D-1"}\n', suffix=".jsonl")
+        self.assertFalse(PaperBook.objects.exists())
+
+
+class ExportTest(TestCase):
+    """Test the catalog export."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        seller = User.objects.create(username="seller", mobile="1")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        with self.captureOnCommitCallbacks(execute=True):
+            for name in ("Dune", "Emma"):
+                book = PaperBook.objects.create(
+                    name=name,
+                    description="description",
+                    seller=seller,
+                    category=category,
+                    product_code=name,
+                    image="https://example.com/book.png",
+                    inventory=1,
+                    buy_price=50,
+                    sel_price=100,
+                    extra={},
+                    intro="https://example.com/intro.mp3",
+                    book_publisher=publisher,
+                    published_year=2000,
+                )
+                book.tags.add(Tag.objects.create(name=f"{name} tag"))
+
+    def _export(self, **params):
+        request = APIRequestFactory().get("/", params)
+        # The router passes the action's renderers to the view.
+        view = ProductViewSet.as_view({"get": "export"}, **ProductViewSet.export.kwargs)
+        response = view(request)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response, content = self._export(name="Emma")
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Emma"])
+        self.assertEqual(rows[0]["tags"][0]["name"], "Emma tag")
+        self.assertEqual(rows[0]["effective_price"], 100)
+
+    def test_csv(self):
+        with self.assertNumQueries(1):
+            response, content = self._export(format="csv")
+        self.assertTrue(response["Content-Disposition"].endswith('.csv"'))
+        header, *rows = content.splitlines()
+        self.assertEqual(header.split(",")[:3], ["pk", "product_type", "product_code"])
+        self.assertEqual(len(rows), 2)
+        self.assertIn(",Dune tag,", rows[0])
+
+
+class NestedRouteTest(TestCase):
+    """Test the nested listings of books."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        seller = User.objects.create(username="seller", mobile="1")
+        category = Category.objects.create(name="books")
+        self.publishers = [
+            Publisher.objects.create(name=name) for name in ("first", "second")
+        ]
+        self.tag = Tag.objects.create(name="novel")
+        for index, publisher in enumerate(self.publishers * 2):
+            book = PaperBook.objects.create(
+                name=f"book {index}",
+                description="description",
+                seller=seller,
+                category=category,
+                product_code=str(index),
+                image="https://example.com/book.png",
+                inventory=1,
+                buy_price=10,
+                sel_price=100,
+                extra={},
+                intro="https://example.com/intro.mp3",
+                book_publisher=publisher,
+                published_year=2000,
+            )
+            if index % 2:
+                book.tags.add(self.tag)
+
+    def _list(self, **kwargs):
+        # Responses are cached by path, like the ones of the real nested routes.
+        path = "".join(f"/{key}/{value}" for key, value in kwargs.items())
+        request = APIRequestFactory().get(f"{path}/paper_books/")
+        response = PaperBookViewSet.as_view({"get": "list"})(request, **kwargs)
+        return [book["name"] for book in response.data["results"]]
+
+    def test_filtered_by_parent(self):
+        self.assertEqual(
+            self._list(publishers_pk=str(self.publishers[0].pk)), ["book 0", "book 2"]
+        )
+        self.assertEqual(self._list(tags_pk=str(self.tag.pk)), ["book 1", "book 3"])
+        self.assertEqual(self._list(tags_pk="novel"), ["book 1", "book 3"])
+        self.assertEqual(len(self._list()), 4)
+
+    def test_writable_relations(self):
+        book = PaperBook.objects.get(name="book 0")
+        serializer = PaperBookSerializer(
+            book, data={"tags": [self.tag.pk]}, partial=True, context={"request": None}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.assertEqual(list(book.tags.all()), [self.tag])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class ProductSoftDeleteTest(TestCase):
+    """Test the soft deletes of products."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        seller = User.objects.create(username="seller", mobile="1")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        self.books = [
+            PaperBook.objects.create(
+                name=f"book {index}",
+                description="description",
+                seller=seller,
+                category=category,
+                product_code=str(index),
+                image="https://example.com/book.png",
+                inventory=1,
+                buy_price=10,
+                sel_price=100,
+                extra={},
+                intro="https://example.com/intro.mp3",
+                book_publisher=publisher,
+                published_year=2000,
+            )
+            for index in range(3)
+        ]
+
+    def _list(self):
+        request = APIRequestFactory().get("/paper_books/")
+        response = PaperBookViewSet.as_view({"get": "list"})(request)
+        return [book["name"] for book in response.data["results"]]
+
+    def test_delete(self):
+        self.books[0].delete()
+        self.assertEqual(PaperBook.objects.filter(pk=self.books[1].pk).delete(), 1)
+        self.assertEqual(list(Product.objects.all()), [self.books[2]])
+        self.assertEqual(self._list(), ["book 2"])
+        self.assertEqual(Product.all_objects.filter(is_deleted=True).count(), 2)
+
+        # Related rows still read the deleted products.
+        price = Price.objects.create(product=self.books[0], inventory=1, price=50)
+        self.assertEqual(Price.objects.get(pk=price.pk).product, self.books[0])
+
+        self.assertEqual(PaperBook.all_objects.filter(is_deleted=True).restore(), 2)
+        self.assertEqual(self._list(), ["book 0", "book 1", "book 2"])
+
+    def test_listings_read_live_rows(self):
+        # The live-row index matches the listings.
+        query = str(Product.objects.order_by("-pk").query)
+        self.assertIn('"is_deleted"', query.split(" WHERE ")[1])
+
+
+class BookmarkTest(TestCase):
+    """Test the bookmark sets and the bulk bookmarks."""
+
+    def setUp(self):
+        cache.clear()
+        Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+        self.user = User.objects.create(username="reader", mobile="1")
+        seller = User.objects.create(username="seller", mobile="2")
+        category = Category.objects.create(name="books")
+        publisher = Publisher.objects.create(name="publisher")
+        self.books = [
+            PaperBook.objects.create(
+                name=f"book {index}",
+                description="description",
+                seller=seller,
+                category=category,
+                product_code=str(index),
+                image="https://example.com/book.png",
+                inventory=1,
+                buy_price=10,
+                sel_price=100,
+                extra={},
+                intro="https://example.com/intro.mp3",
+                book_publisher=publisher,
+                published_year=2000,
+            )
+            for index in range(3)
+        ]
+
+    def _bulk(self, method, ids):
+        request = getattr(APIRequestFactory(), method)("/", {"ids": ids}, format="json")
+        force_authenticate(request, user=self.user)
+        view = PaperBookBookmarkViewSet.as_view({"post": "bulk", "delete": "bulk"})
+        with self.captureOnCommitCallbacks(execute=True):
+            return view(request)
+
+    def test_bulk(self):
+        pks = [book.pk for book in self.books]
+        response = self._bulk("post", [pks[0], pks[1], 0])
+        self.assertEqual(response.data["ids"], pks[:2])
+        self.assertEqual(self._bulk("post", pks).data["ids"], pks[2:])
+        self.assertEqual(self._bulk("delete", [pks[0], 0]).data["ids"], pks[:1])
+        self.assertEqual(get_bookmarks(PaperBook, self.user), set(pks[1:]))
+        self.assertEqual(self.books[1].bookmarks.count(), 1)
+        self.assertEqual(self._bulk("post", ["x"]).status_code, 400)
+
+    def test_set_is_cached_and_invalidated(self):
+        self.assertEqual(get_bookmarks(PaperBook, self.user), set())
+        with self.assertNumQueries(0):
+            get_bookmarks(PaperBook, self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[0].bookmarks.add(self.user)
+        self.assertEqual(get_bookmarks(PaperBook, self.user), {self.books[0].pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.product_bookmarks.clear()
+        self.assertEqual(get_bookmarks(PaperBook, self.user), set())
+
+    def test_is_bookmarked(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.books[1].bookmarks.add(self.user)
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        serializer = PaperBookSerializer(
+            PaperBook.objects.order_by("pk"), many=True, context={"request": request}
+        )
+        self.assertEqual(
+            [book["is_bookmarked"] for book in serializer.data], [False, True, False]
+        )
+        # The set is fetched once for the whole list.
+        self.assertEqual(list(serializer.child.context["bookmark_sets"]), [PaperBook])
@@ -21,7 +21,6 @@ from .views import (
 )
 
 router = routers.DefaultRouter()
-router.register("", ProductViewSet, basename="products")
 router.register("tags", TagViewSet, basename="tag")
 router.register("categories", CategoryViewSet, basename="category")
 router.register("audio_book_bookmarks", AudioBookBookmarkViewSet, basename="audio_book_bookmark")
@@ -37,6 +36,8 @@ router.register("book_translators", TranslatorViewSet, basename="book_translator
 router.register(
     "compatible_devices", CompatibleDeviceViewSet, basename="compatible_device"
 )
+# It should be registered last; otherwise its detail route shadows the others.
+router.register("", ProductViewSet, basename="products")
 
 # Nested router.
 # category_router = nested_routers.NestedDefaultRouter(
@@ -47,7 +48,7 @@ router.register(
 
 tag_router = nested_routers.NestedDefaultRouter(router, "tags", lookup="tags")
 tag_router.register("audio_books", AudioBookViewSet, basename="audio_books")
-tag_router.register("paper_books", AudioBookViewSet, basename="paper_books")
+tag_router.register("paper_books", PaperBookViewSet, basename="paper_books")
 
 compatible_device_router = nested_routers.NestedDefaultRouter(
     router, "compatible_devices", lookup="compatible_devices"
@@ -60,19 +61,19 @@ publisher_router = nested_routers.NestedDefaultRouter(
     router, "publishers", lookup="publishers"
 )
 publisher_router.register("audio_books", AudioBookViewSet, basename="audio_books")
-publisher_router.register("paper_books", AudioBookViewSet, basename="paper_books")
+publisher_router.register("paper_books", PaperBookViewSet, basename="paper_books")
 
 book_author_router = nested_routers.NestedDefaultRouter(
     router, "book_authors", lookup="book_authors"
 )
 book_author_router.register("audio_books", AudioBookViewSet, basename="audio_books")
-book_author_router.register("paper_books", AudioBookViewSet, basename="paper_books")
+book_author_router.register("paper_books", PaperBookViewSet, basename="paper_books")
 
 book_translator_router = nested_routers.NestedDefaultRouter(
     router, "book_translators", lookup="book_translators"
 )
 book_translator_router.register("audio_books", AudioBookViewSet, basename="audio_books")
-book_translator_router.register("paper_books", AudioBookViewSet, basename="paper_books")
+book_translator_router.register("paper_books", PaperBookViewSet, basename="paper_books")
 
 audio_speaker_router = nested_routers.NestedDefaultRouter(
     router, "audio_speakers", lookup="audio_speakers"
@@ -1,5 +1,7 @@
 """Audio book views."""
+from base.cache import CachedResponseMixin
 from base.views import BaseViewSet
+from shop.product.facets import FacetFilterSet, FacetsMixin
 # from base.models import Product
 from shop.product.models import (
     # AudioBook,
@@ -24,7 +26,27 @@ from shop.product.serializers import (
 from rest_framework import generics, permissions
 
 
+class PaperBookFilterSet(FacetFilterSet):
+    """Paper book filter set."""
+
+    class Meta:
+        model = PaperBook
+        fields = (
+            "name",
+            "descendants",
+            "tags",
+            "authors",
+            "book_publisher",
+            "min_year",
+            "max_year",
+            "min_price",
+            "max_price",
+        )
+
+
 class PaperBookViewSet(
+    FacetsMixin,
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -36,5 +58,12 @@ class PaperBookViewSet(
     queryset = PaperBook.objects.all()
     serializer_class = PaperBookSerializer
     alternative_lookup_field = "name"
-    filterset_fields = ("name",)
+    filterset_class = PaperBookFilterSet
+    parent_lookups = {
+        "tags_pk": ("tags",),
+        "publishers_pk": ("book_publisher",),
+        "book_authors_pk": ("authors",),
+        "book_translators_pk": ("translators",),
+    }
+    facet_fields = {"tags": "tags", "authors": "authors", "publishers": "book_publisher"}
 
@@ -1,5 +1,7 @@
 """Audio book views."""
+from base.cache import CachedResponseMixin
 from base.views import BaseViewSet
+from shop.product.facets import FacetFilterSet, FacetsMixin
 from shop.product.models import (
     AudioBook,
     AudioIndex,
@@ -22,6 +24,7 @@ from rest_framework import generics, permissions
 
 
 class AudioTypeViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -37,6 +40,7 @@ class AudioTypeViewSet(
 
 
 class BookSpeakerViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -52,6 +56,7 @@ class BookSpeakerViewSet(
 
 
 class CompatibleDeviceViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -67,6 +72,7 @@ class CompatibleDeviceViewSet(
 
 
 class AudioIndexViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -80,7 +86,29 @@ class AudioIndexViewSet(
     filterset_fields = ("is_downloadable",)
 
 
+class AudioBookFilterSet(FacetFilterSet):
+    """Audio book filter set."""
+
+    class Meta:
+        model = AudioBook
+        fields = (
+            "name",
+            "descendants",
+            "tags",
+            "authors",
+            "book_publisher",
+            "audio_type",
+            "compatible_devices",
+            "min_year",
+            "max_year",
+            "min_price",
+            "max_price",
+        )
+
+
 class AudioBookViewSet(
+    FacetsMixin,
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -92,4 +120,19 @@ class AudioBookViewSet(
     queryset = AudioBook.objects.all()
     serializer_class = AudioBookSerializer
     alternative_lookup_field = "name"
-    filterset_fields = ("name",)
+    filterset_class = AudioBookFilterSet
+    parent_lookups = {
+        "tags_pk": ("tags",),
+        "compatible_devices_pk": ("compatible_devices",),
+        "publishers_pk": ("book_publisher", "audio_publisher"),
+        "book_authors_pk": ("authors",),
+        "book_translators_pk": ("translators",),
+        "audio_speakers_pk": ("speakers",),
+    }
+    facet_fields = {
+        "tags": "tags",
+        "authors": "authors",
+        "publishers": "book_publisher",
+        "audio_type": "audio_type",
+        "compatible_devices": "compatible_devices",
+    }
@@ -1,15 +1,21 @@
 """Product views."""
 from shop.product.serializers import AudioBookBookmarkSerializer, PaperBookBookmarkSerializer
-from base.models import Tag, Category
-from base.serializers import CategorySerializer, TagSerializer
+from base.models import Tag
+from base.serializers import TagSerializer
 from shop.product.models import PaperBook, AudioBook
-from base.views import BaseViewSet
+from base.cache import CachedResponseMixin
+from base.export import ExportMixin
+from base.filters import CategoryDescendantsFilter
+from base.views import BaseBookmarkViewSet, BaseViewSet, CategoryViewSet as BaseCategoryViewSet
+from django_filters import rest_framework as filters
 from rest_framework import permissions, generics, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from shop.product.models import (
     AudioBook,
     Author,
+    CatalogEntry,
     Translator,
     Publisher,
     Product,
@@ -19,10 +25,35 @@ from shop.product.serializers import (
     TranslatorSerializer,
     PublisherSerializer,
     ProductSerializer,
+    CatalogEntrySerializer,
+    CatalogSearchSerializer,
 )
+from shop.product.search import search
+
+
+class ProductFilterSet(filters.FilterSet):
+    """Product filter set."""
+
+    descendants = CategoryDescendantsFilter()
+
+    class Meta:
+        model = Product
+        fields = ("name", "category", "descendants")
+
+
+class CatalogEntryFilterSet(filters.FilterSet):
+    """Catalog entry filter set."""
+
+    descendants = CategoryDescendantsFilter()
+
+    class Meta:
+        model = CatalogEntry
+        fields = ("name", "category", "descendants", "product_type")
 
 
 class ProductViewSet(
+    ExportMixin,
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -34,10 +65,82 @@ class ProductViewSet(
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     alternative_lookup_field = "name"
-#     filterset_fields = ("name",)
+    # Effective prices are read from the price windows.
+    cache_dependencies = ("price.price",)
+    # Actions which are served from the catalog read model.
+    catalog_actions = {
+        "list": CatalogEntrySerializer,
+        "search": CatalogSearchSerializer,
+        "export": CatalogEntrySerializer,
+    }
+    export_fields = (
+        "pk",
+        "product_type",
+        "product_code",
+        "name",
+        "description",
+        "image",
+        "category",
+        "category_name",
+        "authors",
+        "translators",
+        "speakers",
+        "publishers",
+        "tags",
+        "published_year",
+        "inventory",
+        "sel_price",
+        "discount",
+        "discount_start",
+        "discount_end",
+        "effective_price",
+        "is_approved",
+        "created_at",
+    )
+
+    @property
+    def filterset_class(self):
+        """Filter the catalog actions on the catalog read model."""
+        return CatalogEntryFilterSet if self.action in self.catalog_actions else ProductFilterSet
+
+    def get_queryset(self):
+        """List the products from the catalog read model."""
+        if self.action in self.catalog_actions:
+            return CatalogEntry.objects.with_effective_price()
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        """DRF built-in method."""
+        return self.catalog_actions.get(self.action) or super().get_serializer_class()
+
+    def _keyset_requested(self):
+        # Keyset pagination orders by the creation; search results are ordered by rank.
+        return self.action != "search" and super()._keyset_requested()
+
+    @action(detail=False)
+    def search(self, request):
+        """Search the catalog by "q" (names, people and tags), best matches first."""
+        if not request.query_params.get("q", "").strip():
+            return Response(
+                data={
+                    "status_code": status.HTTP_400_BAD_REQUEST,
+                    "code": status.HTTP_400_BAD_REQUEST,
+                    "detail": "The 'q' parameter is required.",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self.cached_response(self._search, request)
+
+    def _search(self, request):
+        queryset = search(self.filter_queryset(self.get_queryset()), request.query_params["q"])
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
 
 
 class TagViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -51,18 +154,12 @@ class TagViewSet(
     alternative_lookup_field = "name"
 
 
-class CategoryViewSet(
-    BaseViewSet, generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView
-):
-    """Category view set."""
-
-    permission_classes = [permissions.DjangoModelPermissions]
-    queryset = Category.objects.filter(is_deleted=False)
-    serializer_class = CategorySerializer
-    alternative_lookup_field = "name"
+class CategoryViewSet(BaseCategoryViewSet):
+    """Product category view set."""
 
 
 class BookAuthorViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -78,6 +175,7 @@ class BookAuthorViewSet(
 
 
 class PublisherViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -93,6 +191,7 @@ class PublisherViewSet(
 
 
 class TranslatorViewSet(
+    CachedResponseMixin,
     BaseViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveAPIView,
@@ -107,143 +206,17 @@ class TranslatorViewSet(
     filterset_fields = ("name",)
 
 
-class AudioBookBookmarkViewSet(BaseViewSet, generics.ListCreateAPIView, generics.DestroyAPIView):
+class AudioBookBookmarkViewSet(BaseBookmarkViewSet):
     """Audio Book Bookmark view set."""
 
-    permission_classes = [permissions.IsAuthenticated]
     queryset = AudioBook.objects.all().only("id", "bookmarks")
     serializer_class = AudioBookBookmarkSerializer
-
-    def get_queryset(self):
-        """Only fetch bookmark-related posts."""
-        return AudioBook.objects.filter(bookmarks=self.request.user)
-
-    def create(self, request, *args, **kwargs):
-        """Attach user ID into a request."""
-        request.data["user"] = self.request.user.id
-        try:
-            self.get_queryset().get(id=request.data["post"])
-            return Response(
-                data={
-                    "status_code": status.HTTP_400_BAD_REQUEST,
-                    "code": status.HTTP_400_BAD_REQUEST,
-                    "detail": "The post already bookmarked.",
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        except AudioBook.DoesNotExist:
-            post = AudioBook.objects.get(id=request.data["post"])
-            post.bookmarks.add(self.request.user)
-        return Response(
-            data={
-                "status_code": status.HTTP_201_CREATED,
-                "code": status.HTTP_201_CREATED,
-                "detail": "Bookmark created.",
-            },
-            status=status.HTTP_201_CREATED,
-        )
-
-    def destroy(self, request, *args, **kwargs):
-        """DRF built-in method."""
-        try:
-            post = AudioBook.objects.get(id=kwargs["pk"])
-        except AudioBook.DoesNotExist:
-            return Response(
-                data={
-                    "status_code": status.HTTP_404_NOT_FOUND,
-                    "code": status.HTTP_404_NOT_FOUND,
-                    "detail": "Post not found.",
-                },
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        if post.bookmarks.filter(bookmarks__bookmarks=self.request.user).exists():
-            post.bookmarks.remove(self.request.user)
-            return Response(
-                data={
-                    "status_code": status.HTTP_204_NO_CONTENT,
-                    "code": status.HTTP_204_NO_CONTENT,
-                    "detail": "Bookmark removed.",
-                },
-                status=status.HTTP_204_NO_CONTENT,
-            )
-
-        return Response(
-            data={
-                "status_code": status.HTTP_404_NOT_FOUND,
-                "code": status.HTTP_404_NOT_FOUND,
-                "detail": "Bookmark not found.",
-            },
-            status=status.HTTP_404_NOT_FOUND,
-        )
+    bookmark_model = AudioBook
 
 
-class PaperBookBookmarkViewSet(BaseViewSet, generics.ListCreateAPIView, generics.DestroyAPIView):
+class PaperBookBookmarkViewSet(BaseBookmarkViewSet):
     """Paper Book Bookmark view set."""
 
-    permission_classes = [permissions.IsAuthenticated]
     queryset = PaperBook.objects.all().only("id", "bookmarks")
     serializer_class = PaperBookBookmarkSerializer
-
-    def get_queryset(self):
-        """Only fetch bookmark-related posts."""
-        return PaperBook.objects.filter(bookmarks=self.request.user)
-
-    def create(self, request, *args, **kwargs):
-        """Attach user ID into a request."""
-        request.data["user"] = self.request.user.id
-        try:
-            self.get_queryset().get(id=request.data["post"])
-            return Response(
-                data={
-                    "status_code": status.HTTP_400_BAD_REQUEST,
-                    "code": status.HTTP_400_BAD_REQUEST,
-                    "detail": "The post already bookmarked.",
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        except PaperBook.DoesNotExist:
-            post = PaperBook.objects.get(id=request.data["post"])
-            post.bookmarks.add(self.request.user)
-        return Response(
-            data={
-                "status_code": status.HTTP_201_CREATED,
-                "code": status.HTTP_201_CREATED,
-                "detail": "Bookmark created.",
-            },
-            status=status.HTTP_201_CREATED,
-        )
-
-    def destroy(self, request, *args, **kwargs):
-        """DRF built-in method."""
-        try:
-            post = PaperBook.objects.get(id=kwargs["pk"])
-        except PaperBook.DoesNotExist:
-            return Response(
-                data={
-                    "status_code": status.HTTP_404_NOT_FOUND,
-                    "code": status.HTTP_404_NOT_FOUND,
-                    "detail": "Post not found.",
-                },
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        if post.bookmarks.filter(bookmarks__bookmarks=self.request.user).exists():
-            post.bookmarks.remove(self.request.user)
-            return Response(
-                data={
-                    "status_code": status.HTTP_204_NO_CONTENT,
-                    "code": status.HTTP_204_NO_CONTENT,
-                    "detail": "Bookmark removed.",
-                },
-                status=status.HTTP_204_NO_CONTENT,
-            )
-
-        return Response(
-            data={
-                "status_code": status.HTTP_404_NOT_FOUND,
-                "code": status.HTTP_404_NOT_FOUND,
-                "detail": "Bookmark not found.",
-            },
-            status=status.HTTP_404_NOT_FOUND,
-        )
+    bookmark_model = PaperBook
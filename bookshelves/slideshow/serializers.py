@@ -20,6 +20,6 @@ class SlideShowSerializer(ContentTypeLinkModelSerializer):
 
     # url = serializers.HyperlinkedIdentityField(view_name="slideshow:slideshow-detail")
 
-    class Meta:
+    class Meta(ContentTypeLinkModelSerializer.Meta):
         model = SlideShow
         exclude = ("is_deleted", "group_slideshow")
@@ -1,4 +1,5 @@
 """Slideshow views."""
+from base.cache import CachedResponseMixin
 from rest_framework import permissions, generics, viewsets
 
 from .models import SlideShow, GroupSlideShow
@@ -6,6 +7,7 @@ from .serializers import SlideShowSerializer, GroupSlideShowSerializer
 
 
 class GroupSlideShowViewSet(
+    CachedResponseMixin,
     viewsets.GenericViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveUpdateDestroyAPIView,
@@ -18,6 +20,7 @@ class GroupSlideShowViewSet(
 
 
 class SlideShowViewSet(
+    CachedResponseMixin,
     viewsets.GenericViewSet,
     generics.ListCreateAPIView,
     generics.RetrieveUpdateDestroyAPIView,
@@ -0,0 +1 @@
+"""Project tests."""
@@ -0,0 +1,475 @@
+"""Per-endpoint SQL query budget.
+
+It seeds a dataset for the installed apps, requests every GET route which is
+registered by the apps' routers and measures the number of SQL queries and the
+wall-clock time of each request.
+"""
+import json
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from base.pagination import KeysetPagination
+from base.views import BaseViewSet
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.views import APIView
+
+
+ADMIN_USERNAME = "budget-admin"
+# Apps whose routes are measured; "tests.urls" includes their routers.
+APPS = (
+    "account",
+    "base",
+    "blog",
+    "page",
+    "file",
+    "slideshow",
+    "shop.product",
+    "shop.price",
+    "shop.cart",
+    "shop.payment",
+)
+URLCONF = "tests.urls"
+# Number of rows which are created per model (and per parent of nested routes).
+SEED_SIZE = 12
+# Page sizes which are compared to detect queries which grow with the page size.
+PAGE_SIZES = (2, 10)
+# Routes whose queries are known to grow with the page size; they're still
+# checked against the baseline. Remove a route as soon as it's fixed.
+KNOWN_PAGE_SIZE_GROWTH = ()
+# Routes which can't be measured by a GET request without side effects.
+SKIPPED_ROUTES = ("account/logout/",)
+# Query strings of the routes which need one to do their work.
+ROUTE_QUERIES = {"shop/products/search/": "q=audio"}
+# Query string of the keyset pagination mode of BaseViewSet.
+KEYSET_QUERY = "pagination=cursor"
+
+_REGEX_GROUP = re.compile(r"\(\?P<(\w+)>[^)]*\)")
+_PATH_CONVERTER = re.compile(r"<(?:\w+:)?(\w+)>")
+
+
+class Route(NamedTuple):
+    """A GET route of the API."""
+
+    pattern: str
+    view_class: type
+    action: Optional[str]
+    kwargs: Tuple[str, ...]
+    query: str = ""
+
+    @property
+    def key(self) -> str:
+        """Baseline key of the route."""
+        return f"{self.pattern}?{self.query}" if self.query else self.pattern
+
+    def url(self, values: Dict[str, str]) -> str:
+        """Build the route URL from the given kwargs' values."""
+        return "/" + self.key.format(**values)
+
+    @property
+    def pagination_class(self):
+        """Pagination class which is used by the route's requests."""
+        if self.query == KEYSET_QUERY:
+            return KeysetPagination
+        return getattr(self.view_class, "pagination_class", None)
+
+    @property
+    def paginated(self) -> bool:
+        """Whether the route returns a paginated list."""
+        if self.action != "list" or self.pagination_class is None:
+            return False
+        return hasattr(self.pagination_class, "page_size")
+
+
+class Measurement(NamedTuple):
+    """Result of measuring a request."""
+
+    status_code: int
+    queries: int
+    seconds: float
+
+
+def _normalize(pattern: str) -> str:
+    """Convert a URL pattern to a format string, e.g. "blog/posts/{pk}/"."""
+    pattern = pattern.replace("^", "").replace("$", "")
+    pattern = _REGEX_GROUP.sub(r"{\1}", pattern)
+    return _PATH_CONVERTER.sub(r"{\1}", pattern)
+
+
+def _walk(patterns, prefix="") -> Iterator[Tuple[str, URLPattern]]:
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield prefix + str(pattern.pattern), pattern
+
+
+def get_routes() -> List[Route]:
+    """Collect the GET routes which are served by the API views.
+
+    Format suffix routes and the routes in SKIPPED_ROUTES are ignored. Lists
+    which support the keyset pagination are collected in both modes.
+    """
+    routes = {}
+    for pattern, url_pattern in _walk(get_resolver().url_patterns):
+        view_class = getattr(url_pattern.callback, "cls", None)
+        if view_class is None or not issubclass(view_class, APIView):
+            continue
+        key = _normalize(pattern)
+        if "{format}" in key or key in SKIPPED_ROUTES:
+            continue
+        actions = getattr(url_pattern.callback, "actions", None)
+        if actions is not None:
+            action = actions.get("get")
+            if action is None:
+                continue
+        elif hasattr(view_class, "get"):
+            action = None
+        else:
+            continue
+        route = Route(
+            key,
+            view_class,
+            action,
+            tuple(re.findall(r"{(\w+)}", key)),
+            ROUTE_QUERIES.get(key, ""),
+        )
+        routes.setdefault(route.key, route)
+        if _supports_keyset(route):
+            route = route._replace(query=KEYSET_QUERY)
+            routes.setdefault(route.key, route)
+    return sorted(routes.values())
+
+
+def installed_apps() -> List[str]:
+    """Get the installed apps with the measured ones which aren't installed."""
+    return [
+        *settings.INSTALLED_APPS,
+        *(app for app in APPS if app not in settings.INSTALLED_APPS),
+    ]
+
+
+def create_tables(databases: Iterable[str]):
+    """Create the missing tables of the installed models in test databases.
+
+    The apps which are installed by "installed_apps" after the test databases are
+    created have none. "post_migrate" is sent then, like by "migrate", so the apps
+    create the rest of their schema (e.g. the search index). It can't run in a
+    transaction on SQLite.
+
+    Args:
+        databases (Iterable[str]): aliases of the test case's databases.
+    """
+    for alias in sorted(databases):
+        connection = connections[alias]
+        tables = set(connection.introspection.table_names())
+        models = [
+            model for model in apps.get_models() if model._meta.db_table not in tables
+        ]
+        if not models:
+            continue
+        with connection.schema_editor() as editor:
+            for model in models:
+                editor.create_model(model)
+        emit_post_migrate_signal(verbosity=0, interactive=False, db=alias)
+
+
+def _supports_keyset(route):
+    if not route.paginated or not issubclass(route.view_class, BaseViewSet):
+        return False
+    model = _model(route.view_class)
+    return model is not None and KeysetPagination.supports(model)
+
+
+def _create(model_label, **kwargs):
+    return apps.get_model(model_label).objects.create(**kwargs)
+
+
+def seed(media_root=None) -> Dict[str, str]:
+    """Create a dataset for the installed apps.
+
+    Every nested route gets SEED_SIZE children under the first parent, so the
+    list routes can be compared at different page sizes.
+
+    Args:
+        media_root (Optional[pathlib.Path]): media root to create files in.
+
+    Returns:
+        dict: the values of URL kwargs, e.g. {"post_pk": "1"}.
+    """
+    Group.objects.get_or_create(name=settings.DEFAULT_USER_GROUP)
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    admin = User.objects.create_superuser(
+        username=ADMIN_USERNAME,
+        mobile="1000",
+        password="budget-password",
+        is_active=True,
+    )
+    users = [
+        User.objects.create(
+            username=f"budget-user{i}", mobile=str(2000 + i), is_active=True
+        )
+        for i in range(SEED_SIZE)
+    ]
+    for user in [admin, *users]:
+        _create(
+            "account.Address",
+            user=user,
+            country="country",
+            city="city",
+            state="state",
+            post_code="1234",
+            address="address",
+            house_number="1",
+            floor="1",
+            unit="1",
+        )
+    values = {"user_pk": admin.pk}
+
+    tags = [_create("base.Tag", name=f"tag{i}") for i in range(SEED_SIZE)]
+    categories = [_create("base.Category", name="category0")]
+    for i in range(1, SEED_SIZE):
+        categories.append(
+            _create("base.Category", name=f"category{i}", parent=categories[i // 2])
+        )
+    values.update(tag_pk=tags[0].pk, category_pk=categories[0].pk)
+
+    link_targets = tags
+    if apps.is_installed("blog"):
+        posts = []
+        for i in range(SEED_SIZE):
+            post = _create(
+                "blog.Post",
+                title=f"post{i}",
+                brief="brief",
+                content="content",
+                slug=f"post{i}",
+                image="https://example.com/post.png",
+                user=admin,
+                category=categories[0],
+                previous=posts[-1] if posts else None,
+                is_approved=True,
+            )
+            post.tags.set(tags[:3])
+            post.bookmarks.set(users[:3])
+            posts.append(post)
+        for i, user in enumerate(users):
+            _create("blog.PostComment", user=user, post=posts[0], message=f"comment{i}")
+            _create("blog.PostStar", user=user, post=posts[0], star=5)
+        values["post_pk"] = posts[0].pk
+        link_targets = posts
+    link_type = ContentType.objects.get_for_model(link_targets[0])
+
+    if apps.is_installed("page"):
+        group_menu = None
+        for i in range(SEED_SIZE):
+            _create("page.Page", title=f"page{i}", content="content")
+            group_menu = _create(
+                "page.GroupMenu", name=f"group{i}", parent=group_menu, order=i
+            )
+            _create(
+                "page.Menu",
+                label=f"menu{i}",
+                group_menu=group_menu,
+                link_type=link_type,
+                link=str(link_targets[i].pk),
+                order=i,
+            )
+
+    if apps.is_installed("slideshow"):
+        groups = [
+            _create("slideshow.GroupSlideShow", name=f"group{i}")
+            for i in range(SEED_SIZE)
+        ]
+        for i in range(SEED_SIZE):
+            _create(
+                "slideshow.SlideShow",
+                title=f"slide{i}",
+                image="https://example.com/slide.png",
+                group_slideshow=groups[0],
+                link_type=link_type,
+                link=str(link_targets[i].pk),
+                order=i,
+            )
+        values["group_pk"] = groups[0].pk
+
+    if apps.is_installed("shop.product"):
+        values.update(_seed_products(admin, users, tags, categories[0]))
+
+    if media_root is not None:
+        directory = media_root / str(admin.pk) / "budget"
+        directory.mkdir(parents=True)
+        for i in range(SEED_SIZE):
+            (directory / f"file{i}.txt").write_text("budget")
+        values["path"] = "budget"
+
+    return {name: str(value) for name, value in values.items()}
+
+
+def _seed_products(admin, users, tags, category):
+    """Create products, and the carts, prices and payments which refer to them.
+
+    Returns:
+        dict: the values of the products' nested routes kwargs.
+    """
+    publishers = [
+        _create("product.Publisher", name=f"publisher{i}") for i in range(SEED_SIZE)
+    ]
+    authors = [_create("product.Author", name=f"author{i}") for i in range(SEED_SIZE)]
+    translators = [
+        _create("product.Translator", name=f"translator{i}") for i in range(SEED_SIZE)
+    ]
+    speakers = [
+        _create("product.Speaker", name=f"speaker{i}") for i in range(SEED_SIZE)
+    ]
+    devices = [
+        _create("product.CompatibleDevice", name=f"d{i}", version="1")
+        for i in range(SEED_SIZE)
+    ]
+    audio_types = [_create("product.AudioType", name=f"t{i}") for i in range(SEED_SIZE)]
+    common = {
+        "description": "description",
+        "seller": admin,
+        "category": category,
+        "image": "https://example.com/book.png",
+        "inventory": 10,
+        "buy_price": 50,
+        "sel_price": 100,
+        "extra": {},
+        "intro": "https://example.com/intro.mp3",
+        "published_year": 2000,
+        "is_approved": True,
+    }
+    products = []
+    for i in range(SEED_SIZE):
+        index = _create(
+            "product.AudioIndex",
+            title=f"index{i}",
+            file="https://example.com/a.mp3",
+            duration=1,
+        )
+        audio_book = _create(
+            "product.AudioBook",
+            name=f"audio{i}",
+            product_code=f"audio{i}",
+            book_publisher=publishers[i],
+            audio_publisher=publishers[-i - 1],
+            indices=index,
+            audio_type=audio_types[i],
+            **common,
+        )
+        paper_book = _create(
+            "product.PaperBook",
+            name=f"paper{i}",
+            product_code=f"paper{i}",
+            book_publisher=publishers[i],
+            **common,
+        )
+        audio_book.compatible_devices.set(devices[:2])
+        audio_book.speakers.set(speakers[:2])
+        for book in (audio_book, paper_book):
+            book.authors.set(authors[:2])
+            book.translators.set(translators[:2])
+            book.tags.set(tags[:2])
+            book.bookmarks.add(admin, *users[:2])
+        products += [audio_book, paper_book]
+
+    for product in products:
+        if apps.is_installed("shop.price"):
+            _create("price.Price", product=product, inventory=10, price=100)
+        if apps.is_installed("shop.cart"):
+            _create("cart.Cart", user=admin, product=product, quantity=1)
+
+    if apps.is_installed("shop.payment"):
+        address = admin.address_user.first()
+        for i, product in enumerate(products[:SEED_SIZE]):
+            _create(
+                "payment.Order",
+                user=admin,
+                delivery_address=address,
+                product=product,
+                total_price=100,
+                invoice_number=i,
+            )
+            _create(
+                "payment.Payment", user=admin, payment_type="online", total_payment=100
+            )
+
+    return {
+        "tags_pk": tags[0].pk,
+        "compatible_devices_pk": devices[0].pk,
+        "publishers_pk": publishers[0].pk,
+        "book_authors_pk": authors[0].pk,
+        "book_translators_pk": translators[0].pk,
+        "audio_speakers_pk": speakers[0].pk,
+    }
+
+
+def detail_kwargs(route: Route, values: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """Resolve the kwargs of a route, or None if it can't be resolved."""
+    kwargs = {}
+    for name in route.kwargs:
+        if name in values:
+            kwargs[name] = values[name]
+        elif name == "pk" and _model(route.view_class) is not None:
+            obj = _model(route.view_class)._base_manager.order_by("pk").first()
+            if obj is None:
+                return None
+            kwargs[name] = str(obj.pk)
+        else:
+            return None
+    return kwargs
+
+
+def _model(view_class):
+    """Get the model of a view from its queryset or its serializer."""
+    queryset = getattr(view_class, "queryset", None)
+    if queryset is not None:
+        return queryset.model
+    serializer_class = getattr(view_class, "serializer_class", None)
+    return getattr(getattr(serializer_class, "Meta", None), "model", None)
+
+
+def measure(client, url: str, repeat: int = 3) -> Measurement:
+    """Request a URL and measure its queries and wall-clock time.
+
+    The fastest of "repeat" requests is kept, so one-off pauses (e.g. garbage
+    collection) don't count against the route. Streamed responses are consumed,
+    since their queries run while they're streamed.
+    """
+    best = None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            seconds = time.perf_counter() - start
+        if best is None or seconds < best.seconds:
+            best = Measurement(
+                response.status_code, len(context.captured_queries), seconds
+            )
+    return best
+
+
+def load_baseline(path) -> Dict[str, Dict]:
+    """Load a baseline file, or an empty one if it doesn't exist."""
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, baseline: Dict[str, Dict]):
+    """Save a baseline file in a stable format."""
+    with open(path, "w") as fp:
+        json.dump(baseline, fp, indent=4, sort_keys=True)
+        fp.write("\n")
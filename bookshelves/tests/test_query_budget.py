@@ -0,0 +1,135 @@
+"""Per-endpoint SQL query budget tests."""
+import pathlib
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from . import query_budget
+
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryBudgetTest(APITestCase):
+    """Check queries and wall-clock time of every GET route against the baseline.
+
+    Run with THRUSH_QUERY_BUDGET_UPDATE=1 to rewrite the baseline file.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Serve all the apps' routes and the media files from a temporary directory."""
+        # The apps are installed before the test case's transaction starts, since
+        # their missing tables are created then.
+        apps_settings = override_settings(
+            INSTALLED_APPS=query_budget.installed_apps(),
+            ROOT_URLCONF=query_budget.URLCONF,
+        )
+        apps_settings.enable()
+        cls.addClassCleanup(apps_settings.disable)
+
+        media_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=pathlib.Path(media_root.name))
+        media_settings.enable()
+        cls.addClassCleanup(media_settings.disable)
+        super().setUpClass()
+
+    @classmethod
+    def _enter_atomics(cls):
+        """Create the missing tables before the test case's transaction starts.
+
+        It runs after the other databases are disallowed, so only the test case's
+        databases are touched.
+        """
+        query_budget.create_tables(cls.databases)
+        return super()._enter_atomics()
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed the dataset once for the whole test case."""
+        # Read models (e.g. the catalog) are built on commit.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.values = query_budget.seed(settings.MEDIA_ROOT)
+        cls.admin = get_user_model().objects.get(username=query_budget.ADMIN_USERNAME)
+
+    def _measure(self, url, repeat=3):
+        # The first request warms up the per-process caches (content types, etc.).
+        self.client.get(url)
+        return query_budget.measure(self.client, url, repeat)
+
+    def _measure_page_sizes(self, route, url):
+        queries = []
+        for page_size in query_budget.PAGE_SIZES:
+            with mock.patch.object(route.pagination_class, "page_size", page_size):
+                queries.append(self._measure(url, repeat=1).queries)
+        return queries
+
+    @staticmethod
+    def _time_limit(budget):
+        return max(
+            budget["seconds"] * settings.QUERY_BUDGET_TIME_FACTOR,
+            settings.QUERY_BUDGET_TIME_FLOOR,
+        )
+
+    def _budget(self, result, budget=None):
+        """Get the budget of a measurement; the current one is kept if it holds."""
+        if budget is not None and budget["queries"] == result.queries:
+            if result.seconds <= self._time_limit(budget):
+                return budget
+        return {"queries": result.queries, "seconds": round(result.seconds, 4)}
+
+    def test_query_budget(self):
+        """Every GET route should stay within its baseline budget."""
+        baseline = query_budget.load_baseline(settings.QUERY_BUDGET_BASELINE)
+        measured = {}
+        self.client.force_authenticate(self.admin)
+
+        for route in query_budget.get_routes():
+            with self.subTest(route=route.key):
+                kwargs = query_budget.detail_kwargs(route, self.values)
+                self.assertIsNotNone(
+                    kwargs, "URL kwargs can't be resolved from the dataset"
+                )
+                url = route.url(kwargs)
+
+                result = self._measure(url)
+                self.assertLess(result.status_code, 500)
+
+                known_growth = route.pattern in query_budget.KNOWN_PAGE_SIZE_GROWTH
+                if route.paginated and not known_growth:
+                    small, large = self._measure_page_sizes(route, url)
+                    self.assertEqual(
+                        small,
+                        large,
+                        f"queries grow with the page size {query_budget.PAGE_SIZES}",
+                    )
+
+                budget = baseline.get(route.key)
+                # Budgets which still hold are kept to avoid noise in the baseline.
+                measured[route.key] = self._budget(result, budget)
+                if settings.QUERY_BUDGET_UPDATE:
+                    continue
+                self.assertIsNotNone(budget, "route is missing from the baseline")
+                self.assertLessEqual(
+                    result.queries, budget["queries"], "query budget exceeded"
+                )
+                self.assertLessEqual(
+                    result.seconds, self._time_limit(budget), "time budget exceeded"
+                )
+
+        if settings.QUERY_BUDGET_UPDATE:
+            query_budget.save_baseline(settings.QUERY_BUDGET_BASELINE, measured)
+            return
+        self.assertEqual(
+            sorted(baseline.keys() - measured.keys()),
+            [],
+            "routes of the baseline aren't measured; remove them from the baseline",
+        )
@@ -0,0 +1,18 @@
+"""URL configuration of the tests; the routers of all the apps are included."""
+from base.views import ResponseCacheStatsView
+from django.urls import include, path
+
+
+urlpatterns = [
+    path("account/", include(("account.urls", "account"))),
+    path("base/", include(("base.urls", "base"))),
+    path("blog/", include(("blog.urls", "blog"))),
+    path("shop/", include(("shop.cart.urls", "cart"))),
+    path("shop/", include(("shop.payment.urls", "payment"))),
+    path("file/", include(("file.urls", "file"))),
+    path("page/", include(("page.urls", "page"))),
+    path("slideshow/", include(("slideshow.urls", "slideshow"))),
+    path("shop/products/", include(("shop.product.urls", "product"))),
+    path("shop/price/", include(("shop.price.urls", "price"))),
+    path("cache-stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
+]